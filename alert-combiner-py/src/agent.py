@@ -16,14 +16,21 @@ from forta_agent import FindingSeverity, get_labels, get_alerts
 
 from src.findings import AlertCombinerFinding
 from src.constants import (BASE_BOTS, ENTITY_CLUSTER_BOT_ALERT_ID, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, ALERTED_FP_CLUSTERS_QUEUE_SIZE, MANUALLY_ALERTED_ENTITIES_QUEUE_SIZE, ATTACK_DETECTOR_BOT_ID, ATTACK_DETECTOR_BETA_BOT_ID,
-                           FP_MITIGATION_BOTS, ENTITY_CLUSTER_BOT, ANOMALY_SCORE_THRESHOLD_STRICT, ANOMALY_SCORE_THRESHOLD_LOOSE,
-                           MIN_ALERTS_COUNT, ALERTED_CLUSTERS_STRICT_KEY, ALERTED_CLUSTERS_LOOSE_KEY, ALERTED_FP_CLUSTERS_KEY, MANUALLY_ALERTED_ENTITIES_KEY, VICTIM_IDENTIFICATION_BOTS, DEFAULT_ANOMALY_SCORE, HIGHLY_PRECISE_BOTS,
-                           ALERTED_CLUSTERS_FP_MITIGATED_KEY, FINDINGS_CACHE_BLOCK_KEY, END_USER_ATTACK_BOTS, POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD, PASSTHROUGH_BOTS, ENCRYPTED_BOTS)
+                           FP_MITIGATION_BOTS, ENTITY_CLUSTER_BOT,
+                           ALERTED_CLUSTERS_STRICT_KEY, ALERTED_CLUSTERS_LOOSE_KEY, ALERTED_FP_CLUSTERS_KEY, MANUALLY_ALERTED_ENTITIES_KEY, VICTIM_IDENTIFICATION_BOTS, DEFAULT_ANOMALY_SCORE, HIGHLY_PRECISE_BOTS,
+                           ALERTED_CLUSTERS_FP_MITIGATED_KEY, FINDINGS_CACHE_BLOCK_KEY, END_USER_ATTACK_BOTS, POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD, PASSTHROUGH_BOTS, ENCRYPTED_BOTS,
+                           CLUSTER_STATE_CACHE_SIZE, CLUSTER_SET_REFRESH_INTERVAL_IN_SECONDS, CLUSTER_SET_FULL_RESYNC_INTERVAL_IN_SECONDS,
+                           VICTIM_CACHE_SIZE, VICTIM_CACHE_TTL_IN_SECONDS, VICTIM_CACHE_NEGATIVE_TTL_IN_SECONDS, PIPELINE_MAX_CONCURRENCY)
 from src.L2Cache import L2Cache
-from src.storage import s3_client, dynamo_table, get_secrets
+from src.storage import s3_client, dynamo_table, get_secrets, ThreadLocalTable
 from src.blockchain_indexer_service import BlockChainIndexer
 from src.utils import Utils
 from src.dynamo_utils import DynamoUtils, PROD_TAG
+from src.cluster_state import ClusterStateCache
+from src.cluster_set import ClusterSet
+from src.victim_cache import VictimCache
+from src.rules import Predicates, RuleEngine, ATTACK_DETECTOR_RULES, STRICT, LOOSE, FP_MITIGATED
+from src.pipeline import AsyncPipeline
 
 
 web3 = Web3(Web3.HTTPProvider(get_json_rpc_url()))
@@ -42,6 +49,14 @@ ALERTED_FP_CLUSTERS = []
 REACTIVE_LIKELY_FPS = {}  # address -> list of label and label metadata (addresses that are yet to be checked)
 LAST_PROCESSED_TIME = 0 # Used to update reactive likely fps
 FINDINGS_CACHE_BLOCK = []
+CLUSTER_STATE_CACHE = ClusterStateCache(CLUSTER_STATE_CACHE_SIZE)  # cluster -> deduped alerts and aggregates; write-through to dynamo
+FP_MITIGATION_CLUSTERS = ClusterSet("fp_mitigation_clusters", lambda du, dynamo, since: du.read_fp_mitigation_clusters(dynamo, since),
+                                    CLUSTER_SET_REFRESH_INTERVAL_IN_SECONDS, CLUSTER_SET_FULL_RESYNC_INTERVAL_IN_SECONDS)
+RULE_ENGINE = RuleEngine(ATTACK_DETECTOR_RULES)
+VICTIM_CACHE = VictimCache(VICTIM_CACHE_SIZE, VICTIM_CACHE_TTL_IN_SECONDS, VICTIM_CACHE_NEGATIVE_TTL_IN_SECONDS)
+END_USER_ATTACK_CLUSTERS = ClusterSet("end_user_attack_clusters", lambda du, dynamo, since: du.read_end_user_attack_clusters(dynamo, since),
+                                      CLUSTER_SET_REFRESH_INTERVAL_IN_SECONDS, CLUSTER_SET_FULL_RESYNC_INTERVAL_IN_SECONDS)
+PIPELINE = AsyncPipeline(PIPELINE_MAX_CONCURRENCY)  # concurrent lookups and fired writes of an alert
 
 s3 = None
 dynamo = None
@@ -97,6 +112,24 @@ def initialize():
     global CONTRACT_CACHE
     CONTRACT_CACHE = {}
 
+    global CLUSTER_STATE_CACHE
+    CLUSTER_STATE_CACHE.clear()
+
+    global FP_MITIGATION_CLUSTERS
+    FP_MITIGATION_CLUSTERS.clear()
+
+    global END_USER_ATTACK_CLUSTERS
+    END_USER_ATTACK_CLUSTERS.clear()
+
+    global RULE_ENGINE
+    RULE_ENGINE.clear()
+
+    global VICTIM_CACHE
+    VICTIM_CACHE.clear()
+
+    global PIPELINE
+    PIPELINE.clear()
+
     subscription_json = []
     for bot, alertId, stage in BASE_BOTS:
         subscription_json.append({"botId": bot, "alertId": alertId, "chainId": CHAIN_ID})
@@ -142,7 +175,7 @@ def reinitialize():
         if dynamo is None:
             secrets = get_secrets()
             s3 = s3_client(secrets)
-            dynamo = dynamo_table(secrets)
+            dynamo = ThreadLocalTable(lambda: dynamo_table(secrets))  # the pipeline and cluster set threads each use their own table resource
             logging.info(f"Initialized dynamo DB successfully.")
     except Exception as e:
         logging.error(f"Error getting chain id: {e}")
@@ -207,7 +240,7 @@ def get_victim_info(alert_data: pd.DataFrame, victims: dict):
             victim_address = victim_metadata["potential_victim"] if "potential_victim" in victim_metadata.keys() and victim_metadata["potential_victim"] != "Unknown" else ""
         victim_name = victim_metadata["tag1"] if "tag1" in victim_metadata.keys() else ""
         if victim_name == "" and victim_address != "":
-            victim_name = Utils.get_etherscan_label(victim_address)
+            victim_name = VICTIM_CACHE.get_label(victim_address)
 
 
     return victim_address, victim_name, victim_metadata
@@ -404,6 +437,7 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
             #  assess whether we generate a finding
             #  note, only one instance will be running at a time to keep up with alert volume
             try:
+                PIPELINE.flush()  # the writes of the previous alert
 
                 # decrypt the alert if needed
                 if alert_event.bot_id in ENCRYPTED_BOTS.keys() and alert_event.name == 'omitted':
@@ -420,23 +454,17 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                     cluster = alert_event.alert.metadata["entityAddresses"].lower()
 
                     for address in cluster.split(','):
-                        du.put_entity_cluster(dynamo, alert_event.alert.created_at, address, cluster)
-                        
-                        stored_alert_data_address = du.read_alert_data(dynamo, address)
-
-                        if not stored_alert_data_address.empty:
-                            du.delete_alert_data(dynamo, address)
-                            stored_alert_data_cluster = du.read_alert_data(dynamo, cluster)
-                            if not stored_alert_data_cluster.empty:
-                                alert_data_cluster = pd.concat([stored_alert_data_address, stored_alert_data_cluster], ignore_index=True, axis=0).drop_duplicates(subset=['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'transaction_hash'], inplace=False)
-                            else:
-                                alert_data_cluster = stored_alert_data_address.drop_duplicates(subset=['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'transaction_hash'], inplace=False)
-                            du.put_alert_data(dynamo, cluster, alert_data_cluster)
+                        PIPELINE.fire("entity_cluster_write", du.put_entity_cluster, dynamo, alert_event.alert.created_at, address, cluster)
+                        PIPELINE.fire("alert_history_write", du.move_alert_data, dynamo, address, cluster)
+                        CLUSTER_STATE_CACHE.invalidate(address)
+                        CLUSTER_STATE_CACHE.invalidate(cluster)
                         
-                        if address in du.read_fp_mitigation_clusters(dynamo):
-                            du.put_fp_mitigation_cluster(dynamo, cluster)
-                        if address in du.read_end_user_attack_clusters(dynamo):
-                            du.put_end_user_attack_cluster(dynamo, cluster)
+                        if FP_MITIGATION_CLUSTERS.contains(du, dynamo, address):
+                            PIPELINE.fire("fp_mitigation_cluster_write", du.put_fp_mitigation_cluster, dynamo, cluster)
+                            FP_MITIGATION_CLUSTERS.add(cluster)
+                        if END_USER_ATTACK_CLUSTERS.contains(du, dynamo, address):
+                            PIPELINE.fire("end_user_attack_cluster_write", du.put_end_user_attack_cluster, dynamo, cluster)
+                            END_USER_ATTACK_CLUSTERS.add(cluster)
 
                 # update victim alerts
                 if (in_list(alert_event, VICTIM_IDENTIFICATION_BOTS)):
@@ -448,7 +476,8 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                         transaction_hash = alert_event.alert.source.transaction_hash
                         
                     if transaction_hash is not None:
-                        du.put_victim(dynamo, transaction_hash, alert_event.alert.metadata) 
+                        PIPELINE.fire("victim_write", du.put_victim, dynamo, transaction_hash, alert_event.alert.metadata)
+                        VICTIM_CACHE.put(transaction_hash, alert_event.alert.metadata)
                     
 
                 # update FP mitigation clusters
@@ -459,7 +488,8 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                     entity_clusters = du.read_entity_clusters(dynamo, address)
                     if address in entity_clusters.keys():
                         cluster = entity_clusters[address]
-                    du.put_fp_mitigation_cluster(dynamo, cluster.lower())
+                    PIPELINE.fire("fp_mitigation_cluster_write", du.put_fp_mitigation_cluster, dynamo, cluster.lower())
+                    FP_MITIGATION_CLUSTERS.add(cluster.lower())
 
                 # update end user clusters
                 if in_list(alert_event, END_USER_ATTACK_BOTS):
@@ -470,7 +500,8 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                         entity_clusters = du.read_entity_clusters(dynamo, address)
                         if address in entity_clusters.keys():
                             cluster = entity_clusters[address]
-                        du.put_end_user_attack_cluster(dynamo, cluster.lower())
+                        PIPELINE.fire("end_user_attack_cluster_write", du.put_end_user_attack_cluster, dynamo, cluster.lower())
+                        END_USER_ATTACK_CLUSTERS.add(cluster.lower())
                         logging.info(f"alert {alert_event.alert_hash} adding end user attacks cluster: {cluster}.")
 
                 # update alerts and process them for a given cluster
@@ -481,12 +512,19 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                     bot_sources = set()
                     pot_attacker_addresses = get_pot_attacker_addresses(alert_event)
 
+                    # the entity clusters of all addresses and the alert history of the clusters are read concurrently;
+                    # cold clusters are read in full, cached ones only since their latest alert
+                    PIPELINE.flush()
+                    address_entity_clusters = PIPELINE.lookup({address.lower(): ("entity_clusters", du.read_entity_clusters, dynamo, address.lower()) for address in pot_attacker_addresses})
+                    clusters = {address_entity_clusters[address].get(address, address) for address in address_entity_clusters.keys()}
+                    since = {cluster: CLUSTER_STATE_CACHE.get_since(cluster) for cluster in clusters if Utils.is_address(cluster)}
+                    stored_alert_data = PIPELINE.lookup({cluster: ("alert_history", du.read_alert_data, dynamo, cluster, since[cluster]) for cluster in since.keys()})
 
                     for address in pot_attacker_addresses:
                         logging.info(f"alert {alert_event.alert_hash} - Analysing address {address}")
                         address_lower = address.lower()
                         cluster = address_lower
-                        entity_clusters = du.read_entity_clusters(dynamo, address_lower)
+                        entity_clusters = address_entity_clusters[address_lower]
                         if address_lower in entity_clusters.keys():
                             cluster = entity_clusters[address_lower]
                         if(not Utils.is_address(cluster)):  # ignore contracts and invalid addresses like 0x0000000000000blabla
@@ -502,15 +540,11 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
 
                         base_columns = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'addresses', 'transaction_hash', 'address_filter']
 
-                        stored_alert_data_cluster = du.read_alert_data(dynamo, cluster)
-                        if stored_alert_data_cluster.empty:
-                            if CHAIN_ID in [10, 42161]:
-                                columns = base_columns + ['chain_id']
-                            else:
-                                columns = base_columns
-                            alert_data_cluster = pd.DataFrame(columns=columns)
+                        if CHAIN_ID in [10, 42161]:
+                            columns = base_columns + ['chain_id']
                         else:
-                            alert_data_cluster = stored_alert_data_cluster
+                            columns = base_columns
+                        state = CLUSTER_STATE_CACHE.get(du, dynamo, cluster, columns, stored_alert_data.get(cluster), since.get(cluster))
 
                         stage = ALERT_ID_STAGE_MAPPING[(alert_event.bot_id, alert_event.alert.alert_id)]
                         address_filter = alert_event.alert.address_filter
@@ -526,18 +560,16 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                         else:
                             columns = base_columns
                             new_alert_data = pd.DataFrame([[stage, datetime.strptime(alert_event.alert.created_at[:-4] + 'Z', "%Y-%m-%dT%H:%M:%S.%fZ"), alert_anomaly_score, alert_event.alert_hash, alert_event.bot_id, alert_event.alert.alert_id, alert_event.alert.addresses, alert_event.alert.source.transaction_hash, filter_data]], columns=columns)
-                        alert_data_cluster = pd.concat([alert_data_cluster, new_alert_data], ignore_index=True, axis=0).drop_duplicates(subset=['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'transaction_hash'], inplace=False)
-                        logging.info(f"alert {alert_event.alert_hash} - alert data size for cluster {cluster} now: {len(alert_data_cluster)}")
-                        du.put_alert_data(dynamo, cluster, alert_data_cluster)
-                        alert_data = alert_data_cluster
+                        CLUSTER_STATE_CACHE.add(du, dynamo, cluster, state, new_alert_data,
+                                                lambda fn, *args: PIPELINE.fire("alert_history_write", fn, *args))  # only the new alert is written; the stored ones are kept
+                        logging.info(f"alert {alert_event.alert_hash} - alert data size for cluster {cluster} now: {len(state)}")
                         
                         # contains highly precise bot
                         highly_precise_bot_alert_id_count = 0
                         is_highly_precise_bot_preparation_stage_alert_id = False
                         highly_precise_bot_ids = set()
-                        uniq_bot_alert_ids = alert_data[['bot_id', 'alert_id']].drop_duplicates(inplace=False)
                         for bot_id, alert_id, s in HIGHLY_PRECISE_BOTS:
-                            if len(uniq_bot_alert_ids[(uniq_bot_alert_ids['bot_id'] == bot_id) & (uniq_bot_alert_ids['alert_id'] == alert_id)]) > 0:
+                            if (bot_id, alert_id) in state.bot_alert_ids:
                                 highly_precise_bot_alert_id_count += 1
                                 if not is_highly_precise_bot_preparation_stage_alert_id and  s == "Preparation":
                                     is_highly_precise_bot_preparation_stage_alert_id = True
@@ -552,53 +584,59 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                             bot_sources.add("Forta Base Bots") # a little convoluted; its because when we dont have a passthrough bots, we dont have a source value, so we set it manually as only passthrough bots have sources
                             
                         for bot_id, alert_id, source in PASSTHROUGH_BOTS:
-                            matching_bots = uniq_bot_alert_ids[(uniq_bot_alert_ids['bot_id'] == bot_id) & (uniq_bot_alert_ids['alert_id'] == alert_id)]
-                            if len(matching_bots) > 0:
+                            if (bot_id, alert_id) in state.bot_alert_ids:
                                 bot_sources.add(source)
                         
 
 
                         # analyze alert_data to see whether conditions are met to generate a finding
-                        # 1. Have to have at least MIN_ALERTS_COUNT bots reporting alerts
-                        if len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT or highly_precise_bot_alert_id_count>0 or is_passthrough_bot:
-                            # 2. Have to have overall anomaly score of less than ANOMALY_SCORE_THRESHOLD
-                            anomaly_scores_by_stages = alert_data[['stage', 'anomaly_score']].drop_duplicates(inplace=False)
-                            anomaly_scores = anomaly_scores_by_stages.groupby('stage').min()
-                            anomaly_score = anomaly_scores['anomaly_score'].prod()
+                        anomaly_scores = state.anomaly_scores  # stage -> min anomaly score
+                        anomaly_score = state.get_anomaly_score()
+                        predicates = Predicates(len(anomaly_scores), anomaly_score, len(state.bot_ids), highly_precise_bot_alert_id_count, len(highly_precise_bot_ids), is_passthrough_bot)
+                        if predicates.has_min_alerts():
                             logging.info(f"alert {alert_event.alert_hash} - Have sufficient number of alerts for {cluster}. Overall anomaly score is {anomaly_score}, {len(anomaly_scores)} stages, {highly_precise_bot_alert_id_count} highly precise bot alert ids, {len(highly_precise_bot_ids)} highly precise bot ids, {is_passthrough_bot} passthrough bot {is_passthrough_bot}.")
                             logging.info(f"alert {alert_event.alert_hash} - {cluster} anomaly scores {anomaly_scores}.")
 
-                           
-                            
-
                             # Check if a preparation alert should also be emitted
-                            is_preparation_alert = is_highly_precise_bot_preparation_stage_alert_id and not ('MoneyLaundering' in anomaly_scores.index or 'Exploitation' in anomaly_scores.index)
+                            is_preparation_alert = is_highly_precise_bot_preparation_stage_alert_id and not ('MoneyLaundering' in anomaly_scores or 'Exploitation' in anomaly_scores)
                             
-                            if anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE or len(anomaly_scores) == 4 or is_passthrough_bot or (highly_precise_bot_alert_id_count>0 and len(anomaly_scores)>1) or (len(highly_precise_bot_ids)>1):
+                            if predicates.exceeds_threshold():
                                 logging.info(f"alert {alert_event.alert_hash} - Overall anomaly score for {cluster} is below threshold, 4 stages, or highly precise bot with 2 stages have been observed or two highly precise bots have been observed or a passthrough alert has been observed. Unless FP mitigation kicks in, will raise finding.")
 
-                                if CHAIN_ID in [10, 42161] and alert_data[alert_data['chain_id'] == CHAIN_ID].empty:
+                                if CHAIN_ID in [10, 42161] and CHAIN_ID not in state.chain_ids:
                                     logging.info(f"No alert on chain {CHAIN_ID} for {cluster}. Wont raise finding")
                                     continue
 
-                                fp_mitigated = False
-                                end_user_attack = False
-                                if(Utils.is_contract(w3, cluster)):
+                                if PIPELINE.lookup({"is_contract": ("contract", Utils.is_contract, w3, cluster)})["is_contract"]:
                                     logging.info(f"alert {alert_event.alert_hash} - {cluster} is contract. Wont raise finding")
                                     continue
 
+                                # the fp mitigation checks and the victims of an EOA cluster do not depend on each other and are looked up concurrently
+                                lookups = {
+                                    "is_fp_mitigation_cluster": ("fp_mitigation_clusters", FP_MITIGATION_CLUSTERS.contains, du, dynamo, cluster),
+                                    "is_end_user_attack_cluster": ("end_user_attack_clusters", END_USER_ATTACK_CLUSTERS.contains, du, dynamo, cluster),
+                                    "victims": ("victims", VICTIM_CACHE.get, du, dynamo, cluster, state.get_transaction_hashes())
+                                }
+                                if CHAIN_ID == 1:
+                                    lookups["etherscan_labels"] = ("etherscan_labels", block_chain_indexer.get_etherscan_labels, cluster, CHAIN_ID)
+                                else:
+                                    lookups["etherscan_label"] = ("etherscan_labels", Utils.get_etherscan_label, cluster)
+                                if not (CHAIN_ID == 137 and len(state) > POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD):
+                                    lookups["is_polygon_validator"] = ("polygon_validator", is_polygon_validator, w3, cluster, alert_event.alert.source.transaction_hash)
+                                results = PIPELINE.lookup(lookups)
+
                                 if CHAIN_ID == 1:
                                     # Etherscan API
-                                    etherscan_labels = block_chain_indexer.get_etherscan_labels(cluster, CHAIN_ID)
+                                    etherscan_labels = results["etherscan_labels"]
                                     if etherscan_labels and all(
                                         not any(word in label.lower() for word in ['attack', 'phish', 'hack', 'heist', 'drainer', 'exploit', 'scam', 'fraud', '.eth'])
                                         for label in etherscan_labels
                                     ):                 
                                         logging.info(f"alert {alert_event.alert_hash} - Non attacker etherscan FP mitigation labels for cluster {cluster}.")
-                                        fp_mitigated = True
+                                        predicates.fp_mitigated = True
                                 else:
                                     # Forta API
-                                    etherscan_label = Utils.get_etherscan_label(cluster).lower()
+                                    etherscan_label = results["etherscan_label"].lower()
                                     if not ('attack' in etherscan_label
                                             or 'phish' in etherscan_label
                                             or 'hack' in etherscan_label
@@ -610,76 +648,38 @@ def detect_attack(w3, du, alert_event: forta_agent.alert_event.AlertEvent) -> li
                                             or '.eth' in etherscan_label
                                             or etherscan_label == ''):
                                         logging.info(f"alert {alert_event.alert_hash} -  Non attacker etherscan FP mitigation label {etherscan_label} for cluster {cluster}.")
-                                        fp_mitigated = True
+                                        predicates.fp_mitigated = True
 
-                                if (CHAIN_ID == 137 and len(alert_data) > POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD) or is_polygon_validator(w3, cluster, alert_event.alert.source.transaction_hash):
+                                if (CHAIN_ID == 137 and len(state) > POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD) or results["is_polygon_validator"]:
                                     logging.info(f"alert {alert_event.alert_hash} - {cluster} is polygon validator. Wont raise finding")
-                                    fp_mitigated = True
+                                    predicates.fp_mitigated = True
 
-                                if cluster in du.read_fp_mitigation_clusters(dynamo):
+                                if results["is_fp_mitigation_cluster"]:
                                     logging.info(f"alert {alert_event.alert_hash} - Mitigating FP for {cluster}. Wont raise finding")
-                                    fp_mitigated = True
+                                    predicates.fp_mitigated = True
 
-                                if cluster in du.read_end_user_attack_clusters(dynamo):
+                                if results["is_end_user_attack_cluster"]:
                                     logging.info(
                                         f"alert {alert_event.alert_hash} - End user attack identified for {cluster}. Downgrade finding")
-                                    end_user_attack = True
+                                    predicates.end_user_attack = True
 
                                 bot_source_identifier = get_bot_source_identifier(bot_sources) # dont suppress findings from different bot sources
-                                if not end_user_attack and not fp_mitigated and (len(anomaly_scores) == 4) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT:
-                                    logging.info(f"alert {alert_event.alert_hash} -1 critical severity finding for {cluster}. Anomaly score is {anomaly_score}.")
-                                    
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_STRICT, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources))
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-1", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                    if is_preparation_alert:
-                                        findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-PREPARATION", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-
-                                elif not end_user_attack and not fp_mitigated and ((highly_precise_bot_alert_id_count > 0 and len(anomaly_scores) > 1) or (len(highly_precise_bot_ids)>1)) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT:
-                                    logging.info(f"alert {alert_event.alert_hash} -1 critical severity finding for {cluster}. Anomaly score is {anomaly_score}.")
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_STRICT, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources))
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-2", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                    if is_preparation_alert:
-                                        findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-PREPARATION", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                elif not end_user_attack and is_passthrough_bot and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT:
-                                    logging.info(f"alert {alert_event.alert_hash} -1 critical severity finding for {cluster}. Anomaly score is {anomaly_score}.")
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_STRICT, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources))
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, -1, FindingSeverity.Critical, "ATTACK-DETECTOR-7", alert_event, alert_data, victim_metadata, pd.DataFrame(columns=['stage', 'anomaly_score']), CHAIN_ID, bot_sources))
-                                elif not end_user_attack and not fp_mitigated and (len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT:
-                                    logging.info(f"alert {alert_event.alert_hash} -1 critical severity finding for {cluster}. Anomaly score is {anomaly_score}.") 
-                                    victims = du.read_victims(dynamo)
+                                alerted_clusters = {STRICT: ALERTED_CLUSTERS_STRICT, LOOSE: ALERTED_CLUSTERS_LOOSE, FP_MITIGATED: ALERTED_CLUSTERS_FP_MITIGATED}
+                                for alerted, clusters in alerted_clusters.items():
+                                    predicates.alerted[alerted] = (cluster + bot_source_identifier) in clusters
+
+                                rule = RULE_ENGINE.evaluate(predicates)
+                                if rule is not None:
+                                    logging.info(f"alert {alert_event.alert_hash} - {rule.alert_id} {rule.severity} severity finding for {cluster}. Anomaly score is {anomaly_score}.")
+                                    alert_data = state.get_alert_data()
+                                    anomaly_scores_by_stages = state.get_anomaly_scores_by_stages() if rule.anomaly_score is None else pd.DataFrame(columns=['stage', 'anomaly_score'])
+                                    finding_anomaly_score = anomaly_score if rule.anomaly_score is None else rule.anomaly_score
+                                    victims = results["victims"]
                                     victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_STRICT, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources))
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-3", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                    if is_preparation_alert:
+                                    update_list(alerted_clusters[rule.alerted], ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + bot_source_identifier)
+                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, finding_anomaly_score, rule.severity, rule.alert_id, alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
+                                    if rule.emit_preparation and is_preparation_alert:
                                         findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-PREPARATION", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-
-                                elif not end_user_attack and not fp_mitigated and (len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT  and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_LOOSE and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT:
-                                    logging.info(f"alert {alert_event.alert_hash} -1 low severity finding for {cluster}. Anomaly score is {anomaly_score}.") 
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_LOOSE, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources))
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Low, "ATTACK-DETECTOR-4", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                    if is_preparation_alert:
-                                        findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Critical, "ATTACK-DETECTOR-PREPARATION", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-
-                                elif not end_user_attack and fp_mitigated and ((cluster + bot_source_identifier) not in ALERTED_CLUSTERS_FP_MITIGATED) and (((len(anomaly_scores) == 4) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT) or ((highly_precise_bot_alert_id_count > 0 and len(anomaly_scores) > 1) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT) or (len(highly_precise_bot_ids)>1) or ((len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT)
-                                                                                         or ((len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT  and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_LOOSE and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT)):
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_FP_MITIGATED, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster + get_bot_source_identifier(bot_sources)) 
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Info, "ATTACK-DETECTOR-5", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
-                                elif end_user_attack and not fp_mitigated and ((cluster + bot_source_identifier) not in ALERTED_CLUSTERS_FP_MITIGATED) and (((len(anomaly_scores) == 4) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT) or ((highly_precise_bot_alert_id_count > 0 and len(anomaly_scores) > 1) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT) or (len(highly_precise_bot_ids)>1) or ((len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT)
-                                                                                         or ((len(alert_data['bot_id'].drop_duplicates(inplace=False)) >= MIN_ALERTS_COUNT  and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE) and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_LOOSE and (cluster + bot_source_identifier) not in ALERTED_CLUSTERS_STRICT)):
-                                    victims = du.read_victims(dynamo)
-                                    victim_address, victim_name, victim_metadata = get_victim_info(alert_data, victims)
-                                    update_list(ALERTED_CLUSTERS_FP_MITIGATED, ALERTED_CLUSTERS_MAX_QUEUE_SIZE, cluster  + get_bot_source_identifier(bot_sources)) 
-                                    findings.append(AlertCombinerFinding.create_finding(block_chain_indexer, cluster, victim_address, victim_name, anomaly_score, FindingSeverity.Info, "ATTACK-DETECTOR-6", alert_event, alert_data, victim_metadata, anomaly_scores_by_stages, CHAIN_ID, bot_sources))
                                 else:
                                     logging.info(f"alert {alert_event.alert_hash} - Not raising finding for {cluster}. Already alerted.")
 
@@ -900,8 +900,14 @@ def persist_state():
     persist(MANUALLY_ALERTED_ENTITIES, CHAIN_ID, MANUALLY_ALERTED_ENTITIES_KEY)
     persist(ALERTED_FP_CLUSTERS, CHAIN_ID, ALERTED_FP_CLUSTERS_KEY)
     persist(FINDINGS_CACHE_BLOCK, CHAIN_ID, FINDINGS_CACHE_BLOCK_KEY)
+    PIPELINE.flush()
     end = time.time()
     logging.info(f"Persisted bot state. took {end - start} seconds")
+    logging.info(f"Cluster state cache stats: {CLUSTER_STATE_CACHE.stats()}")
+    logging.info(f"Rule evaluation stats: {RULE_ENGINE.stats()}")
+    logging.info(f"Victim cache stats: {VICTIM_CACHE.stats()}")
+    logging.info(f"FP mitigation clusters stats: {FP_MITIGATION_CLUSTERS.stats()}, end user attack clusters stats: {END_USER_ATTACK_CLUSTERS.stats()}")
+    logging.info(f"Pipeline latency stats: {PIPELINE.stats()}")
 
 
 def persist(obj: object, chain_id: int, key: str):
@@ -943,6 +949,7 @@ def provide_handle_block(w3, du):
         logging.debug("handle_block inner called")
         global FINDINGS_CACHE_BLOCK
         findings = []
+        PIPELINE.flush()  # the manual and reactive fp checks read the entity clusters
 
         if Utils.is_beta():
             logging.info(f"Handle block called. Adding {Utils.ERROR_CACHE.len()} error findings.")
@@ -19,11 +19,33 @@ from constants import (ALERTS_LOOKBACK_WINDOW_IN_HOURS, BASE_BOTS,
 from web3_mock import CONTRACT, EOA_ADDRESS, EOA_ADDRESS_2, Web3Mock
 from L2Cache import VERSION
 from dynamo_utils import DynamoUtils as du, TEST_TAG
+from dynamo_mock import DynamoTableMock
+from pipeline import AsyncPipeline
 
 w3 = Web3Mock()
 
 dynamo = None
 
+
+class SequentialPipeline:
+    """runs the lookups and writes of an alert one after the other, as detect_attack did before the pipeline"""
+
+    def lookup(self, calls: dict) -> dict:
+        return {name: fn(*args) for name, (stage, fn, *args) in calls.items()}
+
+    def fire(self, stage: str, fn, *args):
+        fn(*args)
+
+    def flush(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict:
+        return dict()
+
+
 class TestAlertCombiner:
 
     def test_label(self):
@@ -728,6 +750,46 @@ class TestAlertCombiner:
         assert len(findings) == 1, "alert should have been raised"
         assert abs(findings[0].metadata["anomaly_score"] - 1e-10) < 1e-20, 'incorrect anomaly score'
 
+    def recorded_alerts() -> list:
+        # stage alerts of two EOAs that are clustered midway, a victim, a passthrough alert, a redelivery and FP mitigated alerts of a contract
+        return [
+            TestAlertCombiner.generate_alert(EOA_ADDRESS_2, "0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH", {"anomaly_score": (100.0 / 100000)}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS, "0x457aa09ca38d60410c8ffa1761f535f23959195a56c9b82e0207801e86b34d99", "SUSPICIOUS-CONTRACT-CREATION", {"anomaly_score": (200.0 / 10000)}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS, "0xd3061db4662d5b3406b52b20f34234e462d2c275b99414d76dc644e2486be3e9", "ENTITY-CLUSTER", {"entityAddresses": f"{EOA_ADDRESS},{EOA_ADDRESS_2}"}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS, "0x441d3228a68bbbcf04e6813f52306efcaf1e66f275d682e62499f44905215250", "VICTIM-IDENTIFIER-PREPARATION-STAGE", {"address1": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", "holders1": "", "protocolTwitter1": "wrappedEth", "protocolUrl1": "", "tag1": "Wrapped Ether"}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS, "0xbc06a40c341aa1acc139c900fd1b7e3999d71b80c13a9dd50a369d8f923757f5", "FLASHBOTS-TRANSACTIONS", {"anomaly_score": (50.0 / 10000000)}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS_2, "0xe39e45ab19bb1c9a30887e157a21393680d336232263c96b326f68fa57a29723", "BlockSec Attack Alert", {"from": EOA_ADDRESS_2, "potential_victim": "Unknown", "suspicious_address": EOA_ADDRESS_2, "to": "0x11f3f6F9DdFA6E25F419C17A11a2808eF5311220", "txhash": "0xabc"}),
+            TestAlertCombiner.generate_alert(EOA_ADDRESS, "0xbc06a40c341aa1acc139c900fd1b7e3999d71b80c13a9dd50a369d8f923757f5", "FLASHBOTS-TRANSACTIONS", {"anomaly_score": (50.0 / 10000000)}),
+            TestAlertCombiner.generate_alert(CONTRACT, "0x5bb675492f3accba1d35e7f59f584b6fae11df919f13223f3056a69dc5686b4b", "MEV-SANDWICH-BOT-IDENTIFIED"),
+            TestAlertCombiner.generate_alert(CONTRACT, "0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH", {"anomaly_score": (100.0 / 100000)}),
+            TestAlertCombiner.generate_alert(CONTRACT, "0x457aa09ca38d60410c8ffa1761f535f23959195a56c9b82e0207801e86b34d99", "SUSPICIOUS-CONTRACT-CREATION", {"anomaly_score": (200.0 / 10000)}),
+            TestAlertCombiner.generate_alert(CONTRACT, "0xbc06a40c341aa1acc139c900fd1b7e3999d71b80c13a9dd50a369d8f923757f5", "FLASHBOTS-TRANSACTIONS", {"anomaly_score": (50.0 / 10000000)}),
+        ]
+
+    def replay(alert_events: list, pipeline) -> list:
+        for key in [ALERTED_CLUSTERS_STRICT_KEY, ALERTED_CLUSTERS_LOOSE_KEY]:
+            if os.path.isfile(f"{VERSION}-{key}"):
+                os.remove(f"{VERSION}-{key}")
+
+        findings = []
+        with patch.object(agent, "dynamo", DynamoTableMock(100)), patch.object(agent, "PIPELINE", pipeline), \
+                patch.object(agent.block_chain_indexer, "get_etherscan_labels", return_value=set()), \
+                patch.object(agent.block_chain_indexer, "get_contracts", return_value=set()):
+            agent.CHAIN_ID = 1
+            agent.initialize()
+            dynamo_utils = du(TEST_TAG, agent.CHAIN_ID)
+            for alert_event in alert_events:
+                findings.extend(agent.detect_attack(w3, dynamo_utils, alert_event))
+            pipeline.flush()
+        return [(finding.alert_id, finding.severity, finding.description, finding.metadata) for finding in findings]
+
+    def test_replay_matches_sequential(self):
+        alert_events = TestAlertCombiner.recorded_alerts()
+        expected = TestAlertCombiner.replay(alert_events, SequentialPipeline())
+        assert len(expected) > 0, "the recorded alerts should raise findings"
+
+        assert TestAlertCombiner.replay(alert_events, AsyncPipeline(4)) == expected, "should raise the same findings as the sequential lookups and writes"
+
     def test_alert_cluster_alert_after(self):
         # three alerts in diff stages across two EOAs that are clustered, but the cluster comes in after some key alerts are raised
         # no FP
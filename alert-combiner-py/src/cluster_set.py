@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# items put shortly before a refresh started may only become visible to a later query; refreshes overlap by this much
+REFRESH_OVERLAP_IN_MS = 60 * 1000
+
+
+class ClusterSet:
+    """
+    in memory set of clusters that are read from dynamo (e.g. the fp mitigation or the end user attack clusters)
+    membership checks are served from memory; the set is refreshed in the background with the items put since the last refresh,
+    and fully resynced every full_resync_interval seconds so that items removed by the dynamo ttl are dropped
+    only the first check reads dynamo on the calling thread
+    """
+
+    def __init__(self, name: str, read_clusters, refresh_interval: float, full_resync_interval: float):
+        self.name = name
+        self.read_clusters = read_clusters  # (du, dynamo, since in ms or None for all) -> list of clusters; None if the read failed
+        self.refresh_interval = refresh_interval
+        self.full_resync_interval = full_resync_interval
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.clear()
+
+    def clear(self):
+        if self.future is not None:
+            wait([self.future])  # a refresh in flight would otherwise repopulate the cleared set
+        with self.lock:
+            self.clusters = set()
+            self.added = dict()  # cluster -> time it was added by this instance
+            self.synced = False
+            self.last_refresh = 0.0
+            self.last_full_resync = 0.0
+            self.refreshes = 0
+            self.full_resyncs = 0
+
+    def contains(self, du, dynamo, cluster: str) -> bool:
+        if not self.synced:
+            self.refresh(du, dynamo)
+        elif time.time() - self.last_refresh >= self.refresh_interval and (self.future is None or self.future.done()):
+            self.future = self.executor.submit(self.refresh, du, dynamo)
+        return cluster in self.clusters
+
+    def add(self, cluster: str):
+        """adds a cluster this instance put to dynamo, so it is visible before the next refresh"""
+        with self.lock:
+            self.clusters = self.clusters | {cluster}
+            self.added[cluster] = time.time()
+
+    def refresh(self, du, dynamo):
+        start = time.time()
+        full_resync = not self.synced or start - self.last_full_resync >= self.full_resync_interval
+        try:
+            if full_resync:
+                clusters = self.read_clusters(du, dynamo, None)
+            else:
+                clusters = self.read_clusters(du, dynamo, int(self.last_refresh * 1000) - REFRESH_OVERLAP_IN_MS)
+        except Exception as e:
+            logging.warning(f"{self.name}: failed to refresh: {e} - {traceback.format_exc()}")
+            return
+        if clusters is None:
+            logging.warning(f"{self.name}: failed to read the clusters; keeping the {len(self.clusters)} clusters until the next refresh")
+            return
+        clusters = set(clusters)
+
+        with self.lock:
+            # clusters are swapped rather than updated in place, so a membership check never sees a set while it changes
+            if full_resync:
+                # clusters added while the resync was reading may be missing from what it read
+                self.added = {cluster: added_at for cluster, added_at in self.added.items() if added_at >= start}
+                self.clusters = clusters | set(self.added.keys())
+                self.last_full_resync = start
+                self.full_resyncs += 1
+            else:
+                self.clusters = self.clusters | clusters
+            self.synced = True
+            self.last_refresh = start
+            self.refreshes += 1
+        logging.info(f"{self.name}: {'resynced' if full_resync else 'refreshed'} {len(clusters)} clusters in {time.time() - start} seconds. {len(self.clusters)} clusters.")
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.clusters),
+            "refreshes": self.refreshes,
+            "full_resyncs": self.full_resyncs,
+            "seconds_since_refresh": time.time() - self.last_refresh if self.synced else None
+        }
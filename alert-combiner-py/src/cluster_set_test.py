@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+from cluster_set import ClusterSet
+from dynamo_utils import DynamoUtils, TEST_TAG
+from dynamo_mock import DynamoTableMock
+
+
+def fp_mitigation_clusters(refresh_interval: float = 0, full_resync_interval: float = 3600) -> ClusterSet:
+    return ClusterSet("fp_mitigation_clusters", lambda du, dynamo, since: du.read_fp_mitigation_clusters(dynamo, since), refresh_interval, full_resync_interval)
+
+
+class TestClusterSet:
+
+    def test_contains_from_memory(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock()
+        du.put_fp_mitigation_cluster(dynamo, '0xa')
+
+        cluster_set = fp_mitigation_clusters(refresh_interval=3600)
+        assert cluster_set.contains(du, dynamo, '0xa'), "should sync on the first check"
+        queries = dynamo.queries
+        for _ in range(100):
+            assert not cluster_set.contains(du, dynamo, '0xb')
+        assert dynamo.queries == queries, "should not query dynamo until a refresh is due"
+
+        cluster_set.add('0xb')
+        assert cluster_set.contains(du, dynamo, '0xb'), "should see a cluster added by this instance right away"
+
+    def test_incremental_refresh(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock(page_size=100)
+        du.put_fp_mitigation_cluster(dynamo, '0xa')
+        cluster_set = fp_mitigation_clusters()
+        assert cluster_set.contains(du, dynamo, '0xa')
+
+        du.put_fp_mitigation_cluster(dynamo, '0xb')  # put by another instance
+        cluster_set.contains(du, dynamo, '0xb')  # triggers a refresh in the background
+        cluster_set.future.result()
+        assert cluster_set.contains(du, dynamo, '0xb')
+        assert cluster_set.stats()["refreshes"] == 2
+        assert cluster_set.stats()["full_resyncs"] == 1, "should only read the items put since the last refresh"
+
+    def test_full_resync(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock()
+        du.put_fp_mitigation_cluster(dynamo, '0xa')
+        cluster_set = fp_mitigation_clusters(full_resync_interval=0)
+        assert cluster_set.contains(du, dynamo, '0xa')
+
+        dynamo.items.clear()  # removed by the dynamo ttl
+        cluster_set.contains(du, dynamo, '0xa')
+        cluster_set.future.result()
+        assert not cluster_set.contains(du, dynamo, '0xa'), "should drop clusters that are no longer in dynamo"
+        assert cluster_set.stats()["full_resyncs"] == 2
+
+        cluster_set.clear()
+        assert cluster_set.stats() == {"size": 0, "refreshes": 0, "full_resyncs": 0, "seconds_since_refresh": None}
+
+    def test_failed_resync(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock(page_size=100)
+        du.put_fp_mitigation_cluster(dynamo, '0xa')
+        cluster_set = fp_mitigation_clusters(full_resync_interval=0)
+        assert cluster_set.contains(du, dynamo, '0xa')
+
+        dynamo.failures = 1
+        with patch("dynamo_utils.Utils.ERROR_CACHE") as error_cache:
+            cluster_set.contains(du, dynamo, '0xa')
+            cluster_set.future.result()
+        assert error_cache.add.call_count == 1
+        assert cluster_set.contains(du, dynamo, '0xa'), "should keep the clusters when the resync fails"
+        assert cluster_set.stats()["full_resyncs"] == 1
+
+        cluster_set.future.result()
+        assert cluster_set.stats()["full_resyncs"] == 2, "should resync again on the next check"
+
+    def test_benchmark(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock(page_size=100)
+        for i in range(1000):
+            du.put_fp_mitigation_cluster(dynamo, f"0x{i}")
+
+        for i in range(100):
+            f"0x{i}" in du.read_fp_mitigation_clusters(dynamo)
+        read_queries = dynamo.queries
+
+        cluster_set = fp_mitigation_clusters(refresh_interval=3600)
+        assert all(cluster_set.contains(du, dynamo, f"0x{i}") for i in range(100))
+        assert not cluster_set.contains(du, dynamo, "0x1000")
+        # reading the partition takes 10 pages per check; the cluster set reads it once and serves the checks from memory
+        assert read_queries == 100 * 10
+        assert dynamo.queries - read_queries == 10
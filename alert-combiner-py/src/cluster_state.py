@@ -0,0 +1,239 @@
+import bisect
+import heapq
+import logging
+import math
+from collections import Counter, OrderedDict, deque
+
+import pandas as pd
+
+from src.constants import ALERTS_LOOKBACK_WINDOW_IN_HOURS
+
+# columns that identify an alert of a cluster; same as the drop_duplicates subset detect_attack used
+ALERT_KEY_COLUMNS = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'transaction_hash']
+LOOKBACK_WINDOW_IN_MS = ALERTS_LOOKBACK_WINDOW_IN_HOURS * 60 * 60 * 1000
+# alerts other instances put may be created a little before the latest alert of the cached cluster; catching up overlaps by this much
+READ_OVERLAP_IN_MS = 10 * 60 * 1000
+
+
+class MinWindow:
+    """
+    min anomaly score of a stage over the alerts within the lookback window
+    a monotonic deque of (created_at, anomaly score) with increasing created_at and strictly increasing scores:
+    an alert is dropped as soon as a newer alert with a lower or equal score arrives, as it can no longer be the min before it expires
+    adding an alert in created_at order and expiring are amortized O(1); an out of order alert costs O(window)
+    """
+
+    def __init__(self):
+        self.window = deque()
+
+    def __len__(self) -> int:
+        return len(self.window)
+
+    def add(self, created_at: int, anomaly_score: float):
+        window = self.window
+        if len(window) == 0 or created_at >= window[-1][0]:
+            while len(window) > 0 and window[-1][1] >= anomaly_score:
+                window.pop()
+            window.append((created_at, anomaly_score))
+            return
+
+        entries = list(window)
+        i = bisect.bisect_right([entry[0] for entry in entries], created_at)
+        if i < len(entries) and entries[i][1] <= anomaly_score:
+            return  # a newer alert with a lower or equal score outlives it
+        self.window = deque([entry for entry in entries[:i] if entry[1] < anomaly_score] + [(created_at, anomaly_score)] + entries[i:])
+
+    def expire(self, cutoff: int):
+        while len(self.window) > 0 and self.window[0][0] <= cutoff:
+            self.window.popleft()
+
+    def min(self) -> float:
+        return self.window[0][1]
+
+
+class ClusterState:
+    """
+    deduped alerts of a cluster within the lookback window plus running aggregates over them:
+    the min anomaly score per stage, the bot ids, the (bot id, alert id) pairs and the chain ids
+    all aggregates are updated per alert as it is added and as it expires, so the cost does not grow with the cluster history
+    the alert data DataFrame is only built when it is needed (e.g. to create a finding)
+    """
+
+    def __init__(self, columns: list):
+        self.columns = columns
+        self.alerts = OrderedDict()  # alert key -> row (list in column order)
+        self.expiry = []  # heap of (created_at in ms, sequence number, alert key); the sequence number keeps keys from being compared
+        self.added = 0
+        self.min_windows = dict()  # stage -> MinWindow
+        self.bot_ids = Counter()  # bot id -> alert count
+        self.bot_alert_ids = Counter()  # (bot id, alert id) -> alert count
+        self.chain_ids = Counter()  # chain id -> alert count
+        self.latest_created_at = None  # in ms
+        self.dataframe = None
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    @staticmethod
+    def get_created_at(row: dict) -> int:
+        # created_at is persisted in milliseconds
+        return int(pd.Timestamp(row['created_at']).timestamp() * 1000)
+
+    @staticmethod
+    def get_key(row: dict) -> tuple:
+        created_at = ClusterState.get_created_at(row)
+        return tuple(created_at if column == 'created_at' else row.get(column) for column in ALERT_KEY_COLUMNS)
+
+    @property
+    def anomaly_scores(self) -> dict:
+        """stage -> min anomaly score of the stage"""
+        return {stage: min_window.min() for stage, min_window in self.min_windows.items()}
+
+    def add(self, row: dict) -> bool:
+        """adds an alert (column -> value); returns False if the cluster already had the alert"""
+        key = ClusterState.get_key(row)
+        if key in self.alerts:
+            return False
+        created_at = key[ALERT_KEY_COLUMNS.index('created_at')]
+        self.alerts[key] = [row.get(column) for column in self.columns]
+        heapq.heappush(self.expiry, (created_at, self.added, key))
+        self.added += 1
+
+        stage, anomaly_score = row.get('stage'), row.get('anomaly_score')
+        if anomaly_score is not None and not (isinstance(anomaly_score, float) and math.isnan(anomaly_score)):
+            self.min_windows.setdefault(stage, MinWindow()).add(created_at, anomaly_score)
+        self.bot_ids[row.get('bot_id')] += 1
+        self.bot_alert_ids[(row.get('bot_id'), row.get('alert_id'))] += 1
+        if row.get('chain_id') is not None:
+            self.chain_ids[row.get('chain_id')] += 1
+
+        if self.latest_created_at is None or created_at > self.latest_created_at:
+            self.latest_created_at = created_at
+        self.dataframe = None
+        return True
+
+    @staticmethod
+    def decrement(counter: Counter, key):
+        counter[key] -= 1
+        if counter[key] == 0:
+            del counter[key]
+
+    def expire(self):
+        """drops the alerts outside of the lookback window relative to the latest alert, as reading them from dynamo does"""
+        if self.latest_created_at is None:
+            return
+        cutoff = self.latest_created_at - LOOKBACK_WINDOW_IN_MS
+        if len(self.expiry) == 0 or self.expiry[0][0] > cutoff:
+            return
+
+        while len(self.expiry) > 0 and self.expiry[0][0] <= cutoff:
+            _, _, key = heapq.heappop(self.expiry)
+            row = dict(zip(self.columns, self.alerts.pop(key)))
+            ClusterState.decrement(self.bot_ids, row.get('bot_id'))
+            ClusterState.decrement(self.bot_alert_ids, (row.get('bot_id'), row.get('alert_id')))
+            if row.get('chain_id') is not None:
+                ClusterState.decrement(self.chain_ids, row.get('chain_id'))
+        for stage in list(self.min_windows.keys()):
+            self.min_windows[stage].expire(cutoff)
+            if len(self.min_windows[stage]) == 0:
+                del self.min_windows[stage]
+        self.dataframe = None
+
+    def get_transaction_hashes(self) -> set:
+        transaction_hash_index = self.columns.index('transaction_hash')
+        return {row[transaction_hash_index] for row in self.alerts.values()}
+
+    def get_anomaly_score(self) -> float:
+        # product of the min anomaly score per stage
+        return math.prod(self.min_windows[stage].min() for stage in sorted(self.min_windows.keys()))
+
+    def get_alert_data(self) -> pd.DataFrame:
+        if self.dataframe is None:
+            self.dataframe = pd.DataFrame(list(self.alerts.values()), columns=self.columns)
+            self.dataframe['created_at'] = pd.to_datetime(self.dataframe['created_at'])
+        return self.dataframe
+
+    def get_anomaly_scores_by_stages(self) -> pd.DataFrame:
+        return self.get_alert_data()[['stage', 'anomaly_score']].drop_duplicates(inplace=False)
+
+
+class ClusterStateCache:
+    """
+    write-through LRU cache of the ClusterState of recently alerted clusters
+    clusters that are not cached are read from dynamo in full; cached clusters are caught up with the alerts created since their latest alert,
+    so alerts that other instances (shards) put are merged in; each new alert is put to dynamo as it is added
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.states = OrderedDict()  # cluster -> ClusterState
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0  # alerts put by other instances merged into cached clusters
+
+    def __contains__(self, cluster: str) -> bool:
+        return cluster in self.states
+
+    def get_since(self, cluster: str) -> int:
+        """created_at in ms from which the alerts of the cluster are to be read from dynamo; None (all alerts) if the cluster is not cached"""
+        state = self.states.get(cluster)
+        if state is None or state.latest_created_at is None:
+            return None
+        return state.latest_created_at - READ_OVERLAP_IN_MS
+
+    def get(self, du, dynamo, cluster: str, columns: list, stored_alert_data: pd.DataFrame = None, since: int = None) -> ClusterState:
+        """
+        stored_alert_data is the alert data of the cluster the caller already read from dynamo since get_since(cluster) (passed as since);
+        otherwise it is read here
+        """
+        state = self.states.get(cluster)
+        if state is not None:
+            self.states.move_to_end(cluster)
+            self.hits += 1
+            if stored_alert_data is None:
+                stored_alert_data = du.read_alert_data(dynamo, cluster, self.get_since(cluster))
+            for row in stored_alert_data.to_dict(orient="records"):
+                if state.add(row):
+                    self.merged += 1
+        else:
+            self.misses += 1
+            state = ClusterState(columns)
+            if stored_alert_data is None or since is not None:  # evicted since the caller read it; only a full read is complete
+                stored_alert_data = du.read_alert_data(dynamo, cluster)
+            for row in stored_alert_data.to_dict(orient="records"):
+                state.add(row)
+            self.states[cluster] = state
+            while len(self.states) > self.max_size:
+                self.states.popitem(last=False)
+        state.expire()
+        return state
+
+    def add(self, du, dynamo, cluster: str, state: ClusterState, new_alert_data: pd.DataFrame, write=None):
+        """write(fn, *args) runs the put of a new alert; by default it is called right away"""
+        if write is None:
+            write = lambda fn, *args: fn(*args)
+        for row in new_alert_data.to_dict(orient="records"):
+            if state.add(row):
+                write(du.put_alert_data, dynamo, cluster, pd.DataFrame([row], columns=new_alert_data.columns))
+            else:
+                logging.info(f"Alert {row['alert_hash']} already stored for cluster {cluster}")
+
+    def invalidate(self, cluster: str):
+        self.states.pop(cluster, None)
+
+    def clear(self):
+        self.states.clear()
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "merged": self.merged,
+            "size": len(self.states),
+            "max_size": self.max_size
+        }
@@ -0,0 +1,209 @@
+import random
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+
+from cluster_state import ClusterState, ClusterStateCache, MinWindow, READ_OVERLAP_IN_MS
+from dynamo_utils import DynamoUtils, TEST_TAG
+from dynamo_mock import DynamoTableMock
+from constants import ALERTS_LOOKBACK_WINDOW_IN_HOURS
+
+COLUMNS = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'addresses', 'transaction_hash', 'address_filter']
+KEY_COLUMNS = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'transaction_hash']
+STAGES = ['Funding', 'Preparation', 'Exploitation', 'MoneyLaundering']
+
+
+def alert_stream(count: int, clusters: int, seed: int = 42) -> list:
+    """replayable stream of (cluster, new alert data) as detect_attack creates it; every 10th alert is a redelivery"""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    stream = []
+    for i in range(count):
+        if i % 10 == 9:
+            stream.append(stream[rng.randrange(len(stream))])
+            continue
+        row = [rng.choice(STAGES), start + timedelta(seconds=30 * i, microseconds=rng.randrange(1000000)), rng.choice([0.1, 0.01, 0.001, 0.0001]),
+               f"0xalert{i}", f"0xbot{rng.randrange(8)}", f"ALERT-{rng.randrange(3)}", ['0xa', '0xb'], f"0xtx{i}", None]
+        stream.append((f"0xcluster{rng.randrange(clusters)}", pd.DataFrame([row], columns=COLUMNS)))
+    return stream
+
+
+def process_with_dynamo(du, dynamo, cluster: str, new_alert_data: pd.DataFrame) -> tuple:
+    # the per alert work detect_attack did before the cluster state cache
+    alert_data = du.read_alert_data(dynamo, cluster)
+    if alert_data.empty:
+        alert_data = pd.DataFrame(columns=COLUMNS)
+    alert_data = pd.concat([alert_data, new_alert_data], ignore_index=True, axis=0).drop_duplicates(subset=KEY_COLUMNS, inplace=False)
+    du.put_alert_data(dynamo, cluster, new_alert_data)
+    uniq_bot_alert_ids = alert_data[['bot_id', 'alert_id']].drop_duplicates(inplace=False)
+    len(uniq_bot_alert_ids[(uniq_bot_alert_ids['bot_id'] == '0xbot0') & (uniq_bot_alert_ids['alert_id'] == 'ALERT-0')])
+    bot_count = len(alert_data['bot_id'].drop_duplicates(inplace=False))
+    anomaly_scores = alert_data[['stage', 'anomaly_score']].drop_duplicates(inplace=False).groupby('stage').min()
+    return bot_count, len(anomaly_scores), anomaly_scores['anomaly_score'].prod()
+
+
+def process_with_cache(cache, du, dynamo, cluster: str, new_alert_data: pd.DataFrame) -> tuple:
+    state = cache.get(du, dynamo, cluster, COLUMNS)
+    cache.add(du, dynamo, cluster, state, new_alert_data)
+    ('0xbot0', 'ALERT-0') in state.bot_alert_ids
+    return len(state.bot_ids), len(state.anomaly_scores), state.get_anomaly_score()
+
+
+class TestClusterState:
+
+    def test_aggregates_match_dataframe(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        cache = ClusterStateCache(100)
+        dynamo, cache_dynamo = DynamoTableMock(100), DynamoTableMock(100)
+        for cluster, new_alert_data in alert_stream(200, 5):
+            bot_count, stage_count, anomaly_score = process_with_dynamo(du, dynamo, cluster, new_alert_data)
+            assert process_with_cache(cache, du, cache_dynamo, cluster, new_alert_data) == (bot_count, stage_count, anomaly_score)
+
+        assert cache_dynamo.items.keys() == dynamo.items.keys(), "should write through the same alerts"
+        state = cache.get(du, cache_dynamo, "0xcluster0", COLUMNS)
+        expected = du.read_alert_data(dynamo, "0xcluster0")
+        assert sorted(state.get_alert_data()['alert_hash']) == sorted(expected['alert_hash'])
+        assert state.get_anomaly_scores_by_stages().sort_values('stage').values.tolist() == expected[['stage', 'anomaly_score']].drop_duplicates().sort_values('stage').values.tolist()
+
+    def test_dedupe_and_expire(self):
+        state = ClusterState(COLUMNS)
+        row = dict(zip(COLUMNS, ['Funding', datetime(2022, 1, 1), 0.1, '0xalert1', '0xbot1', 'ALERT-1', [], '0xtx1', None]))
+        assert state.add(row)
+        assert not state.add(dict(row)), "should dedupe a redelivered alert"
+
+        state.add(dict(zip(COLUMNS, ['Preparation', datetime(2022, 1, 1, 12), 0.01, '0xalert2', '0xbot2', 'ALERT-1', [], '0xtx2', None])))
+        state.add(dict(zip(COLUMNS, ['Preparation', datetime(2022, 1, 2, 6), 0.001, '0xalert3', '0xbot3', 'ALERT-1', [], '0xtx3', None])))
+        assert len(state) == 3
+        assert state.get_anomaly_score() == 0.1 * 0.001
+
+        state.expire()
+        assert len(state) == 2, "should drop the alert outside of the lookback window"
+        assert state.anomaly_scores == {'Preparation': 0.001}
+        assert set(state.bot_ids) == {'0xbot2', '0xbot3'}
+        assert ('0xbot1', 'ALERT-1') not in state.bot_alert_ids
+
+    def test_aggregates_property(self):
+        # random alerts, partly out of order and spanning several lookback windows, against the groupby over the alerts in the window
+        for seed in range(20):
+            rng = random.Random(seed)
+            state = ClusterState(COLUMNS + ['chain_id'])
+            rows = []
+            for i in range(150):
+                created_at = datetime(2022, 1, 1) + timedelta(minutes=30 * i + rng.randrange(-600, 60))
+                row = dict(zip(COLUMNS + ['chain_id'], [rng.choice(STAGES), created_at, rng.choice([0.5, 0.1, 0.01, 0.001]), f"0xalert{i}",
+                                                        f"0xbot{rng.randrange(5)}", f"ALERT-{rng.randrange(2)}", [], f"0xtx{i}", None, rng.choice([1, 10])]))
+                rows.append(row)
+                state.add(row)
+                state.expire()
+
+                alert_data = pd.DataFrame(rows)
+                alert_data = alert_data[alert_data['created_at'] > alert_data['created_at'].max() - timedelta(hours=ALERTS_LOOKBACK_WINDOW_IN_HOURS)]
+                anomaly_scores = alert_data[['stage', 'anomaly_score']].drop_duplicates(inplace=False).groupby('stage').min()
+                assert state.anomaly_scores == anomaly_scores['anomaly_score'].to_dict(), f"seed {seed}, alert {i}"
+                assert state.get_anomaly_score() == anomaly_scores['anomaly_score'].prod()
+                assert len(state) == len(alert_data)
+                assert set(state.bot_ids) == set(alert_data['bot_id'])
+                assert set(state.bot_alert_ids) == set(zip(alert_data['bot_id'], alert_data['alert_id']))
+                assert set(state.chain_ids) == set(alert_data['chain_id'])
+
+    def test_min_window_out_of_order(self):
+        min_window = MinWindow()
+        min_window.add(10, 0.5)
+        min_window.add(20, 0.1)
+        min_window.add(30, 0.3)
+        assert list(min_window.window) == [(20, 0.1), (30, 0.3)]
+        min_window.add(15, 0.2)  # dominated by the newer 0.1
+        min_window.add(25, 0.05)  # replaces 0.1, keeps the newer 0.3
+        assert list(min_window.window) == [(25, 0.05), (30, 0.3)]
+        min_window.expire(25)
+        assert min_window.min() == 0.3
+
+    def test_cold_cluster_and_invalidate(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock(100)
+        cluster, new_alert_data = alert_stream(1, 1)[0]
+        du.put_alert_data(dynamo, cluster, new_alert_data)
+
+        cache = ClusterStateCache(1)
+        assert len(cache.get(du, dynamo, cluster, COLUMNS)) == 1, "should read a cold cluster from dynamo"
+        assert cache.get_since(cluster) == ClusterState.get_created_at(new_alert_data.iloc[0]) - READ_OVERLAP_IN_MS
+        assert len(cache.get(du, dynamo, cluster, COLUMNS)) == 1
+        assert dynamo.queries == 2
+
+        cache.get(du, dynamo, "0xother", COLUMNS)
+        assert cache.stats()["size"] == 1, "should evict the least recently used cluster"
+        cache.invalidate("0xother")
+        assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "merged": 0, "size": 0, "max_size": 1}
+
+    def test_merge_alerts_of_other_instances(self):
+        # two instances (shards) alerting on the same clusters write through one table
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo, expected_dynamo = DynamoTableMock(100), DynamoTableMock(100)
+        caches = [ClusterStateCache(100), ClusterStateCache(100)]
+        for i, (cluster, new_alert_data) in enumerate(alert_stream(200, 3)):
+            expected = process_with_dynamo(du, expected_dynamo, cluster, new_alert_data)
+            assert process_with_cache(caches[i % 2], du, dynamo, cluster, new_alert_data) == expected, f"alert {i}"
+
+        assert caches[0].stats()["merged"] > 0 and caches[1].stats()["merged"] > 0, "should merge the alerts the other instance put"
+        assert dynamo.items.keys() == expected_dynamo.items.keys()
+
+    def test_evicted_since_read(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock(100)
+        stream = alert_stream(3, 1)
+        cluster = stream[0][0]
+        for _, new_alert_data in stream:
+            du.put_alert_data(dynamo, cluster, new_alert_data)
+
+        cache = ClusterStateCache(1)
+        cache.get(du, dynamo, cluster, COLUMNS)
+        since = cache.get_since(cluster)
+        stored_alert_data = du.read_alert_data(dynamo, cluster, since)
+        cache.invalidate(cluster)
+        assert len(cache.get(du, dynamo, cluster, COLUMNS, stored_alert_data, since)) == 3, "should read an evicted cluster in full"
+
+    def test_replay_benchmark(self):
+        stream = alert_stream(1000, 20)
+        du = DynamoUtils(TEST_TAG, 1)
+
+        dynamo = DynamoTableMock(100)
+        cache = ClusterStateCache(100)
+        read_alert_data = du.read_alert_data
+        rows_read = []
+
+        def counting_read_alert_data(*args):
+            alert_data = read_alert_data(*args)
+            rows_read.append(len(alert_data))
+            return alert_data
+
+        with patch.object(du, "read_alert_data", side_effect=counting_read_alert_data):
+            for cluster, new_alert_data in stream:
+                process_with_cache(cache, du, dynamo, cluster, new_alert_data)
+
+        assert cache.stats()["misses"] == 20, "should only read cold clusters in full"
+        assert cache.stats()["merged"] == 0
+        # a cached cluster reads the alerts within the overlap of its latest alert rather than its whole history
+        assert max(rows_read) < len(stream) / 20
+        assert sum(rows_read) < len(stream) * 2
+
+        # alerts/sec of the replay before (full history read per alert) and after the cache (range read per alert), at 1ms per dynamo query;
+        # both read once per alert, so the difference is the rows read and turned into a dataframe
+        stream = stream[:500]
+        dynamo = DynamoTableMock(100, latency=0.001)
+        start = time.perf_counter()
+        for cluster, new_alert_data in stream:
+            process_with_dynamo(du, dynamo, cluster, new_alert_data)
+        elapsed_before, queries_before = time.perf_counter() - start, dynamo.queries
+
+        dynamo = DynamoTableMock(100, latency=0.001)
+        cache = ClusterStateCache(100)
+        start = time.perf_counter()
+        for cluster, new_alert_data in stream:
+            process_with_cache(cache, du, dynamo, cluster, new_alert_data)
+        elapsed_after, queries_after = time.perf_counter() - start, dynamo.queries
+
+        print(f"replay of {len(stream)} alerts: before {len(stream) / elapsed_before:.0f} alerts/sec ({queries_before} queries); "
+              f"after {len(stream) / elapsed_after:.0f} alerts/sec ({queries_after} queries); speedup {elapsed_before / elapsed_after:.1f}x")
+        assert elapsed_after < elapsed_before, "the cache should process alerts faster than reading the whole history"
@@ -10,6 +10,13 @@ CONTRACT_CACHE_MAX_QUEUE_SIZE = 10000
 ALERTED_CLUSTERS_MAX_QUEUE_SIZE = 10000
 ALERTED_FP_CLUSTERS_QUEUE_SIZE = 10000
 MANUALLY_ALERTED_ENTITIES_QUEUE_SIZE = 10000
+CLUSTER_STATE_CACHE_SIZE = 10000
+CLUSTER_SET_REFRESH_INTERVAL_IN_SECONDS = 60
+CLUSTER_SET_FULL_RESYNC_INTERVAL_IN_SECONDS = 60 * 60
+VICTIM_CACHE_SIZE = 10000
+VICTIM_CACHE_TTL_IN_SECONDS = 60 * 60
+VICTIM_CACHE_NEGATIVE_TTL_IN_SECONDS = 5 * 60
+PIPELINE_MAX_CONCURRENCY = 8  # dynamo, json rpc and label api calls in flight at a time
 
 TX_COUNT_FILTER_THRESHOLD = 2000  # ignore EOAs with tx count larger than this threshold to mitigate FPs
 CONTRACTS_TX_COUNT_FILTER_THRESHOLD = 5000 # ignore EOAs that have deployed a contract with tx count larger than this threshold to mitigate FPs
@@ -18,8 +25,6 @@ DEFAULT_ANOMALY_SCORE = 0.001  # used if anomaly score is less or eq than 0
 
 POLYGON_VALIDATOR_ALERT_COUNT_THRESHOLD = 40  # assume validator if alert count is larger than this threshold on polygon as the topic analysis seems unreliable
 
-DATAFRAME_SIZE_LIMIT = 350 * 1024 # 350KB
-
 ATTACK_DETECTOR_BOT_ID = "0x80ed808b586aeebe9cdd4088ea4dea0a8e322909c0e4493c993e060e89c09ed1"
 ATTACK_DETECTOR_BETA_BOT_ID = "0xac82fb2a572c7c0d41dc19d24790db17148d1e00505596ebe421daf91c837799"
 
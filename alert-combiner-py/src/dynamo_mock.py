@@ -0,0 +1,60 @@
+import time
+
+import botocore.exceptions
+
+
+class DynamoTableMock:
+    """
+    in memory stand in for the dynamo table; supports the queries used for the alert history and the cluster items, paged by page_size items
+    each query takes latency seconds, as a round trip to dynamo does
+    """
+
+    def __init__(self, page_size: int = 2, latency: float = 0):
+        self.items = dict()  # (itemId, sortKey) -> item
+        self.page_size = page_size
+        self.latency = latency
+        self.queries = 0
+        self.failures = 0  # number of the next queries that fail, as when throttled
+
+    def put_item(self, Item):
+        self.items[(Item['itemId'], Item['sortKey'])] = Item
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def query(self, KeyConditionExpression, ExpressionAttributeValues, ExclusiveStartKey=None):
+        self.queries += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise botocore.exceptions.ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Rate exceeded'}}, 'Query')
+        keys = sorted(key for key in self.items.keys() if key[0] == ExpressionAttributeValues[':id'])
+        if KeyConditionExpression == 'itemId = :id AND sortKey = :sid':
+            keys = [key for key in keys if key[1] == ExpressionAttributeValues[':sid']]
+        elif KeyConditionExpression == 'itemId = :id AND begins_with(sortKey, :prefix)':
+            keys = [key for key in keys if key[1].startswith(ExpressionAttributeValues[':prefix'])]
+        elif KeyConditionExpression == 'itemId = :id AND sortKey BETWEEN :since AND :until':
+            keys = [key for key in keys if ExpressionAttributeValues[':since'] <= key[1] <= ExpressionAttributeValues[':until']]
+        else:
+            assert KeyConditionExpression == 'itemId = :id'
+        if ExclusiveStartKey is not None:
+            keys = [key for key in keys if key[1] > ExclusiveStartKey['sortKey']]
+        page = keys[:self.page_size]
+        response = {'Items': [self.items[key] for key in page]}
+        if len(keys) > len(page):
+            response['LastEvaluatedKey'] = {'itemId': page[-1][0], 'sortKey': page[-1][1]}
+        return response
+
+    def delete_item(self, Key):
+        self.items.pop((Key['itemId'], Key['sortKey']), None)
+
+    def batch_writer(self):
+        table = self
+
+        class BatchWriter:
+            def __enter__(self):
+                return table
+
+            def __exit__(self, *args):
+                return False
+
+        return BatchWriter()
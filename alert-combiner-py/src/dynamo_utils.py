@@ -4,14 +4,22 @@ import time
 import json
 import botocore
 import hashlib
+import math
+import zlib
 import pandas as pd
 
-from src.constants import ALERTS_LOOKBACK_WINDOW_IN_HOURS, DATAFRAME_SIZE_LIMIT, FP_MITIGATION_EXPIRY_IN_HOURS
+from src.constants import ALERTS_LOOKBACK_WINDOW_IN_HOURS, FP_MITIGATION_EXPIRY_IN_HOURS
 from src.utils import Utils
 
 TEST_TAG = "attack-detector-test_v2"
 PROD_TAG = "attack-detector-prod"
 
+# alert data columns in the order they are encoded; chain_id is only present on L2s
+ALERT_COLUMNS = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'addresses', 'transaction_hash', 'address_filter', 'chain_id']
+ALERT_ENCODING_VERSION = 1
+# fp mitigation and end user attack cluster items are sorted by the time they were put, so the ones put since a given time can be queried
+CLUSTER_SORT_KEY_PREFIX = "ts|"
+
 class DynamoUtils:
     chain_id = None
 
@@ -91,9 +99,8 @@ class DynamoUtils:
         logging.debug(f"putting fp mitigation cluster alert for {address} in dynamo DB")
         itemId = f"{self.tag}|{self.chain_id}|fp_mitigation_cluster"
         logging.debug(f"itemId: {itemId}")
-        sortId = f"{address}"
-        logging.debug(f"sortId: {sortId}")
-        sortIdHash = hashlib.sha256(sortId.encode()).hexdigest()
+        sortKey = self._get_cluster_sort_key(address)
+        logging.debug(f"sortKey: {sortKey}")
 
         # Store for a year
         expiry_offset = FP_MITIGATION_EXPIRY_IN_HOURS * 60 * 60
@@ -102,7 +109,7 @@ class DynamoUtils:
 
         item = {
             "itemId": itemId,
-            "sortKey": sortIdHash,
+            "sortKey": sortKey,
             "address": address,
             "expiresAt": expiresAt
         }
@@ -113,66 +120,58 @@ class DynamoUtils:
         logging.debug(f"putting end user attack cluster alert for {address} in dynamo DB")
         itemId = f"{self.tag}|{self.chain_id}|end_user_attack_cluster"
         logging.debug(f"itemId: {itemId}")
-        sortId = f"{address}"
-        logging.debug(f"sortId: {sortId}")
-        sortIdHash = hashlib.sha256(sortId.encode()).hexdigest()
+        sortKey = self._get_cluster_sort_key(address)
+        logging.debug(f"sortKey: {sortKey}")
         expiresAt = self._get_expires_at()
         logging.debug(f"expiresAt: {expiresAt}")
 
         item = {
             "itemId": itemId,
-            "sortKey": sortIdHash,
+            "sortKey": sortKey,
             "address": address,
             "expiresAt": expiresAt
         }
 
         self._put_item(dynamo, item)
 
-    def put_alert_data(self, dynamo, cluster: str, dataframe: pd.DataFrame):
-        logging.debug(f"Putting alert data for cluster {cluster} in DynamoDB")
-        last_alert_created_at = dataframe["created_at"].iloc[-1].timestamp()
-        logging.debug(f"alert_created_at: {last_alert_created_at}")
-        itemId = f"{self.tag}|{self.chain_id}|alert"
-        logging.debug(f"itemId: {itemId}")
-        sortId = f"{cluster}"
-        logging.debug(f"sortId: {sortId}")
-        sortIdHash = hashlib.sha256(sortId.encode()).hexdigest()
-        expiresAt = self._get_expires_at(last_alert_created_at)
-        logging.debug(f"expiresAt: {expiresAt}")    
-        logging.debug(f"Dataframe length before filtering: {len(dataframe)}")
-        expiry_offset = pd.Timedelta(seconds=self._get_expiry_offset())
-        dataframe = dataframe[dataframe["created_at"] > (pd.to_datetime(last_alert_created_at, unit='s') - expiry_offset)]
-        logging.debug(f"Dataframe length after filtering: {len(dataframe)}")
-        dataframe_json = dataframe.to_json(orient="records")
-        dataframe_json_size = len(json.dumps(dataframe_json))
-
-        if dataframe_json_size > DATAFRAME_SIZE_LIMIT:
-            grouped = dataframe.groupby(['bot_id', 'alert_id'])
-
-            # Function to keep the top half of entries based on 'anomaly_score'
-            def reduce_entries(group):
-                if len(group) > 1:
-                    half = len(group) // 2
-                    return group.nsmallest(half, 'anomaly_score')
-                else:
-                    return group
-
-            # Apply the data reduction function to each group and concatenate the results
-            dataframe_to_store = grouped.apply(reduce_entries).reset_index(drop=True)
-        else:
-            dataframe_to_store = dataframe
-
-        dataframe_to_store_json = dataframe_to_store.to_json(orient="records")
-
-        item = {
-            "itemId": itemId,
-            "sortKey": sortIdHash,
-            "cluster": cluster,
-            "dataframe": dataframe_to_store_json,
-            "expiresAt": expiresAt
-        }
+    def _get_cluster_sort_key(self, address: str) -> str:
+        # an address put again gets another item; the readers dedupe and the older items expire
+        return f"{CLUSTER_SORT_KEY_PREFIX}{int(time.time() * 1000):013d}|{hashlib.sha256(address.encode()).hexdigest()}"
+
+    def _get_alert_sort_key_prefix(self, cluster: str) -> str:
+        return f"{hashlib.sha256(cluster.encode()).hexdigest()}|"
+
+    @staticmethod
+    def _encode_alert(row: dict) -> bytes:
+        # positional json (no column names) compressed with zlib, prefixed with the encoding version
+        values = [None if isinstance(value, float) and math.isnan(value) else value for value in (row.get(column) for column in ALERT_COLUMNS)]
+        values[1] = int(pd.Timestamp(values[1]).timestamp() * 1000)  # created_at in milliseconds
+        if values[-1] is None:
+            values = values[:-1]
+        payload = json.dumps(values, separators=(',', ':'), default=lambda value: value.item())  # numpy scalars
+        return bytes([ALERT_ENCODING_VERSION]) + zlib.compress(payload.encode())
+
+    @staticmethod
+    def _decode_alert(data) -> list:
+        data = bytes(data)  # boto3 returns Binary
+        if data[0] != ALERT_ENCODING_VERSION:
+            raise ValueError(f"Unknown alert encoding version {data[0]}")
+        return json.loads(zlib.decompress(data[1:]).decode())
 
-        self._put_item(dynamo, item)
+    def put_alert_data(self, dynamo, cluster: str, dataframe: pd.DataFrame):
+        # one item per alert, keyed by cluster hash, created_at and alert hash; putting an alert again overwrites it
+        logging.debug(f"Putting {len(dataframe)} alert(s) for cluster {cluster} in DynamoDB")
+        itemId = f"{self.tag}|{self.chain_id}|alert_history"
+        sortKeyPrefix = self._get_alert_sort_key_prefix(cluster)
+        for row in dataframe.to_dict(orient="records"):
+            alert_created_at = pd.Timestamp(row["created_at"]).timestamp()
+            item = {
+                "itemId": itemId,
+                "sortKey": f"{sortKeyPrefix}{int(alert_created_at * 1000):013d}|{row['alert_hash']}",
+                "alert": DynamoUtils._encode_alert(row),
+                "expiresAt": self._get_expires_at(alert_created_at)
+            }
+            self._put_item(dynamo, item)
 
     def put_victim(self, dynamo, transaction_hash: str, metadata: dict):
         logging.debug(f"Putting victim with transaction hash {transaction_hash} in DynamoDB")
@@ -241,11 +240,40 @@ class DynamoUtils:
         logging.info(f"Read entity clusters for address {address}. Retrieved {len(entity_clusters)} alert_clusters.")
         return entity_clusters
 
-    def read_fp_mitigation_clusters(self, dynamo) -> list:
+    def _query_partition_items(self, dynamo, itemId: str, since: int = None) -> list:
+        # all items of the partition, following LastEvaluatedKey; for cluster items optionally only the ones put since the given time in ms
+        # None if the query failed, so a failed read is not mistaken for an empty partition
+        items = []
+        query = {
+            "KeyConditionExpression": 'itemId = :id',
+            "ExpressionAttributeValues": {
+                ':id': itemId
+            }
+        }
+        if since is not None:
+            query["KeyConditionExpression"] = 'itemId = :id AND sortKey BETWEEN :since AND :until'
+            query["ExpressionAttributeValues"][':since'] = f"{CLUSTER_SORT_KEY_PREFIX}{since:013d}"
+            query["ExpressionAttributeValues"][':until'] = f"{CLUSTER_SORT_KEY_PREFIX}~"
+        try:
+            while True:
+                response = dynamo.query(**query)
+                items.extend(response.get('Items', []))
+                lastEvaluatedKey = response.get('LastEvaluatedKey')
+                if not lastEvaluatedKey:
+                    return items
+                query["ExclusiveStartKey"] = lastEvaluatedKey
+        except botocore.exceptions.ClientError as e:
+            logging.error(f"Error querying items of {itemId} in dynamoDB: {str(e)}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo_utils._query_partition_items {e.response["Error"]["Code"]} (SINCE: {str(since)}, ITEM_ID: {itemId})', "dynamo_utils._query_partition_items", ""))
+            return None
+
+    def read_fp_mitigation_clusters(self, dynamo, since: int = None) -> list:
         fp_mitigation_clusters = []        
         itemId = f"{self.tag}|{self.chain_id}|fp_mitigation_cluster"
         
-        items = self._query_items(dynamo, itemId)
+        items = self._query_partition_items(dynamo, itemId, since)
+        if items is None:
+            return None
 
         logging.debug(f"Items retrieved: {len(items)}")
         for item in items:
@@ -254,11 +282,13 @@ class DynamoUtils:
         logging.info(f"Read fp mitigation clusters. Retrieved {len(fp_mitigation_clusters)} alert_clusters.")
         return fp_mitigation_clusters
     
-    def read_end_user_attack_clusters(self, dynamo) -> list:
+    def read_end_user_attack_clusters(self, dynamo, since: int = None) -> list:
         end_user_attack_clusters = []
         itemId = f"{self.tag}|{self.chain_id}|end_user_attack_cluster"
         
-        items = self._query_items(dynamo, itemId)
+        items = self._query_partition_items(dynamo, itemId, since)
+        if items is None:
+            return None
 
         logging.debug(f"Items retrieved: {len(items)}")
         for item in items:
@@ -267,51 +297,89 @@ class DynamoUtils:
         logging.info(f"Read end user attack clusters. Retrieved {len(end_user_attack_clusters)} alert_clusters.")
         return end_user_attack_clusters
     
-    def read_alert_data(self, dynamo, cluster: str) -> pd.DataFrame:
-        alert_data = pd.DataFrame()
-        itemId = f"{self.tag}|{self.chain_id}|alert"
-        sortKey = f"{cluster}"
-        sortIdHash = hashlib.sha256(sortKey.encode()).hexdigest()
-        
-        items = self._query_items(dynamo, itemId, sortIdHash)
+    def _query_alert_items(self, dynamo, cluster: str, since: int = None) -> list:
+        # range query over the alerts of the cluster in created_at order; optionally only the ones created since the given time in ms
+        items = []
+        itemId = f"{self.tag}|{self.chain_id}|alert_history"
+        sortKeyPrefix = self._get_alert_sort_key_prefix(cluster)
+        query = {
+            "KeyConditionExpression": 'itemId = :id AND begins_with(sortKey, :prefix)',
+            "ExpressionAttributeValues": {
+                ':id': itemId,
+                ':prefix': sortKeyPrefix
+            }
+        }
+        if since is not None:
+            query["KeyConditionExpression"] = 'itemId = :id AND sortKey BETWEEN :since AND :until'
+            query["ExpressionAttributeValues"] = {
+                ':id': itemId,
+                ':since': f"{sortKeyPrefix}{max(since, 0):013d}",
+                ':until': f"{sortKeyPrefix}~"
+            }
+        try:
+            while True:
+                response = dynamo.query(**query)
+                items.extend(response.get('Items', []))
+                lastEvaluatedKey = response.get('LastEvaluatedKey')
+                if not lastEvaluatedKey:
+                    return items
+                query["ExclusiveStartKey"] = lastEvaluatedKey
+        except botocore.exceptions.ClientError as e:
+            logging.error(f"Error querying alert data for cluster {cluster} in dynamoDB: {str(e)}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo_utils._query_alert_items {e.response["Error"]["Code"]} (CLUSTER: {cluster}, ITEM_ID: {itemId})', "dynamo_utils._query_alert_items", ""))
+            return []
 
+    def read_alert_data(self, dynamo, cluster: str, since: int = None) -> pd.DataFrame:
+        items = self._query_alert_items(dynamo, cluster, since)
         logging.debug(f"Items retrieved: {len(items)}")
-        for item in items:
-            logging.debug(f"Item retrieved: {item}")
-            dataframe_json = item["dataframe"]
-            dataframe = pd.read_json(dataframe_json, orient="records")
-            # Convert NaN values to string "NaN"
-            dataframe = dataframe.fillna("Nan")           
-            # Replace "NaN" with None in each column
-            for column in dataframe.columns:
-                dataframe[column].replace("Nan", None, inplace=True)
-
-            alert_data = pd.concat([alert_data, dataframe], ignore_index=True)
+
+        rows = [DynamoUtils._decode_alert(item["alert"]) for item in items]
+        columns = ALERT_COLUMNS if any(len(row) == len(ALERT_COLUMNS) for row in rows) else ALERT_COLUMNS[:-1]
+        alert_data = pd.DataFrame([row + [None] * (len(columns) - len(row)) for row in rows], columns=columns)
+        if len(alert_data) > 0:
+            alert_data["created_at"] = pd.to_datetime(alert_data["created_at"], unit='ms')
+            # alerts expire with their items; items not yet removed by the dynamo ttl are filtered here
+            expiry_offset = pd.Timedelta(seconds=self._get_expiry_offset())
+            alert_data = alert_data[alert_data["created_at"] > alert_data["created_at"].max() - expiry_offset].reset_index(drop=True)
         logging.info(f"Read alert data for cluster {cluster}. Retrieved {len(alert_data)} alert_data.")
         return alert_data
 
+    def move_alert_data(self, dynamo, address: str, cluster: str) -> int:
+        """moves the alerts of an address to the cluster it is part of; returns the number of alerts moved"""
+        items = self._query_alert_items(dynamo, address)
+        if len(items) == 0:
+            return 0
+
+        addressSortKeyPrefix = self._get_alert_sort_key_prefix(address)
+        clusterSortKeyPrefix = self._get_alert_sort_key_prefix(cluster)
+        for item in items:
+            self._put_item(dynamo, dict(item, sortKey=clusterSortKeyPrefix + item["sortKey"][len(addressSortKeyPrefix):]))
+        self._delete_items(dynamo, items)
+        logging.info(f"Moved {len(items)} alerts of address {address} to cluster {cluster}")
+        return len(items)
+
     def delete_alert_data(self, dynamo, address):
-        itemId = f"{self.tag}|{self.chain_id}|alert"
-        sortKey = f"{address}"
-        logging.debug(f"Deleting alert data for address {address}, itemId {itemId}, sortKey {sortKey}")
-        response = dynamo.delete_item(
-            Key={
-                'itemId': itemId,
-                'sortKey': sortKey
-            }
-        )
+        items = self._query_alert_items(dynamo, address)
+        logging.debug(f"Deleting {len(items)} alerts for address {address}")
+        self._delete_items(dynamo, items)
 
-        if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
-            logging.error(f"Error deleting alert data for address {address} from DynamoDB: {response}")
-            Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo_utils.delete_alert_data HTTPStatusCode {response["ResponseMetadata"]["HTTPStatusCode"]}', "dynamo_utils.delete_alert_data", ""))
-        else:
-            logging.info(f"Successfully deleted alert data for address {address} from DynamoDB")
+    def _delete_items(self, dynamo, items: list):
+        try:
+            with dynamo.batch_writer() as batch:
+                for item in items:
+                    batch.delete_item(Key={'itemId': item['itemId'], 'sortKey': item['sortKey']})
+            logging.info(f"Successfully deleted {len(items)} items from DynamoDB")
+        except botocore.exceptions.ClientError as e:
+            logging.error(f"Error deleting items from dynamoDB: {e}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo_utils._delete_items Exception {e}', "dynamo_utils._delete_items", ""))
 
     def read_victims(self, dynamo) -> dict:
         victims = dict()
         itemId = f"{self.tag}|{self.chain_id}|victim"
         
-        items = self._query_items(dynamo, itemId)
+        items = self._query_partition_items(dynamo, itemId)
+        if items is None:
+            return None
 
         logging.debug(f"Items retrieved: {len(items)}")
         for item in items:
@@ -321,7 +389,7 @@ class DynamoUtils:
         return victims
     
     def clean_db(self, dynamo):
-        item_types = ['entity_cluster', 'fp_mitigation_cluster', 'end_user_attack_cluster', 'alert', 'victim']
+        item_types = ['entity_cluster', 'fp_mitigation_cluster', 'end_user_attack_cluster', 'alert', 'alert_history', 'victim']
         chain_ids = [1, 10]  # Only chains used in tests
 
         for chain_id in chain_ids:            
@@ -1,11 +1,22 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, MagicMock
 from datetime import datetime
 import time
+import json
 import pandas as pd
 import hashlib
 
 from dynamo_utils import DynamoUtils, TEST_TAG
 from constants import ALERTS_LOOKBACK_WINDOW_IN_HOURS, FP_MITIGATION_EXPIRY_IN_HOURS
+from dynamo_mock import DynamoTableMock
+
+
+def alert_data(alert_hashes: list, created_at: str = '2022-01-01T00:00:00', chain_id: int = None) -> pd.DataFrame:
+    columns = ['stage', 'created_at', 'anomaly_score', 'alert_hash', 'bot_id', 'alert_id', 'addresses', 'transaction_hash', 'address_filter']
+    rows = [['Preparation', datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S"), 0.0001, alert_hash, '0xbot', 'ALERT-1', ['0xa', '0xb'], '0xtx', None] for alert_hash in alert_hashes]
+    if chain_id is not None:
+        columns = columns + ['chain_id']
+        rows = [row + [chain_id] for row in rows]
+    return pd.DataFrame(rows, columns=columns)
 
 
 class TestDynamoUtils:
@@ -43,8 +54,11 @@ class TestDynamoUtils:
 
         sortIdHash = hashlib.sha256(address.encode()).hexdigest()
 
+        sortKey = dynamo.put_item.call_args.kwargs['Item']['sortKey']
+        assert sortKey.startswith('ts|') and sortKey.endswith(f'|{sortIdHash}'), "should sort the item by the time it was put"
+        assert abs(int(sortKey.split('|')[1]) - time.time() * 1000) < 60 * 1000
         dynamo.put_item.assert_called_once_with(
-            Item={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|fp_mitigation_cluster', 'sortKey': sortIdHash, 'address': address, 'expiresAt': expiresAt})
+            Item={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|fp_mitigation_cluster', 'sortKey': sortKey, 'address': address, 'expiresAt': expiresAt})
 
     def test_put_end_user_attack_cluster(self):
         dynamo = Mock()
@@ -59,31 +73,80 @@ class TestDynamoUtils:
 
         sortIdHash = hashlib.sha256(address.encode()).hexdigest()
 
+        sortKey = dynamo.put_item.call_args.kwargs['Item']['sortKey']
+        assert sortKey.startswith('ts|') and sortKey.endswith(f'|{sortIdHash}'), "should sort the item by the time it was put"
+        assert abs(int(sortKey.split('|')[1]) - time.time() * 1000) < 60 * 1000
         dynamo.put_item.assert_called_once_with(
-            Item={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|end_user_attack_cluster', 'sortKey': sortIdHash, 'address': address, 'expiresAt': expiresAt})
+            Item={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|end_user_attack_cluster', 'sortKey': sortKey, 'address': address, 'expiresAt': expiresAt})
     
     def test_put_alert_data(self):
         dynamo = Mock()
         dynamo.put_item.return_value = {
             'ResponseMetadata': {'HTTPStatusCode': 200}}
         cluster = 'alert_cluster'
-        dataframe = pd.DataFrame(
-            {'created_at': ['2022-01-01T00:00:00'], 'data': ['test']})
-        dataframe['created_at'] = pd.to_datetime(dataframe['created_at'])
-        first_alert_created_at_str = dataframe['created_at'].iloc[0]
-        first_alert_created_at = first_alert_created_at_str.timestamp()
-        dataframe_json = dataframe.to_json(orient="records")
+        dataframe = alert_data(['0xalert1'])
+        alert_created_at = dataframe['created_at'].iloc[0].timestamp()
         expiry_offset = ALERTS_LOOKBACK_WINDOW_IN_HOURS * 60 * 60
-        expiresAt = int(first_alert_created_at) + int(expiry_offset)
+        expiresAt = int(alert_created_at) + int(expiry_offset)
 
         du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID) 
         du.put_alert_data(dynamo, cluster, dataframe)
 
         sortIdHash = hashlib.sha256(cluster.encode()).hexdigest()
+        item = dynamo.put_item.call_args.kwargs['Item']
+        assert item['itemId'] == f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|alert_history'
+        assert item['sortKey'] == f'{sortIdHash}|{int(alert_created_at * 1000):013d}|0xalert1'
+        assert item['expiresAt'] == expiresAt
+        assert len(item['alert']) < len(dataframe.to_json(orient="records")), "should be smaller than the json encoding"
+        assert dynamo.put_item.call_count == 1
+
+    def test_alert_data_round_trip(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, 10)
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert1', '0xalert2', '0xalert3'], chain_id=10))
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert3'], chain_id=10))  # put again
+        du.put_alert_data(dynamo, 'other_cluster', alert_data(['0xalert4'], chain_id=10))
+
+        stored_alert_data = du.read_alert_data(dynamo, 'alert_cluster')
+        assert dynamo.queries == 2, "should page through the alerts of the cluster"
+        assert list(stored_alert_data['alert_hash']) == ['0xalert1', '0xalert2', '0xalert3']
+        assert list(stored_alert_data.columns) == list(alert_data([], chain_id=10).columns)
+        assert stored_alert_data['chain_id'].iloc[0] == 10
+        assert stored_alert_data['created_at'].iloc[0] == datetime(2022, 1, 1)
+        assert stored_alert_data['addresses'].iloc[0] == ['0xa', '0xb']
+        assert stored_alert_data['address_filter'].iloc[0] is None
+
+        assert du.read_alert_data(dynamo, 'unknown_cluster').empty
+
+    def test_read_alert_data_expired(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert1'], '2022-01-01T00:00:00'))
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert2'], '2022-01-03T00:00:00'))
+        assert list(du.read_alert_data(dynamo, 'alert_cluster')['alert_hash']) == ['0xalert2'], "should filter alerts outside of the lookback window"
+
+    def test_read_alert_data_since(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert1'], '2022-01-01T00:00:00'))
+        du.put_alert_data(dynamo, 'alert_cluster', alert_data(['0xalert2', '0xalert3'], '2022-01-01T01:00:00'))
+        du.put_alert_data(dynamo, 'other_cluster', alert_data(['0xalert4'], '2022-01-01T02:00:00'))
+
+        since = int(pd.Timestamp('2022-01-01T01:00:00').timestamp() * 1000)
+        assert list(du.read_alert_data(dynamo, 'alert_cluster', since)['alert_hash']) == ['0xalert2', '0xalert3'], "should only read the alerts created since"
+        assert du.read_alert_data(dynamo, 'alert_cluster', since + 1).empty
+
+    def test_move_alert_data(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        du.put_alert_data(dynamo, '0xa', alert_data(['0xalert1', '0xalert2']))
+        du.put_alert_data(dynamo, '0xa,0xb', alert_data(['0xalert2', '0xalert3']))
+
+        assert du.move_alert_data(dynamo, '0xa', '0xa,0xb') == 2
+        assert du.read_alert_data(dynamo, '0xa').empty
+        assert list(du.read_alert_data(dynamo, '0xa,0xb')['alert_hash']) == ['0xalert1', '0xalert2', '0xalert3']
+        assert du.move_alert_data(dynamo, '0xa', '0xa,0xb') == 0
 
-        dynamo.put_item.assert_called_once_with(Item={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|alert',
-                                                'sortKey': sortIdHash, 'cluster': cluster, 'dataframe': dataframe_json, 'expiresAt': expiresAt})
-    
     def test_put_victim(self):
         dynamo = Mock()
         dynamo.put_item.return_value = {
@@ -116,6 +179,15 @@ class TestDynamoUtils:
         dynamo.query.assert_called_once_with(KeyConditionExpression='itemId = :id AND sortKey = :sid', ExpressionAttributeValues={
                                          ':id': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|entity_cluster', ':sid': f'{sortIdHash}'})
 
+    def test_entity_clusters_round_trip(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        du.put_entity_cluster(dynamo, '2022-01-01T00:00:00', '0xa', '0xa,0xb')
+        du.put_entity_cluster(dynamo, '2022-01-01T00:00:00', '0xb', '0xa,0xb')
+
+        assert du.read_entity_clusters(dynamo, '0xa') == {'0xa': '0xa,0xb'}
+        assert du.read_entity_clusters(dynamo, '0xc') == dict()
+
     def test_read_fp_mitigation_clusters(self):
         dynamo = Mock()
         items = [{'address': '0x123456789', 'expiresAt': 1641074400}]
@@ -140,21 +212,40 @@ class TestDynamoUtils:
         dynamo.query.assert_called_once_with(KeyConditionExpression='itemId = :id', ExpressionAttributeValues={
             ':id': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|end_user_attack_cluster'})
 
+    def test_read_clusters_since(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        for address in ['0xa', '0xb', '0xc']:
+            du.put_fp_mitigation_cluster(dynamo, address)
+        dynamo.put_item({'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|fp_mitigation_cluster', 'sortKey': hashlib.sha256('0xold'.encode()).hexdigest(), 'address': '0xold'})
+        since = int(time.time() * 1000) + 1
+        time.sleep(0.002)
+        du.put_fp_mitigation_cluster(dynamo, '0xd')
+
+        assert sorted(du.read_fp_mitigation_clusters(dynamo)) == ['0xa', '0xb', '0xc', '0xd', '0xold'], "should page through the partition"
+        assert du.read_fp_mitigation_clusters(dynamo, since) == ['0xd'], "should only read the items put since"
+        assert du.read_end_user_attack_clusters(dynamo, since) == []
+
+    def test_read_clusters_failure(self):
+        dynamo = DynamoTableMock()
+        du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
+        du.put_fp_mitigation_cluster(dynamo, '0xa')
+        dynamo.failures = 1
+        assert du.read_fp_mitigation_clusters(dynamo) is None, "should not mistake a failed read for an empty partition"
+        assert du.read_fp_mitigation_clusters(dynamo) == ['0xa']
+
     def test_read_alert_data(self):
         dynamo = Mock()
         cluster = 'alert_cluster'
-        items = [{'cluster': 'alert_cluster', 'sortKey': '1641074400',
-                  'dataframe': '{"created_at":{"0":"2022-01-01T00:00:00"},"data":{"0":"test"}}'}]
-        response = {'Items': items}
-        dynamo.query.return_value = response
+        dynamo.query.return_value = {'Items': [{'alert': DynamoUtils._encode_alert(alert_data(['0xalert1']).to_dict(orient="records")[0])}]}
 
         du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
         du.read_alert_data(dynamo, cluster)
 
         sortIdHash = hashlib.sha256(cluster.encode()).hexdigest()
 
-        dynamo.query.assert_called_once_with(KeyConditionExpression='itemId = :id AND sortKey = :sid', ExpressionAttributeValues={
-            ':id': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|alert', ':sid': f'{sortIdHash}'})
+        dynamo.query.assert_called_once_with(KeyConditionExpression='itemId = :id AND begins_with(sortKey, :prefix)', ExpressionAttributeValues={
+            ':id': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|alert_history', ':prefix': f'{sortIdHash}|'})
 
     def test_read_victims(self):
         dynamo = Mock()
@@ -174,14 +265,13 @@ class TestDynamoUtils:
         )
 
     def test_delete_alert_data(self):
-        dynamo = Mock()
+        dynamo = MagicMock()
         address = '0x432423'
-        dynamo.delete_item.return_value = {
-            'ResponseMetadata': {'HTTPStatusCode': 200}}
+        items = [{'itemId': 'id', 'sortKey': 'key1'}, {'itemId': 'id', 'sortKey': 'key2'}]
+        dynamo.query.return_value = {'Items': items}
 
         du = DynamoUtils(TEST_TAG, TestDynamoUtils.CHAIN_ID)
         du.delete_alert_data(dynamo, address)
-        dynamo.delete_item.assert_called_once_with(
-            Key={'itemId': f'{du.tag}|{TestDynamoUtils.CHAIN_ID}|alert',
-                 'sortKey': f'{address}'}
-        )
+        batch = dynamo.batch_writer.return_value.__enter__.return_value
+        assert batch.delete_item.call_count == 2
+        batch.delete_item.assert_called_with(Key={'itemId': 'id', 'sortKey': 'key2'})
@@ -0,0 +1,102 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from src.utils import Utils
+
+# upper bounds of the latency histogram buckets in seconds; the last bucket has no upper bound
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class LatencyHistogram:
+
+    def __init__(self, buckets: list = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(le): count for le, count in zip(self.buckets + ["inf"], self.counts)}
+        }
+
+
+class AsyncPipeline:
+    """
+    runs the blocking lookups and writes of an alert (dynamo, json rpc and label apis) on an asyncio event loop in a background thread
+    lookups that do not depend on each other are awaited together; writes are fired without waiting and flushed before the next alert reads
+    at most max_concurrency calls run at a time; the latency of each call is recorded in a histogram per stage
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)  # bounds the concurrency of the blocking calls
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="pipeline", daemon=True)
+        self.thread.start()
+        self.pending = set()  # futures of the fired writes
+        self.lock = threading.Lock()
+        self.histograms = dict()  # stage -> LatencyHistogram
+
+    async def call(self, stage: str, fn, *args):
+        start = time.time()
+        try:
+            return await self.loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            with self.lock:
+                self.histograms.setdefault(stage, LatencyHistogram()).observe(time.time() - start)
+
+    async def gather(self, calls: dict) -> dict:
+        results = await asyncio.gather(*[self.call(*call) for call in calls.values()])
+        return dict(zip(calls.keys(), results))
+
+    def lookup(self, calls: dict) -> dict:
+        """runs the calls (name -> (stage, fn, *args)) concurrently and returns name -> result; the first exception raised is reraised"""
+        if len(calls) == 0:
+            return dict()
+        return asyncio.run_coroutine_threadsafe(self.gather(calls), self.loop).result()
+
+    async def write(self, stage: str, fn, *args):
+        try:
+            await self.call(stage, fn, *args)
+        except Exception as e:
+            logging.warning(f"pipeline: {stage} write failed: {e} - {traceback.format_exc()}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(str(e), f"pipeline.write ({stage})", traceback.format_exc()))
+
+    def fire(self, stage: str, fn, *args):
+        """runs fn(*args) without waiting for it; exceptions are logged and added to the error cache"""
+        future = asyncio.run_coroutine_threadsafe(self.write(stage, fn, *args), self.loop)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self.done)
+
+    def done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def flush(self):
+        """waits for the fired writes, so that reads see them"""
+        with self.lock:
+            pending = list(self.pending)
+        wait(pending)
+
+    def clear(self):
+        self.flush()
+        with self.lock:
+            self.histograms = dict()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {stage: histogram.stats() for stage, histogram in self.histograms.items()}
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pipeline import AsyncPipeline, LatencyHistogram
+
+LATENCY = 0.01  # seconds per simulated dynamo or api call
+
+
+class SlowStore:
+    """key value store whose calls take LATENCY seconds and that records the calls in flight"""
+
+    def __init__(self):
+        self.items = dict()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def call(self, fn):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(LATENCY)
+            return fn()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def read(self, key):
+        return self.call(lambda: self.items.get(key, 0))
+
+    def write(self, key, value):
+        self.call(lambda: self.items.__setitem__(key, value))
+
+
+def replay(alerts: list, pipeline: AsyncPipeline = None) -> tuple:
+    """counts the alerts per cluster and flags clusters that cross 3 alerts; lookups are independent, the count is written back"""
+    store, flags, output = SlowStore(), SlowStore(), []
+    for cluster, address in alerts:
+        lookups = {"count": ("history", store.read, cluster), "flagged": ("flags", flags.read, address), "label": ("labels", flags.read, cluster)}
+        if pipeline is None:
+            results = {name: fn(*args) for name, (stage, fn, *args) in lookups.items()}
+            store.write(cluster, results["count"] + 1)
+        else:
+            pipeline.flush()
+            results = pipeline.lookup(lookups)
+            pipeline.fire("history_write", store.write, cluster, results["count"] + 1)
+        if results["count"] + 1 >= 3 and not results["flagged"]:
+            output.append((cluster, results["count"] + 1))
+    if pipeline is not None:
+        pipeline.flush()
+    return output, store
+
+
+class TestAsyncPipeline:
+
+    def test_replay_flushes_writes_before_reads(self):
+        rng = random.Random(42)
+        alerts = [(f"0xcluster{rng.randrange(5)}", f"0xaddress{rng.randrange(20)}") for _ in range(40)]
+
+        expected, expected_store = replay(alerts)
+
+        pipeline = AsyncPipeline(4)
+        output, store = replay(alerts, pipeline)
+
+        assert output == expected, "should emit the same output as the sequential replay"
+        assert store.items == expected_store.items
+        assert store.max_in_flight == 1, "should flush the write of an alert before the next alert reads"
+
+        stats = pipeline.stats()
+        assert stats["history"]["count"] == len(alerts) and stats["history_write"]["count"] == len(alerts)
+        assert stats["flags"]["count"] == len(alerts) and stats["labels"]["count"] == len(alerts)
+        assert stats["history"]["sum"] >= len(alerts) * LATENCY
+
+    def test_bounded_concurrency(self):
+        store = SlowStore()
+        pipeline = AsyncPipeline(3)
+        for i in range(20):
+            pipeline.fire("write", store.write, i, i)
+        pipeline.lookup({i: ("read", store.read, i) for i in range(20)})
+        pipeline.flush()
+        assert len(store.items) == 20
+        assert store.max_in_flight <= 3
+
+    def test_lookup_raises(self):
+        def fail():
+            raise ValueError("lookup failed")
+
+        pipeline = AsyncPipeline(2)
+        with pytest.raises(ValueError):
+            pipeline.lookup({"ok": ("read", lambda: 1), "failed": ("read", fail)})
+        assert pipeline.lookup(dict()) == dict()
+
+        with patch("pipeline.Utils.ERROR_CACHE") as error_cache:
+            pipeline.fire("write", fail)  # logged, not raised
+            pipeline.flush()
+        assert error_cache.add.call_count == 1, "should add a failed write to the error cache"
+        pipeline.clear()
+        assert pipeline.stats() == dict()
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram([0.01, 0.1])
+        for seconds in [0.005, 0.01, 0.05, 1]:
+            histogram.observe(seconds)
+        stats = histogram.stats()
+        assert stats["count"] == 4 and stats["sum"] == pytest.approx(1.065)
+        assert stats["buckets"] == {"0.01": 2, "0.1": 1, "inf": 1}
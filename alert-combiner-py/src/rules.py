@@ -0,0 +1,112 @@
+import time
+
+from forta_agent import FindingSeverity
+
+from src.constants import MIN_ALERTS_COUNT, ANOMALY_SCORE_THRESHOLD_STRICT, ANOMALY_SCORE_THRESHOLD_LOOSE
+
+# the alerted cluster lists a rule checks and updates
+STRICT = "strict"
+LOOSE = "loose"
+FP_MITIGATED = "fp_mitigated"
+
+
+class Predicates:
+    """
+    facts about a cluster that the ATTACK-DETECTOR rules are evaluated against; derived once per alert and cluster
+    the fp mitigation facts and whether the cluster was alerted already are only set once the cluster passed the threshold check
+    """
+
+    def __init__(self, stage_count: int, anomaly_score: float, bot_count: int, highly_precise_bot_alert_id_count: int, highly_precise_bot_count: int, is_passthrough_bot: bool):
+        self.stage_count = stage_count
+        self.anomaly_score = anomaly_score
+        self.bot_count = bot_count
+        self.highly_precise_bot_alert_id_count = highly_precise_bot_alert_id_count
+        self.highly_precise_bot_count = highly_precise_bot_count
+        self.is_passthrough_bot = is_passthrough_bot
+
+        self.all_stages = stage_count == 4
+        self.highly_precise = (highly_precise_bot_alert_id_count > 0 and stage_count > 1) or highly_precise_bot_count > 1
+        self.strict_score = bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT
+        self.loose_score = bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE
+
+        self.fp_mitigated = False
+        self.end_user_attack = False
+        self.alerted = {STRICT: False, LOOSE: False, FP_MITIGATED: False}
+
+    def has_min_alerts(self) -> bool:
+        # 1. Have to have at least MIN_ALERTS_COUNT bots reporting alerts
+        return self.bot_count >= MIN_ALERTS_COUNT or self.highly_precise_bot_alert_id_count > 0 or self.is_passthrough_bot
+
+    def exceeds_threshold(self) -> bool:
+        # 2. Have to have overall anomaly score of less than ANOMALY_SCORE_THRESHOLD, 4 stages, highly precise bots or a passthrough alert
+        return self.anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE or self.all_stages or self.is_passthrough_bot or self.highly_precise
+
+    def would_alert(self) -> bool:
+        # any of the conditions of ATTACK-DETECTOR-1 to 4, for a cluster that is fp mitigated or an end user attack
+        return (self.all_stages and not self.alerted[STRICT]) or (self.highly_precise_bot_alert_id_count > 0 and self.stage_count > 1 and not self.alerted[STRICT]) \
+            or self.highly_precise_bot_count > 1 or (self.strict_score and not self.alerted[STRICT]) or (self.loose_score and not self.alerted[LOOSE] and not self.alerted[STRICT])
+
+
+class Rule:
+    """
+    an ATTACK-DETECTOR finding and the condition under which it is raised
+    alerted is the alerted cluster list the cluster is added to; anomaly_score None means the overall anomaly score of the cluster is reported
+    """
+
+    def __init__(self, alert_id: str, severity: FindingSeverity, condition, alerted: str, emit_preparation: bool = True, anomaly_score: float = None):
+        self.alert_id = alert_id
+        self.severity = severity
+        self.condition = condition  # Predicates -> bool
+        self.alerted = alerted
+        self.emit_preparation = emit_preparation
+        self.anomaly_score = anomaly_score
+
+
+# in priority order; the first rule whose condition holds is raised
+ATTACK_DETECTOR_RULES = [
+    Rule("ATTACK-DETECTOR-1", FindingSeverity.Critical,
+         lambda p: not p.end_user_attack and not p.fp_mitigated and p.all_stages and not p.alerted[STRICT], STRICT),
+    Rule("ATTACK-DETECTOR-2", FindingSeverity.Critical,
+         lambda p: not p.end_user_attack and not p.fp_mitigated and p.highly_precise and not p.alerted[STRICT], STRICT),
+    Rule("ATTACK-DETECTOR-7", FindingSeverity.Critical,
+         lambda p: not p.end_user_attack and p.is_passthrough_bot and not p.alerted[STRICT], STRICT, emit_preparation=False, anomaly_score=-1),
+    Rule("ATTACK-DETECTOR-3", FindingSeverity.Critical,
+         lambda p: not p.end_user_attack and not p.fp_mitigated and p.strict_score and not p.alerted[STRICT], STRICT),
+    Rule("ATTACK-DETECTOR-4", FindingSeverity.Low,
+         lambda p: not p.end_user_attack and not p.fp_mitigated and p.loose_score and not p.alerted[LOOSE] and not p.alerted[STRICT], LOOSE),
+    Rule("ATTACK-DETECTOR-5", FindingSeverity.Info,
+         lambda p: not p.end_user_attack and p.fp_mitigated and not p.alerted[FP_MITIGATED] and p.would_alert(), FP_MITIGATED, emit_preparation=False),
+    Rule("ATTACK-DETECTOR-6", FindingSeverity.Info,
+         lambda p: p.end_user_attack and not p.fp_mitigated and not p.alerted[FP_MITIGATED] and p.would_alert(), FP_MITIGATED, emit_preparation=False),
+]
+
+
+class RuleEngine:
+    """
+    evaluates rules against the predicates of a cluster in priority order and returns the first match
+    keeps per rule evaluation counts, matches and the time spent evaluating it
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.clear()
+
+    def clear(self):
+        self.evaluations = {rule.alert_id: 0 for rule in self.rules}
+        self.matches = {rule.alert_id: 0 for rule in self.rules}
+        self.evaluation_time = {rule.alert_id: 0.0 for rule in self.rules}
+
+    def evaluate(self, predicates: Predicates) -> Rule:
+        for rule in self.rules:
+            start = time.perf_counter()
+            matched = rule.condition(predicates)
+            self.evaluation_time[rule.alert_id] += time.perf_counter() - start
+            self.evaluations[rule.alert_id] += 1
+            if matched:
+                self.matches[rule.alert_id] += 1
+                return rule
+        return None
+
+    def stats(self) -> dict:
+        return {rule.alert_id: {"evaluations": self.evaluations[rule.alert_id], "matches": self.matches[rule.alert_id], "evaluation_time": self.evaluation_time[rule.alert_id]}
+                for rule in self.rules}
@@ -0,0 +1,61 @@
+import itertools
+
+from forta_agent import FindingSeverity
+
+from rules import Predicates, RuleEngine, ATTACK_DETECTOR_RULES, STRICT, LOOSE, FP_MITIGATED
+from constants import MIN_ALERTS_COUNT, ANOMALY_SCORE_THRESHOLD_STRICT, ANOMALY_SCORE_THRESHOLD_LOOSE
+
+
+def if_elif_chain(stage_count, anomaly_score, bot_count, hp_alert_id_count, hp_bot_count, is_passthrough_bot, fp_mitigated, end_user_attack, strict, loose, fp):
+    # the decision detect_attack made before the rule engine
+    if not end_user_attack and not fp_mitigated and stage_count == 4 and not strict:
+        return "ATTACK-DETECTOR-1"
+    elif not end_user_attack and not fp_mitigated and ((hp_alert_id_count > 0 and stage_count > 1) or hp_bot_count > 1) and not strict:
+        return "ATTACK-DETECTOR-2"
+    elif not end_user_attack and is_passthrough_bot and not strict:
+        return "ATTACK-DETECTOR-7"
+    elif not end_user_attack and not fp_mitigated and (bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT) and not strict:
+        return "ATTACK-DETECTOR-3"
+    elif not end_user_attack and not fp_mitigated and (bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE) and not loose and not strict:
+        return "ATTACK-DETECTOR-4"
+    any_condition = (stage_count == 4 and not strict) or (hp_alert_id_count > 0 and stage_count > 1 and not strict) or hp_bot_count > 1 \
+        or (bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_STRICT and not strict) \
+        or (bot_count >= MIN_ALERTS_COUNT and anomaly_score < ANOMALY_SCORE_THRESHOLD_LOOSE and not loose and not strict)
+    if not end_user_attack and fp_mitigated and not fp and any_condition:
+        return "ATTACK-DETECTOR-5"
+    elif end_user_attack and not fp_mitigated and not fp and any_condition:
+        return "ATTACK-DETECTOR-6"
+    return None
+
+
+class TestRules:
+
+    def test_rules_match_if_elif_chain(self):
+        engine = RuleEngine(ATTACK_DETECTOR_RULES)
+        for values in itertools.product([1, 2, 4], [0.5, ANOMALY_SCORE_THRESHOLD_LOOSE / 10, ANOMALY_SCORE_THRESHOLD_STRICT / 10], [1, MIN_ALERTS_COUNT],
+                                        [0, 1], [0, 1, 2], [False, True], [False, True], [False, True], [False, True], [False, True], [False, True]):
+            predicates = Predicates(*values[:6])
+            predicates.fp_mitigated, predicates.end_user_attack = values[6], values[7]
+            predicates.alerted = {STRICT: values[8], LOOSE: values[9], FP_MITIGATED: values[10]}
+            rule = engine.evaluate(predicates)
+            assert (rule.alert_id if rule is not None else None) == if_elif_chain(*values), f"{values}"
+
+    def test_priority_and_stats(self):
+        engine = RuleEngine(ATTACK_DETECTOR_RULES)
+        predicates = Predicates(4, ANOMALY_SCORE_THRESHOLD_STRICT / 10, MIN_ALERTS_COUNT, 1, 2, True)
+        assert predicates.has_min_alerts() and predicates.exceeds_threshold()
+        rule = engine.evaluate(predicates)
+        assert rule.alert_id == "ATTACK-DETECTOR-1", "should raise the first matching rule"
+        assert rule.severity == FindingSeverity.Critical and rule.alerted == STRICT and rule.emit_preparation
+
+        predicates.alerted[STRICT] = True
+        assert engine.evaluate(predicates) is None
+
+        stats = engine.stats()
+        assert list(stats.keys()) == [rule.alert_id for rule in ATTACK_DETECTOR_RULES]
+        assert stats["ATTACK-DETECTOR-1"]["evaluations"] == 2 and stats["ATTACK-DETECTOR-1"]["matches"] == 1
+        assert stats["ATTACK-DETECTOR-6"]["evaluations"] == 1, "should short circuit on the first match"
+        assert all(rule_stats["evaluation_time"] >= 0 for rule_stats in stats.values())
+
+        engine.clear()
+        assert engine.stats()["ATTACK-DETECTOR-1"]["evaluations"] == 0
@@ -3,6 +3,7 @@ import boto3
 import json
 import requests
 import os
+import threading
 
 owner_db = "https://research.forta.network/database/owner/"
 bucket_name = "prod-research-bot-data"
@@ -52,3 +53,24 @@ def dynamo_table(secrets, region='us-east-1'):
                        region_name=region)
 
     return d.Table(dynamo_table_name)
+
+
+class ThreadLocalTable:
+    """
+    a dynamo table resource per thread, created on first use; boto3 resources are not thread safe
+    attribute access is delegated to the table of the calling thread, so it can be passed wherever a table is
+    """
+
+    def __init__(self, create_table):
+        self.create_table = create_table
+        self.local = threading.local()
+
+    def get(self):
+        table = getattr(self.local, "table", None)
+        if table is None:
+            table = self.create_table()
+            self.local.table = table
+        return table
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
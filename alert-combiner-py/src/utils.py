@@ -228,7 +228,8 @@ class Utils:
             return True
 
         
-        if cluster in du.read_fp_mitigation_clusters(dynamo):
+        fp_mitigation_clusters = du.read_fp_mitigation_clusters(dynamo)
+        if fp_mitigation_clusters is not None and cluster in fp_mitigation_clusters:
             logging.info(f"Cluster {cluster} is in FP mitigation clusters")
             return True
 
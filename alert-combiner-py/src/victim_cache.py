@@ -0,0 +1,94 @@
+import logging
+import traceback
+
+from src.ttl_cache import TTLCache
+from src.utils import Utils
+
+NO_VICTIM = "no_victim"  # cached for transactions without a victim record
+
+
+class VictimCache:
+    """
+    victim records (transaction hash -> victim metadata) and victim labels (address -> etherscan label) cached for ttl seconds
+    transactions without a victim record and clusters none of whose transactions have one are cached for negative_ttl seconds
+    a miss reads all victims with one query; detect_attack looks up the victims of a cluster when it crosses the anomaly threshold, along with the fp mitigation checks
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.records = TTLCache(max_size, ttl)  # transaction hash -> victim metadata
+        self.negative_records = TTLCache(max_size, negative_ttl)  # transaction hash -> NO_VICTIM
+        self.clusters_without_victims = TTLCache(max_size, negative_ttl)  # cluster -> transaction hashes without victims
+        self.labels = TTLCache(max_size, ttl)  # address -> etherscan label
+        self.loads = 0
+
+    def clear(self):
+        self.records.clear()
+        self.negative_records.clear()
+        self.clusters_without_victims.clear()
+        self.labels.clear()
+        self.loads = 0
+
+    def put(self, transaction_hash: str, metadata: dict):
+        """caches a victim record this instance put to dynamo"""
+        self.records.put(transaction_hash, metadata)
+        if self.negative_records.get(transaction_hash) is not None:
+            self.negative_records.invalidate(transaction_hash)
+            self.clusters_without_victims.clear()  # a cluster may have this transaction
+
+    def get_record(self, transaction_hash: str):
+        """victim metadata, NO_VICTIM or None if the transaction is not cached"""
+        metadata = self.records.get(transaction_hash)
+        return metadata if metadata is not None else self.negative_records.get(transaction_hash)
+
+    def load(self, du, dynamo, transaction_hashes: set):
+        try:
+            victims = du.read_victims(dynamo)
+        except Exception as e:
+            logging.warning(f"Failed to read victims: {e} - {traceback.format_exc()}")
+            return
+        if victims is None:
+            return  # the transactions are not cached as without victims
+        self.loads += 1
+        for transaction_hash, metadata in victims.items():
+            self.records.put(transaction_hash, metadata)
+        for transaction_hash in transaction_hashes:
+            if transaction_hash not in victims:
+                self.negative_records.put(transaction_hash, NO_VICTIM)
+
+    def has_no_victims(self, cluster: str, transaction_hashes: set) -> bool:
+        checked = self.clusters_without_victims.get(cluster)
+        return checked is not None and transaction_hashes <= checked
+
+    def get(self, du, dynamo, cluster: str, transaction_hashes: set) -> dict:
+        """transaction hash -> victim metadata of the transactions of the cluster that have a victim record"""
+        if self.has_no_victims(cluster, transaction_hashes):
+            return dict()
+
+        uncached = {transaction_hash for transaction_hash in transaction_hashes if self.get_record(transaction_hash) is None}
+        if len(uncached) > 0:
+            self.load(du, dynamo, uncached)
+
+        victims = dict()
+        for transaction_hash in transaction_hashes:
+            metadata = self.get_record(transaction_hash)
+            if metadata is not None and metadata != NO_VICTIM:
+                victims[transaction_hash] = metadata
+        if len(victims) == 0:
+            self.clusters_without_victims.put(cluster, frozenset(transaction_hashes))
+        return victims
+
+    def get_label(self, address: str) -> str:
+        label = self.labels.get(address)
+        if label is None:
+            label = Utils.get_etherscan_label(address)
+            self.labels.put(address, label)
+        return label
+
+    def stats(self) -> dict:
+        return {
+            "records": self.records.stats(),
+            "negative_records": self.negative_records.stats(),
+            "clusters_without_victims": self.clusters_without_victims.stats(),
+            "labels": self.labels.stats(),
+            "loads": self.loads
+        }
@@ -0,0 +1,53 @@
+import victim_cache
+from victim_cache import VictimCache
+from dynamo_utils import DynamoUtils, TEST_TAG
+from dynamo_mock import DynamoTableMock
+
+
+class TestVictimCache:
+
+    def test_get(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock()
+        for i in range(5):
+            du.put_victim(dynamo, f"0xtx{i}", {"address1": f"0xvictim{i}"})
+
+        cache = VictimCache(100, 3600, 300)
+        assert cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx3", "0xother"}) == {"0xtx1": {"address1": "0xvictim1"}, "0xtx3": {"address1": "0xvictim3"}}
+        queries = dynamo.queries
+        assert cache.stats()["loads"] == 1, "should read all victims with one paged query"
+
+        cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx3", "0xother"})
+        cache.get(du, dynamo, "0xcluster2", {"0xtx4"})
+        assert dynamo.queries == queries, "should serve the victims of both clusters from the cache"
+
+    def test_negative_caching(self):
+        du = DynamoUtils(TEST_TAG, 1)
+        dynamo = DynamoTableMock()
+        cache = VictimCache(100, 3600, 300)
+        assert cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx2"}) == {}
+        queries = dynamo.queries
+        assert cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx2"}) == {}
+        assert cache.get(du, dynamo, "0xcluster", {"0xtx1"}) == {}
+        assert dynamo.queries == queries, "should cache clusters without victims"
+        assert cache.stats()["clusters_without_victims"]["hits"] == 2
+
+        cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx3"})
+        assert dynamo.queries > queries, "should look up transactions the cluster did not have before"
+
+        du.put_victim(dynamo, "0xtx1", {"address1": "0xvictim1"})
+        cache.put("0xtx1", {"address1": "0xvictim1"})
+        assert cache.get(du, dynamo, "0xcluster", {"0xtx1", "0xtx3"}) == {"0xtx1": {"address1": "0xvictim1"}}, "should not keep a negative entry a victim was put for"
+
+    def test_get_label(self, monkeypatch):
+        lookups = []
+
+        def get_etherscan_label(address):
+            lookups.append(address)
+            return "Protocol"
+
+        monkeypatch.setattr(victim_cache.Utils, "get_etherscan_label", get_etherscan_label)
+        cache = VictimCache(100, 3600, 300)
+        assert cache.get_label("0xvictim") == "Protocol"
+        assert cache.get_label("0xvictim") == "Protocol"
+        assert lookups == ["0xvictim"]
@@ -21,10 +21,12 @@ try:
     from src.constants import MAX_AGE_IN_DAYS, MAX_NONCE, GRAPH_KEY, ONE_WAY_WEI_TRANSFER_THRESHOLD, NEW_FUNDED_MAX_WEI_TRANSFER_THRESHOLD, NEW_FUNDED_MAX_NONCE, TX_SAVE_STEP, HTTP_RPC_TIMEOUT, PROFILING, BOT_ID, PROD_TAG
     from src.persistance import DynamoPersistance
     from src.storage import get_secrets
+    from src.last_seen_index import LastSeenIndex
 except ModuleNotFoundError:
     from constants import MAX_AGE_IN_DAYS, MAX_NONCE, GRAPH_KEY, ONE_WAY_WEI_TRANSFER_THRESHOLD, NEW_FUNDED_MAX_WEI_TRANSFER_THRESHOLD, NEW_FUNDED_MAX_NONCE, TX_SAVE_STEP, HTTP_RPC_TIMEOUT, PROFILING, BOT_ID, PROD_TAG
     from persistance import DynamoPersistance
     from storage import get_secrets
+    from last_seen_index import LastSeenIndex
 
 
 
@@ -54,6 +56,7 @@ handler.addFilter(ContextFilter())
 class EntityClusterAgent:
 
     GRAPH = nx.DiGraph()
+    last_seen_index: LastSeenIndex = None
     persistance: DynamoPersistance = None
     tx_counter = 0
     tx_save_step = 1
@@ -76,6 +79,7 @@ class EntityClusterAgent:
         logging.info(f"Run initialize chain: {self.chain_id}")
         self.tx_save_step = tx_save_step
         self.GRAPH = nx.DiGraph()
+        self.last_seen_index = LastSeenIndex()
         environ["ZETTABLOCK_API_KEY"] = ZETTABLOCK_KEY
 
 
@@ -96,6 +100,7 @@ class EntityClusterAgent:
             logging.info(f"Updated address {checksum_address} last_seen in graph. Graph size is still {len(self.GRAPH.nodes)}")
         else:
             self.GRAPH.add_node(checksum_address, last_seen=datetime.now())
+            self.last_seen_index.add(checksum_address, self.GRAPH.nodes[checksum_address]["last_seen"])
             logging.info(f"Added address {checksum_address} to graph. Graph size is now {len(self.GRAPH.nodes)}")
 
     def is_address_below_max_transactions(self, w3, address):
@@ -123,6 +128,13 @@ class EntityClusterAgent:
             a_graph.remove_node(node)
             logging.info(f"Removed address {node} from graph. Graph size is now {len(a_graph.nodes)}")
 
+    def prune(self, block_number: int = None, now: datetime = None):
+        #  same as prune_graph for the graph of this agent, but only looks at the nodes the last seen index has as possibly expired
+        if now is None:
+            now = datetime.now()
+        for node in self.last_seen_index.prune(self.GRAPH, now - timedelta(days=MAX_AGE_IN_DAYS), block_number):
+            logging.info(f"Removed address {node} from graph. Graph size is now {len(self.GRAPH.nodes)}")
+
 
     def add_directed_edge(self, w3, from_, to):
 
@@ -170,7 +182,7 @@ class EntityClusterAgent:
         findings = []
         if (transaction_event.transaction.to is None) or (transaction_event.transaction.value > 0) or (transaction_event.filter_log(ERC20_TRANSFER_EVENT)):
 
-            EntityClusterAgent.prune_graph(self.GRAPH)
+            self.prune(transaction_event.block.number)
 
             #  add edges for each native transfer, treated as bidirectional if sender and recipient nonces are less than or equal to NEW_FUNDED_MAX_NONCE _OR_ if large native transfer
             if transaction_event.transaction.value > 0:
@@ -326,6 +338,8 @@ class EntityClusterAgent:
                 stats.sort_stats('time')
                 stats.dump_stats('entity_cluster_prof_stats')
                 stats.print_stats()
+                prune_stats = self.last_seen_index.stats()
+                stream.write(f"Pruning block {prune_stats['block_number']}: {prune_stats['seconds']:.6f} seconds, {prune_stats['entries']} index entries, {prune_stats['removed']} addresses removed, index size {prune_stats['size']}\n")
             return f
         else:
             return self.cluster_entities(w3, transaction_event)
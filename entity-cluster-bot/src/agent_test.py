@@ -40,6 +40,27 @@ class TestEntityClusterBot:
 
         assert len(entity_cluster_agent.GRAPH.nodes) == 1, "Old address was not removed from graph"
 
+    def test_prune_incremental(self):
+        #  only the addresses the last seen index has as possibly expired are looked at; addresses seen again are kept
+        entity_cluster_agent = EntityClusterAgent(DynamoPersistance())
+
+        entity_cluster_agent.add_address(EOA_ADDRESS_NEW)
+        entity_cluster_agent.add_address(EOA_ADDRESS_OLD)
+        entity_cluster_agent.add_directed_edge(w3, EOA_ADDRESS_NEW, EOA_ADDRESS_OLD)
+
+        entity_cluster_agent.prune(1)
+        assert entity_cluster_agent.last_seen_index.stats()["entries"] == 0, "Nothing should have been looked at before MAX_AGE_IN_DAYS"
+
+        entity_cluster_agent.GRAPH.nodes[EOA_ADDRESS_NEW]["last_seen"] = datetime.now() + timedelta(days=2)  # seen again
+        entity_cluster_agent.prune(2, datetime.now() + timedelta(days=8))
+        assert list(entity_cluster_agent.GRAPH.nodes) == [EOA_ADDRESS_NEW], "Old address was not removed from graph"
+        assert len(entity_cluster_agent.GRAPH.edges) == 0, "Edges of the old address should have been removed"
+        stats = entity_cluster_agent.last_seen_index.stats()
+        assert stats["block_number"] == 2 and stats["entries"] == 2 and stats["removed"] == 1 and stats["size"] == 1
+
+        entity_cluster_agent.prune(3, datetime.now() + timedelta(days=10))
+        assert len(entity_cluster_agent.GRAPH.nodes) == 0, "Address seen again should have been removed once expired"
+
     def test_add_address_discard(self):
         #  calls address on address with too large of a nonce
         agent = EntityClusterAgent(DynamoPersistance())
@@ -0,0 +1,54 @@
+import heapq
+import time
+from datetime import datetime
+
+import networkx as nx
+
+
+class LastSeenIndex:
+    """
+    min heap of the nodes of a graph by last_seen, so that pruning only touches the nodes that may have expired
+    a node has one entry; when a node is seen again its entry is left in place and moved forward once it reaches the front of the heap
+    edges are not indexed, as they are removed along with their nodes
+    """
+
+    def __init__(self):
+        self.heap = []  # (last_seen, node)
+        self.indexed = dict()  # node -> last_seen of its entry in the heap
+        self.entries = 0  # heap entries popped while pruning the current block
+        self.removed = 0  # nodes removed while pruning the current block
+        self.seconds = 0.0  # time spent pruning the current block
+        self.block_number = None
+
+    def add(self, node: str, last_seen: datetime):
+        if node not in self.indexed:
+            self.indexed[node] = last_seen
+            heapq.heappush(self.heap, (last_seen, node))
+
+    def prune(self, graph: nx.DiGraph, cutoff: datetime, block_number: int = None) -> list:
+        """removes the nodes last seen before cutoff from graph and returns them"""
+        if block_number != self.block_number:
+            self.block_number = block_number
+            self.entries = 0
+            self.removed = 0
+            self.seconds = 0.0
+
+        start = time.perf_counter()
+        removed = []
+        while len(self.heap) > 0 and self.heap[0][0] < cutoff:
+            last_seen, node = heapq.heappop(self.heap)
+            self.entries += 1
+            del self.indexed[node]
+            if node not in graph.nodes:
+                continue
+            if graph.nodes[node]["last_seen"] < cutoff:
+                graph.remove_node(node)
+                removed.append(node)
+            else:
+                self.add(node, graph.nodes[node]["last_seen"])
+        self.removed += len(removed)
+        self.seconds += time.perf_counter() - start
+        return removed
+
+    def stats(self) -> dict:
+        return {"block_number": self.block_number, "entries": self.entries, "removed": self.removed, "seconds": self.seconds, "size": len(self.heap)}
@@ -1,3 +1,4 @@
+import atexit
 import logging
 import sys
 import requests
@@ -12,6 +13,7 @@ import pickle
 import json
 import math
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pytz
 import traceback
 import joblib
@@ -26,13 +28,26 @@ from src.constants import (BASE_BOTS, ALERTED_ENTITIES_ML_KEY, ALERTED_ENTITIES_
                        FINDINGS_CACHE_ALERT_KEY, FINDINGS_CACHE_BLOCK_KEY, ALERTED_FP_CLUSTERS_KEY, FINDINGS_CACHE_TRANSACTION_KEY,
                        ALERTED_FP_CLUSTERS_QUEUE_SIZE, SCAM_DETECTOR_BOT_ID, SCAM_DETECTOR_BETA_BOT_ID, SCAM_DETECTOR_BETA_ALT_BOT_ID, CONTRACT_SIMILARITY_BOTS, CONTRACT_SIMILARITY_BOT_THRESHOLDS, EOA_ASSOCIATION_BOTS,
                        EOA_ASSOCIATION_BOT_THRESHOLDS, PAIRCREATED_EVENT_ABI, SWAP_FACTORY_ADDRESSES, POOLCREATED_EVENT_ABI, ENCRYPTED_BOTS,
-                       MODEL_ALERT_THRESHOLD_LOOSE, MODEL_ALERT_THRESHOLD_STRICT, MODEL_FEATURES, MODEL_NAME, DEBUG_ALERT_ENABLED, ENABLE_METAMASK_CONSUMPTION)
-from src.storage import s3_client, dynamo_table, get_secrets, bucket_name
+                       MODEL_ALERT_THRESHOLD_LOOSE, MODEL_ALERT_THRESHOLD_STRICT, MODEL_FEATURES, MODEL_NAME, DEBUG_ALERT_ENABLED, ENABLE_METAMASK_CONSUMPTION,
+                       DYNAMO_READ_CACHE_SIZE, DYNAMO_READ_CACHE_TTL_IN_SECONDS, DYNAMO_READ_MAX_WORKERS, MODEL_SCORER_CHECK_SAMPLE_SIZE, MODEL_SCORER_CHECK_SEED,
+                       ETHERSCAN_LABEL_SNAPSHOT_KEY, FINDINGS_CACHE_BLOCK_CAPACITY, FINDINGS_CACHE_ALERT_CAPACITY, FINDINGS_CACHE_TRANSACTION_CAPACITY, FINDINGS_CACHE_DROP_POLICY,
+                       REACTIVE_LIKELY_FPS_KEY, REACTIVE_LIKELY_FPS_BATCH_SIZE, REACTIVE_LIKELY_FPS_MAX_WORKERS, REACTIVE_LIKELY_FPS_TIME_BUDGET_IN_SECONDS)
+from src.storage import s3_client, dynamo_table, get_secrets, bucket_name, ThreadLocalTable
+from src.dynamo_writer import DynamoWriter
+from src.ttl_cache import TTLCache
+from src.feature_vector import FeatureVectorBuilder
+from src.tree_scorer import TreeEnsembleScorer
 from src.findings import ScamDetectorFinding
 from src.blockchain_indexer_service import BlockChainIndexer
+from src.etherscan_label_snapshot import EtherscanLabelSnapshot
 from src.forta_explorer import FortaExplorer
 from src.base_bot_parser import BaseBotParser
 from src.l2_cache import L2Cache
+from src.delta_log import DeltaLog
+from src.findings_queue import FindingsQueue
+from src.batch_worker import BatchWorker
+from src.alerted_entity_store import AlertedEntityStore
+from src.signature_matcher import SignatureMatcher
 from src.utils import Utils
 
 web3 = Utils.get_rpc_endpoint()
@@ -47,26 +62,36 @@ CHAIN_ID = -1
 BOT_VERSION = Utils.get_bot_version()
 LAST_PROCESSED_TIME = 0 # Used to update reactive likely fps
 
-ALERTED_ENTITIES_ML = OrderedDict()  # cluster -> alert_id
-ALERTED_ENTITIES_PASSTHROUGH = OrderedDict()  # cluster -> alert_id
-ALERTED_ENTITIES_SCAMMER_ASSOCIATION = OrderedDict()  # cluster -> alert_id
-ALERTED_ENTITIES_SIMILAR_CONTRACT = OrderedDict()  # cluster -> alert_id
-ALERTED_ENTITIES_MANUAL = OrderedDict()  # cluster -> alert_id
-ALERTED_ENTITIES_MANUAL_METAMASK = OrderedDict()  # cluster -> alert_id
+ALERTED_ENTITIES_ML = AlertedEntityStore(ALERTED_ENTITIES_ML_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # cluster -> alert_id
+ALERTED_ENTITIES_PASSTHROUGH = AlertedEntityStore(ALERTED_ENTITIES_PASSTHROUGH_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # cluster -> alert_id
+ALERTED_ENTITIES_SCAMMER_ASSOCIATION = AlertedEntityStore(ALERTED_ENTITIES_SCAMMER_ASSOCIATION_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # cluster -> alert_id
+ALERTED_ENTITIES_SIMILAR_CONTRACT = AlertedEntityStore(ALERTED_ENTITIES_SIMILAR_CONTRACT_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # cluster -> alert_id
+ALERTED_ENTITIES_MANUAL = AlertedEntityStore(ALERTED_ENTITIES_MANUAL_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # cluster -> alert_id
+ALERTED_ENTITIES_MANUAL_METAMASK = AlertedEntityStore(ALERTED_ENTITIES_MANUAL_METAMASK_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # url -> alert_id
 ALERTED_ENTITIES_MANUAL_METAMASK_LIST = [] # Used to reduce size of persisted item
-ALERTED_FP_CLUSTERS = OrderedDict()  # clusters -> alert_id (dummy val) which are considered FPs that have been alerted on
-FINDINGS_CACHE_BLOCK = []
-FINDINGS_CACHE_ALERT = []
-FINDINGS_CACHE_TRANSACTION = []
-REACTIVE_LIKELY_FPS = {}  # address -> list of label metadata (addresses that are yet to be checked)
+ALERTED_FP_CLUSTERS = AlertedEntityStore(ALERTED_FP_CLUSTERS_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT)  # clusters -> alert_id (dummy val) which are considered FPs that have been alerted on
+FINDINGS_CACHE_BLOCK = FindingsQueue("block", FINDINGS_CACHE_BLOCK_CAPACITY, FINDINGS_CACHE_DROP_POLICY)
+FINDINGS_CACHE_ALERT = FindingsQueue("alert", FINDINGS_CACHE_ALERT_CAPACITY, FINDINGS_CACHE_DROP_POLICY)
+FINDINGS_CACHE_TRANSACTION = FindingsQueue("transaction", FINDINGS_CACHE_TRANSACTION_CAPACITY, FINDINGS_CACHE_DROP_POLICY)
+REACTIVE_LIKELY_FPS = {}  # address -> (list of label metadata, list of unique keys) (addresses that are yet to be checked)
+REACTIVE_LIKELY_FPS_WORKER = BatchWorker("reactive likely fps", lambda address, w3: Utils.is_fp(w3, address, CHAIN_ID), REACTIVE_LIKELY_FPS_BATCH_SIZE,
+                                         REACTIVE_LIKELY_FPS_TIME_BUDGET_IN_SECONDS, REACTIVE_LIKELY_FPS_MAX_WORKERS)
 SCAMMER_ASSOCIATION_LABELS = None
 SIMILAR_CONTRACT_LABELS = None
-DF_CONTRACT_SIGNATURES = None
+CONTRACT_SIGNATURES = None  # SignatureMatcher over the manual list rows of EntityType Code
+DELTA_LOGS = {}  # key -> DeltaLog of the persisted state
+ENTITY_CLUSTERS_CACHE = TTLCache(DYNAMO_READ_CACHE_SIZE, DYNAMO_READ_CACHE_TTL_IN_SECONDS)  # itemId -> entity clusters; written through by put_entity_cluster
+ALERTS_CACHE = TTLCache(DYNAMO_READ_CACHE_SIZE, DYNAMO_READ_CACHE_TTL_IN_SECONDS)  # itemId -> alert tuples; written through by put_alert
+DYNAMO_READ_EXECUTOR = ThreadPoolExecutor(max_workers=DYNAMO_READ_MAX_WORKERS)  # parallel queries of different itemIds
 
 MODEL = None
+MODEL_SCORER = None  # flattened MODEL; None if it couldnt be verified against predict_proba
+FEATURE_VECTOR_BUILDER = FeatureVectorBuilder(MODEL_FEATURES)
 
 s3 = None
 dynamo = None
+dynamo_read_tables = None  # a table resource per DYNAMO_READ_EXECUTOR thread
+dynamo_writer = None
 secrets = None
 item_id_prefix = ""
 
@@ -101,54 +126,57 @@ def initialize(test = False):
         Utils.update_fp_list(CHAIN_ID)
 
         global ALERTED_ENTITIES_ML
-        alerted_entities_ml = load(CHAIN_ID, ALERTED_ENTITIES_ML_KEY)
-        ALERTED_ENTITIES_ML = OrderedDict() if alerted_entities_ml is None else OrderedDict(alerted_entities_ml)
+        ALERTED_ENTITIES_ML = AlertedEntityStore(ALERTED_ENTITIES_ML_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_ENTITIES_ML_KEY))
 
         global ALERTED_ENTITIES_PASSTHROUGH
-        alerted_entities_passthrough = load(CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY)
-        ALERTED_ENTITIES_PASSTHROUGH = OrderedDict() if alerted_entities_passthrough is None else OrderedDict(alerted_entities_passthrough)
+        ALERTED_ENTITIES_PASSTHROUGH = AlertedEntityStore(ALERTED_ENTITIES_PASSTHROUGH_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY))
 
         global ALERTED_ENTITIES_SCAMMER_ASSOCIATION
-        alerted_entities_scammer_association = load(CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY)
-        ALERTED_ENTITIES_SCAMMER_ASSOCIATION = OrderedDict() if alerted_entities_scammer_association is None else OrderedDict(alerted_entities_scammer_association)
+        ALERTED_ENTITIES_SCAMMER_ASSOCIATION = AlertedEntityStore(ALERTED_ENTITIES_SCAMMER_ASSOCIATION_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY))
 
         global ALERTED_ENTITIES_SIMILAR_CONTRACT
-        alerted_entities_similar_contract = load(CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY)
-        ALERTED_ENTITIES_SIMILAR_CONTRACT = OrderedDict() if alerted_entities_similar_contract is None else OrderedDict(alerted_entities_similar_contract)
+        ALERTED_ENTITIES_SIMILAR_CONTRACT = AlertedEntityStore(ALERTED_ENTITIES_SIMILAR_CONTRACT_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY))
 
         global ALERTED_ENTITIES_MANUAL
-        alerted_entities_manual = load(CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY)
-        ALERTED_ENTITIES_MANUAL = OrderedDict() if alerted_entities_manual is None else OrderedDict(alerted_entities_manual)
+        ALERTED_ENTITIES_MANUAL = AlertedEntityStore(ALERTED_ENTITIES_MANUAL_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY))
 
         if CHAIN_ID == 1:
             global ALERTED_ENTITIES_MANUAL_METAMASK
             global ALERTED_ENTITIES_MANUAL_METAMASK_LIST
             alerted_entities_manual_metamask = load(CHAIN_ID, ALERTED_ENTITIES_MANUAL_METAMASK_KEY)
             ALERTED_ENTITIES_MANUAL_METAMASK_LIST = [] if alerted_entities_manual_metamask is None else list(alerted_entities_manual_metamask)
-            ALERTED_ENTITIES_MANUAL_METAMASK = {item: 'manual_metamaskSCAM-DETECTOR-MANUAL-METAMASK-PHISHING' for item in ALERTED_ENTITIES_MANUAL_METAMASK_LIST}
+            ALERTED_ENTITIES_MANUAL_METAMASK = AlertedEntityStore(ALERTED_ENTITIES_MANUAL_METAMASK_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, {item: {'manual_metamaskSCAM-DETECTOR-MANUAL-METAMASK-PHISHING'} for item in ALERTED_ENTITIES_MANUAL_METAMASK_LIST})
 
         global ALERTED_FP_CLUSTERS
-        alerted_fp_addresses = load(CHAIN_ID, ALERTED_FP_CLUSTERS_KEY)
-        ALERTED_FP_CLUSTERS = OrderedDict() if alerted_fp_addresses is None else OrderedDict(alerted_fp_addresses)
+        ALERTED_FP_CLUSTERS = AlertedEntityStore(ALERTED_FP_CLUSTERS_QUEUE_SIZE, L2Cache.PERSISTENCE_SIZE_LIMIT, load(CHAIN_ID, ALERTED_FP_CLUSTERS_KEY))
 
         global FINDINGS_CACHE_BLOCK
         findings_cache_block = load(CHAIN_ID, FINDINGS_CACHE_BLOCK_KEY)
-        FINDINGS_CACHE_BLOCK = [] if findings_cache_block is None else list(findings_cache_block)
+        FINDINGS_CACHE_BLOCK = FindingsQueue("block", FINDINGS_CACHE_BLOCK_CAPACITY, FINDINGS_CACHE_DROP_POLICY, findings_cache_block)
 
         global FINDINGS_CACHE_ALERT
         findings_cache_alert = load(CHAIN_ID, FINDINGS_CACHE_ALERT_KEY)
-        FINDINGS_CACHE_ALERT = [] if findings_cache_alert is None else list(findings_cache_alert)
+        FINDINGS_CACHE_ALERT = FindingsQueue("alert", FINDINGS_CACHE_ALERT_CAPACITY, FINDINGS_CACHE_DROP_POLICY, findings_cache_alert)
 
         global FINDINGS_CACHE_TRANSACTION
         findings_cache_transaction = load(CHAIN_ID, FINDINGS_CACHE_TRANSACTION_KEY)
-        FINDINGS_CACHE_TRANSACTION = [] if findings_cache_transaction is None else list(findings_cache_transaction)
+        FINDINGS_CACHE_TRANSACTION = FindingsQueue("transaction", FINDINGS_CACHE_TRANSACTION_CAPACITY, FINDINGS_CACHE_DROP_POLICY, findings_cache_transaction)
+
+        global REACTIVE_LIKELY_FPS
+        reactive_likely_fps = load(CHAIN_ID, REACTIVE_LIKELY_FPS_KEY)
+        REACTIVE_LIKELY_FPS = OrderedDict() if reactive_likely_fps is None else reactive_likely_fps
         
-        global DF_CONTRACT_SIGNATURES
+        etherscan_label_snapshot = L2Cache.load(CHAIN_ID, ETHERSCAN_LABEL_SNAPSHOT_KEY, report_missing=False)
+        BlockChainIndexer.LABEL_SNAPSHOT = etherscan_label_snapshot if etherscan_label_snapshot is not None else EtherscanLabelSnapshot()
+
+        global CONTRACT_SIGNATURES
         df_manual_list = Utils.get_manual_list()
-        DF_CONTRACT_SIGNATURES = df_manual_list[df_manual_list['EntityType']=='Code']
+        CONTRACT_SIGNATURES = SignatureMatcher(df_manual_list[df_manual_list['EntityType']=='Code'])
 
         global MODEL
         MODEL = joblib.load(MODEL_NAME)
+        global MODEL_SCORER
+        MODEL_SCORER = compile_model(MODEL)
 
         # subscribe to the base bots, FP mitigation and entity clustering bot
         global BASE_BOTS
@@ -172,6 +200,8 @@ def reinitialize():
     global BOT_VERSION
     global s3
     global dynamo
+    global dynamo_read_tables
+    global dynamo_writer
     global secrets 
 
     try:
@@ -180,6 +210,8 @@ def reinitialize():
             secrets = get_secrets()
             s3 = s3_client(secrets)
             dynamo = dynamo_table(secrets)
+            dynamo_read_tables = ThreadLocalTable(lambda: dynamo_table(secrets))
+            dynamo_writer = DynamoWriter(dynamo)
             logging.info(f"{BOT_VERSION}: Initialized dynamo DB successfully.")
     except Exception as e:
         logging.error(f"{BOT_VERSION}: Error getting chain id: {e}")
@@ -198,6 +230,15 @@ def reinitialize():
         raise e
   
 
+def flush_dynamo_writer():
+    # on shutdown; the buffered puts would otherwise be lost
+    if dynamo_writer is not None:
+        dynamo_writer.flush(force=True)
+
+
+atexit.register(flush_dynamo_writer)
+
+
 def in_list(alert_event: forta_agent.alert_event.AlertEvent, bots: tuple) -> bool:
     """
     this function returns True if the alert is from a bot in the bots tuple
@@ -233,28 +274,8 @@ def alert_target(alert_event: forta_agent.alert_event.AlertEvent, bots: tuple) -
     return ""
 
 
-def update_list(items: dict, max_size: int, item: str, alert_id: str, list_name: str, logic = ""):
-    if item not in items.keys():
-        items[item] = set()
-    items[item].add(logic+alert_id)
-
-    while len(items) > max_size:
-        if isinstance(items, list):
-            items.pop(0)
-        else:
-            items.popitem(last=False)
-
-    count = 0
-    if len(items) % 1000 == 0:
-        while len(pickle.dumps(items)) > L2Cache.PERSISTENCE_SIZE_LIMIT:
-            for i in range(100): # remove 100 items at a time given pickle is expensive
-                if len(items) > 0:
-                    if isinstance(items, list):
-                        items.pop(0)
-                    else:
-                        items.popitem(last=False)
-                    count += 1
-    
+def update_list(items: AlertedEntityStore, item: str, alert_id: str, list_name: str, logic = ""):
+    count = items.add(item, logic+alert_id)
     if count > 0:
         logging.warning(f"Removed {count} items from {list_name} list to reduce size.")
 
@@ -275,25 +296,20 @@ def put_entity_cluster(alert_created_at_str: str, address: str, cluster: str):
     
     expiresAt = int(alert_created_at) + int(expiry_offset)
     logging.debug(f"expiresAt: {expiresAt}")
-    response = dynamo.put_item(Item={
+    dynamo_writer.put_item({
         "itemId": itemId,
         "sortKey": sortId,
         "address": address,
         "cluster": cluster,
         "expiresAt": expiresAt
     })
-
-    if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
-        logging.error(f"Error putting alert in dynamoDB: {response}")
-        Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo.put_item HTTPStatusCode {response["ResponseMetadata"]["HTTPStatusCode"]}', "agent.put_entity_cluster", ""))
-        return
-    else:
-        logging.info(f"Successfully put alert in dynamoDB: {response}")
-        return
+    ENTITY_CLUSTERS_CACHE.put(itemId, OrderedDict([(address, cluster)]))  # a put replaces the entity cluster of the address
+    logging.info(f"Queued entity cluster for {address} for dynamoDB write.")
 
 # put in item alerts per cluster
 # note, given sort key is part of the key, alerts with different hashes will result in different entries
 # whereas alerts with the same hash will be overwritten
+# writes are buffered by the dynamo_writer and flushed in batches; read_alerts merges the pending items
 def put_alert(alert_event: forta_agent.alert_event.AlertEvent, cluster: str):
     global CHAIN_ID
     global BOT_VERSION
@@ -311,7 +327,7 @@ def put_alert(alert_event: forta_agent.alert_event.AlertEvent, cluster: str):
     
     expiresAt = int(alert_created_at) + int(expiry_offset)
     logging.debug(f"expiresAt: {expiresAt}")
-    response = dynamo.put_item(Item={
+    dynamo_writer.put_item({
         "itemId": itemId,
         "sortKey": sortId,
         "botId": alert_event.alert.source.bot.id,
@@ -320,133 +336,144 @@ def put_alert(alert_event: forta_agent.alert_event.AlertEvent, cluster: str):
         "cluster": cluster,
         "expiresAt": expiresAt
     })
+    # write-through, so the read of the cluster that follows is served from the cache; a put of the same alert again overwrites it
+    alert_item = (alert_event.alert.source.bot.id, alert_event.alert.alert_id, alert_event.alert_hash)
+    ALERTS_CACHE.update(itemId, lambda alert_items: alert_items.append(alert_item) if alert_item not in alert_items else None)
+    logging.info(f"Queued alert {alert_event.alert_hash} for dynamoDB write.")
 
-    if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
-        logging.error(f"Error putting alert in dynamoDB: {response}")
-        Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo.put_item HTTPStatusCode {response["ResponseMetadata"]["HTTPStatusCode"]}', "agent.put_alert", ""))
-        return
-    else:
-        logging.info(f"Successfully put alert in dynamoDB: {response}")
-        return
-
-
-
-def read_entity_clusters(address: str) -> OrderedDict:
-    global CHAIN_ID
-
-    entity_clusters = OrderedDict()
-    itemId = f"{item_id_prefix}|{CHAIN_ID}|entity_cluster|{address}"
-    logging.debug(f"Reading entity clusters for address {address} from itemId {itemId}")
-    logging.debug(f"Dynamo : {dynamo}")
-    response = dynamo.query(KeyConditionExpression='itemId = :id',
-                            ExpressionAttributeValues={
-                                ':id': itemId
-                            }
-                            )
-
-    # Print retrieved item
-    items = response.get('Items', [])
-    logging.debug(f"Items retrieved: {len(items)}")
-    for item in items:
-        logging.debug(f"Item retrieved: {item}")
-        entity_clusters[address] = item["cluster"]
-    logging.info(f"Read entity clusters for address {address}. Retrieved {len(entity_clusters)} alert_clusters.")
-    return entity_clusters
 
-def read_alerts(cluster: str) -> list:
-    global CHAIN_ID
-    global BOT_VERSION
 
-    logging.debug(f"Reading alerts for cluster {cluster}")
-    alert_items = []
-    itemId = f"{item_id_prefix}|{CHAIN_ID}|alert|{cluster}"
-    logging.debug(f"Reading alerts for cluster {cluster} from itemId {itemId}")
+def query_items(item_ids: list) -> list:
     logging.debug(f"Dynamo : {dynamo}")
-    response = dynamo.query(KeyConditionExpression='itemId = :id',
-                            ExpressionAttributeValues={
-                                ':id': itemId
-                            }
-                            )
-
-    # Print retrieved item
-    items = response.get('Items', [])
-    logging.debug(f"Items retrieved: {len(items)}")
-    for item in items:
-        logging.debug(f"Item retrieved: {item}")
-        alert_items.append((item["botId"], item["alertId"], item["alertHash"]))
-
-    logging.info(f"{BOT_VERSION}: Read alerts for cluster {cluster}. Retrieved {len(alert_items)} alerts.")
-    return alert_items
-
-# alerts are tuples of (botId, alertId, alertHash)
-def build_feature_vector(alerts: list, cluster: str) -> pd.DataFrame: 
-    global BOT_VERSION
-
-    df_feature_vector = pd.DataFrame(columns=MODEL_FEATURES)
-    df_feature_vector.loc[0] = np.zeros(len(MODEL_FEATURES))
-
-    # create dataframe out of list of alert tuples
-    df_alerts_all = pd.DataFrame(alerts, columns=['bot_id', 'alert_id', 'alert_hash'])
-    df_alerts_all.drop_duplicates(inplace=True)
-    df_alerts_all['cluster'] = cluster
-    df_alerts_all['alert_hash'] = 1
 
+    def query(itemId: str, table=None) -> list:
+        logging.debug(f"Reading items from itemId {itemId}")
+        if table is None:
+            table = dynamo_read_tables.get() if dynamo_read_tables is not None else dynamo
+        response = table.query(KeyConditionExpression='itemId = :id',
+                                ExpressionAttributeValues={
+                                    ':id': itemId
+                                }
+                                )
+        return response.get('Items', [])
 
-    grouped = df_alerts_all.groupby(['cluster', 'bot_id', 'alert_id'])['alert_hash'].sum().reset_index()
-    pivoted = pd.pivot_table(grouped, values='alert_id', index = 'cluster', columns=['bot_id', 'alert_id'], aggfunc='sum')
-    pivoted.columns = [f'{col[0]}_{col[1]}' for col in pivoted.columns]
-    pivoted.fillna(0, inplace=True)
+    if len(item_ids) <= 1:
+        return [query(itemId, dynamo) for itemId in item_ids]
 
+    # items of different itemIds live in different partitions, so the queries are issued in parallel
+    return list(DYNAMO_READ_EXECUTOR.map(query, item_ids))
 
-    bot_count_features = set()
-    for column in pivoted.columns:
-        if column in MODEL_FEATURES:
-            bot_count_features.add(column[0:66])
+def read_entity_clusters(address: str) -> OrderedDict:
+    return read_entity_clusters_batch([address])[address]
 
-    for bot_count_feature in bot_count_features:
-        pivoted[bot_count_feature + '_count'] = 0
-        pivoted[bot_count_feature + '_uniqalertid_count'] = 0
+def read_entity_clusters_batch(addresses: list) -> dict:
+    global CHAIN_ID
 
-    for index, row in pivoted.iterrows():
-        bot_id_unique_alert_ids = {}
-        for column in pivoted.columns:
-            if column[0:66] in bot_count_features and column[0:66] + '_count' not in column and column in MODEL_FEATURES:
-                count = row[column]
-                pivoted.loc[index, column[0:66] + '_count'] += count
+    entity_clusters_by_address = dict()  # address -> entity clusters
+    item_ids = dict()  # address -> itemId of the addresses that arent cached
+    for address in addresses:
+        itemId = f"{item_id_prefix}|{CHAIN_ID}|entity_cluster|{address}"
+        cached_entity_clusters = ENTITY_CLUSTERS_CACHE.get(itemId)
+        if cached_entity_clusters is not None:
+            logging.info(f"Read entity clusters for address {address} from cache. Retrieved {len(cached_entity_clusters)} alert_clusters.")
+            entity_clusters_by_address[address] = OrderedDict(cached_entity_clusters)
+        else:
+            item_ids[address] = itemId
 
-                #increment unique alert id count if count > 0
-                if column[0:66] not in bot_id_unique_alert_ids:
-                    bot_id_unique_alert_ids[column[0:66]] = 0
+    for (address, itemId), items in zip(item_ids.items(), query_items(list(item_ids.values()))):
+        items.extend(dynamo_writer.pending_items(itemId))  # read your own writes that have not been flushed yet
+        logging.debug(f"Items retrieved: {len(items)}")
+        entity_clusters = OrderedDict()
+        for item in items:
+            logging.debug(f"Item retrieved: {item}")
+            entity_clusters[address] = item["cluster"]
+        ENTITY_CLUSTERS_CACHE.put(itemId, OrderedDict(entity_clusters))
+        entity_clusters_by_address[address] = entity_clusters
+        logging.info(f"Read entity clusters for address {address}. Retrieved {len(entity_clusters)} alert_clusters.")
 
-                if count > 0 and "_count" not in column:
-                    bot_id_unique_alert_ids[column[0:66]] += 1
+    return entity_clusters_by_address
 
+def read_alerts(cluster: str) -> list:
+    return read_alerts_batch([cluster])[cluster]
 
-        for column in pivoted.columns:
-            if "_uniqalertid_count" in column:
-                pivoted.loc[index, column] = bot_id_unique_alert_ids[column[0:66]]
+def read_alerts_batch(clusters: list) -> dict:
+    global CHAIN_ID
+    global BOT_VERSION
 
+    alerts_by_cluster = dict()  # cluster -> list of alert tuples
+    item_ids = dict()  # cluster -> itemId of the clusters that arent cached
+    for cluster in clusters:
+        itemId = f"{item_id_prefix}|{CHAIN_ID}|alert|{cluster}"
+        cached_alert_items = ALERTS_CACHE.get(itemId)
+        if cached_alert_items is not None:
+            logging.info(f"{BOT_VERSION}: Read alerts for cluster {cluster} from cache. Retrieved {len(cached_alert_items)} alerts.")
+            alerts_by_cluster[cluster] = list(cached_alert_items)
+        else:
+            item_ids[cluster] = itemId
+
+    for (cluster, itemId), stored_items in zip(item_ids.items(), query_items(list(item_ids.values()))):
+        # pending items overwrite the stored ones with the same sort key, same as the flushed put would
+        items = OrderedDict((item["sortKey"], item) for item in stored_items)
+        for item in dynamo_writer.pending_items(itemId):  # read your own writes that have not been flushed yet
+            items[item["sortKey"]] = item
+        logging.debug(f"Items retrieved: {len(items)}")
+        alert_items = []
+        for item in items.values():
+            logging.debug(f"Item retrieved: {item}")
+            alert_items.append((item["botId"], item["alertId"], item["alertHash"]))
+        ALERTS_CACHE.put(itemId, list(alert_items))
+        alerts_by_cluster[cluster] = alert_items
+        logging.info(f"{BOT_VERSION}: Read alerts for cluster {cluster}. Retrieved {len(alert_items)} alerts.")
+
+    return alerts_by_cluster
 
-    for column in pivoted.columns:
-        df_feature_vector.loc[0, column] = pivoted.loc[cluster, column]
+# alerts are tuples of (botId, alertId, alertHash)
+def build_feature_vector(alerts: list, cluster: str) -> pd.DataFrame: 
+    global FEATURE_VECTOR_BUILDER
 
-    df_feature_vector = df_feature_vector.sort_index(axis=1) #sort columns alphabetically
+    feature_vector = FEATURE_VECTOR_BUILDER.build(alerts)
+    logging.debug(f"Built feature vector for cluster {cluster} from {len(alerts)} alerts.")
+    return FEATURE_VECTOR_BUILDER.to_dataframe(feature_vector)
 
-    for column in df_feature_vector.columns:
-        if column not in MODEL_FEATURES:
-            logging.warning(f"Feature {column} not in model features. Dropping.")
-            df_feature_vector.drop(columns=[column], inplace=True)
+def compile_model(model) -> TreeEnsembleScorer:
+    global FEATURE_VECTOR_BUILDER
+    global BOT_VERSION
 
-    return df_feature_vector
+    try:
+        start_time = time.time()
+        scorer = TreeEnsembleScorer(model)
+
+        # random sparse alert counts in addition to the empty vector
+        rng = np.random.default_rng(MODEL_SCORER_CHECK_SEED)
+        shape = (MODEL_SCORER_CHECK_SAMPLE_SIZE, len(FEATURE_VECTOR_BUILDER.columns))
+        feature_vectors = rng.integers(1, 5, shape) * (rng.random(shape) < 0.1)
+        feature_vectors[0] = 0
+        if not scorer.equivalent_to(model, FEATURE_VECTOR_BUILDER.to_dataframe(feature_vectors.astype(np.float64))):
+            raise Exception("compiled model scores differ from predict_proba")
+
+        logging.info(f"{BOT_VERSION}: Compiled model into {len(scorer.feature)} nodes across {scorer.n_trees} trees; verified on {MODEL_SCORER_CHECK_SAMPLE_SIZE} vectors. Took {time.time() - start_time} seconds.")
+        return scorer
+    except Exception as e:
+        logging.warning(f"{BOT_VERSION}: Unable to compile model, falling back to predict_proba: {e}")
+        Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.compile_model", traceback.format_exc()))
+        return None
 
 def get_model_score(df_feature_vector: pd.DataFrame) -> float:
     global MODEL
+    global MODEL_SCORER
     global BOT_VERSION
 
     logging.debug(f"Feature vector: {df_feature_vector.loc[0]}")
-    predictions_proba = MODEL.predict_proba(df_feature_vector)[:, 1]
+    return get_model_scores(df_feature_vector)[0]
+
+# scores all rows of the feature vector matrix in a single model call
+def get_model_scores(df_feature_vectors: pd.DataFrame) -> np.ndarray:
+    global MODEL
+    global MODEL_SCORER
 
-    return predictions_proba[0]
+    if MODEL_SCORER is not None:
+        return MODEL_SCORER.predict_proba(df_feature_vectors.values)[:, 1]
+    return MODEL.predict_proba(df_feature_vectors)[:, 1]
 
 
 def already_alerted(entity: str, alert_id: str, logic = ""):
@@ -465,10 +492,7 @@ def already_alerted(entity: str, alert_id: str, logic = ""):
     elif logic == "manual_metamask":
         alerted_entities = ALERTED_ENTITIES_MANUAL_METAMASK   
     
-    if entity in alerted_entities.keys():
-        if (logic+alert_id) in alerted_entities[entity]:
-            return True
-    return False
+    return alerted_entities.contains(entity, logic+alert_id)
 
 def get_scam_detector_alert_ids(alert_list: list) -> set:
     global BASE_BOTS
@@ -492,11 +516,16 @@ def emit_ml_finding(w3, alert_event: forta_agent.alert_event.AlertEvent) -> list
     global BASE_BOTS
     global CHAIN_ID
     global BOT_VERSION
+    global FEATURE_VECTOR_BUILDER
 
     start_time = time.time()
 
     scammer_addresses_dict = BaseBotParser.get_scammer_addresses(w3, alert_event)
     logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got base bot alert (combination); extracted {len(scammer_addresses_dict.keys())} scammer addresses. Processing took {time.time() - start_time} seconds.")
+
+    # the addresses are processed in phases, so the dynamo reads and the model evaluation happen once for all addresses of the alert
+    # 1. gather the clusters and their alerts
+    scammer_addresses = []
     for scammer_address in scammer_addresses_dict.keys():
         scammer_address_lower = scammer_address.lower()
 
@@ -504,12 +533,17 @@ def emit_ml_finding(w3, alert_event: forta_agent.alert_event.AlertEvent) -> list
         if Utils.is_in_fp_mitigation_list(scammer_address_lower):
             logging.info(f"Skipped alert for {scammer_address_lower} as it is in the manual FP list.")
             continue
-
-        scammer_contract_addresses = scammer_addresses_dict[scammer_address]['scammer-contracts'] if 'scammer-contracts' in scammer_addresses_dict[scammer_address] else set()
         logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got scammer address {scammer_address_lower}")
+        scammer_addresses.append(scammer_address)
+
+    entity_clusters = read_entity_clusters_batch(list({scammer_address.lower() for scammer_address in scammer_addresses}))
+    logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - read clusters for {len(entity_clusters)} scammer addresses. Processing took {time.time() - start_time} seconds.")
+
+    candidates = []  # (scammer_address, cluster)
+    for scammer_address in scammer_addresses:
+        scammer_address_lower = scammer_address.lower()
         cluster = scammer_address_lower
-        entity_cluster = read_entity_clusters(scammer_address_lower)
-        logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - read {len(entity_cluster.keys())} clusters for scammer address {scammer_address_lower}. Processing took {time.time() - start_time} seconds.")
+        entity_cluster = entity_clusters[scammer_address_lower]
         if scammer_address_lower in entity_cluster.keys():
             cluster = entity_cluster[scammer_address_lower]
         logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got alert for cluster {cluster}")
@@ -521,16 +555,30 @@ def emit_ml_finding(w3, alert_event: forta_agent.alert_event.AlertEvent) -> list
 
         put_alert(alert_event, cluster)
         logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - put alert into dynamo for cluster {cluster}. Processing took {time.time() - start_time} seconds.")
+        candidates.append((scammer_address, cluster))
+
+    if len(candidates) == 0:
+        logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - return total findings: {len(findings)}. Processing took {time.time() - start_time} seconds.")
+        return findings
+
+    # get all alerts from dynamo for the clusters
+    alert_lists = read_alerts_batch(list({cluster for _, cluster in candidates}))  # cluster -> list of tuple of (botId, alertId, alertHash)
+    logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got alerts from dynamo for {len(alert_lists)} clusters. Processing took {time.time() - start_time} seconds.")
 
-        # get all alerts from dynamo for the cluster
-        alert_list = read_alerts(cluster)  # list of tuple of (botId, alertId, alertHash)
-        logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got {len(alert_list)} alerts from dynamo for cluster {cluster}. Processing took {time.time() - start_time} seconds.")
+    # 2. build the feature vectors of all clusters into one matrix
+    feature_vectors = FEATURE_VECTOR_BUILDER.to_dataframe(np.vstack([FEATURE_VECTOR_BUILDER.build(alert_lists[cluster]) for _, cluster in candidates]))
 
+    # 3. assess based on ML model
+    scores = get_model_scores(feature_vectors)
+    logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - scored {len(candidates)} clusters. Processing took {time.time() - start_time} seconds.")
 
-        # assess based on ML model
-        feature_vector = build_feature_vector(alert_list, cluster)
-        score = get_model_score(feature_vector)
-        logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got score {score} for cluster {cluster}. Processing took {time.time() - start_time} seconds.")
+    for i, (scammer_address, cluster) in enumerate(candidates):
+        scammer_address_lower = scammer_address.lower()
+        scammer_contract_addresses = scammer_addresses_dict[scammer_address]['scammer-contracts'] if 'scammer-contracts' in scammer_addresses_dict[scammer_address] else set()
+        alert_list = alert_lists[cluster]
+        feature_vector = feature_vectors.iloc[[i]].reset_index(drop=True)
+        score = scores[i]
+        logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got score {score} for cluster {cluster} based on {len(alert_list)} alerts.")
         model_threshold = MODEL_ALERT_THRESHOLD_LOOSE if (Utils.is_beta() or Utils.is_beta_alt()) else MODEL_ALERT_THRESHOLD_STRICT
         logging.info(f"{BOT_VERSION}: model threshold {model_threshold}.")
         if score>model_threshold:
@@ -550,7 +598,7 @@ def emit_ml_finding(w3, alert_event: forta_agent.alert_event.AlertEvent) -> list
                 else:
                     metadata = scammer_addresses_dict[scammer_address]
                     findings.append(ScamDetectorFinding.scam_finding(block_chain_indexer, forta_explorer, scammer_address_lower, created_at_datetime, created_at_datetime, scammer_contract_addresses, alert_event.alert.addresses, unique_alertIds, alert_id, unique_alertHashes, metadata, CHAIN_ID, "ml", score, feature_vector))
-                    update_list(ALERTED_ENTITIES_ML, ALERTED_ENTITIES_ML_QUEUE_SIZE, cluster, alert_id, "ALERTED_ENTITIES_ML", "ml")
+                    update_list(ALERTED_ENTITIES_ML, cluster, alert_id, "ALERTED_ENTITIES_ML", "ml")
                 
                 logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - cluster {cluster} added to findings. Findings size: {len(findings)}")
 
@@ -601,7 +649,7 @@ def emit_passthrough_finding(w3, alert_event: forta_agent.alert_event.AlertEvent
         metadata = scammer_addresses_dict[scammer_address]
         findings.append(ScamDetectorFinding.scam_finding(block_chain_indexer, forta_explorer, scammer_address_lower, created_at_datetime, created_at_datetime, scammer_contract_addresses, alert_event.alert.addresses, {alert_event.alert_id}, alert_id, {alert_event.alert_hash}, metadata, CHAIN_ID, "passthrough"))
         logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - cluster {cluster} added to findings. Findings size: {len(findings)}")
-        update_list(ALERTED_ENTITIES_PASSTHROUGH, ALERTED_ENTITIES_PASSTHROUGH_QUEUE_SIZE, cluster, alert_id, "ALERTED_ENTITIES_PASSTHROUGH", "passthrough")
+        update_list(ALERTED_ENTITIES_PASSTHROUGH, cluster, alert_id, "ALERTED_ENTITIES_PASSTHROUGH", "passthrough")
 
     scammer_urls_dict = BaseBotParser.get_scammer_urls(w3, alert_event)
     logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - got base bot alert (passthrough); extracted {len(scammer_urls_dict.keys())} scammer urls.")
@@ -623,7 +671,7 @@ def emit_passthrough_finding(w3, alert_event: forta_agent.alert_event.AlertEvent
             metadata = scammer_urls_dict[scammer_url]
             findings.append(ScamDetectorFinding.scam_finding(block_chain_indexer, forta_explorer, "", created_at_datetime, created_at_datetime, set(), alert_event.alert.addresses, {alert_event.alert_id}, alert_id, {alert_event.alert_hash}, metadata, -1, "passthrough"))
             logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - url {scammer_url} added to findings. Findings size: {len(findings)}")
-            update_list(ALERTED_ENTITIES_PASSTHROUGH, ALERTED_ENTITIES_PASSTHROUGH_QUEUE_SIZE, scammer_url, alert_id, "ALERTED_ENTITIES_PASSTHROUGH", "passthrough")
+            update_list(ALERTED_ENTITIES_PASSTHROUGH, scammer_url, alert_id, "ALERTED_ENTITIES_PASSTHROUGH", "passthrough")
 
 
 
@@ -655,7 +703,7 @@ def emit_contract_similarity_finding(w3, alert_event: forta_agent.alert_event.Al
                 
                 if not already_alerted(scammer_address_lower, "SCAM-DETECTOR-SIMILAR-CONTRACT", "similar_contract"):
                     logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - address {scammer_address_lower}; emitting finding")
-                    update_list(ALERTED_ENTITIES_SIMILAR_CONTRACT, ALERTED_ENTITIES_SIMILAR_CONTRACT_QUEUE_SIZE, scammer_address_lower, "SCAM-DETECTOR-SIMILAR-CONTRACT", "ALERTED_ENTITIES_SIMILAR_CONTRACT", "similar_contract")
+                    update_list(ALERTED_ENTITIES_SIMILAR_CONTRACT, scammer_address_lower, "SCAM-DETECTOR-SIMILAR-CONTRACT", "ALERTED_ENTITIES_SIMILAR_CONTRACT", "similar_contract")
                     finding = ScamDetectorFinding.alert_similar_contract(block_chain_indexer, forta_explorer, alert_event.alert.alert_id, alert_event.alert_hash, alert_event.alert.metadata, CHAIN_ID)
                     if(finding is not None):
                         findings.append(finding)
@@ -691,7 +739,7 @@ def emit_eoa_association_finding(w3, alert_event: forta_agent.alert_event.AlertE
             logging.info(f"{BOT_VERSION}: alert {alert_event.alert_hash} {alert_event.bot_id} {alert_event.alert.alert_id} - model confidence {model_confidence} is above threshold {EOA_ASSOCIATION_BOT_THRESHOLDS[0]}")
             if not Utils.is_fp(w3, scammer_address_lower, CHAIN_ID, FINDINGS_CACHE_ALERT):
                 if not already_alerted(scammer_address_lower, "SCAM-DETECTOR-SCAMMER-ASSOCIATION", "scammer_association"):
-                    update_list(ALERTED_ENTITIES_SCAMMER_ASSOCIATION, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_QUEUE_SIZE, scammer_address_lower, "SCAM-DETECTOR-SCAMMER-ASSOCIATION", "ALERTED_ENTITIES_SCAMMER_ASSOCIATION", "scammer_association")
+                    update_list(ALERTED_ENTITIES_SCAMMER_ASSOCIATION, scammer_address_lower, "SCAM-DETECTOR-SCAMMER-ASSOCIATION", "ALERTED_ENTITIES_SCAMMER_ASSOCIATION", "scammer_association")
                     #"central_node":"0x13549e22de184a881fe3d164612ef15f99f6d4b3",
                     # "central_node_alert_hash":"0xbda39ad1c0a53555587a8bc9c9f711f0cad81fe89ef235a6d79ee905bc70526c",
                     # "central_node_alert_id":"SCAM-DETECTOR-ICE-PHISHING",
@@ -738,7 +786,7 @@ def emit_metamask_finding(w3, test = False) -> list:
                 
                 if not already_alerted(url, alert_id, "manual_metamask"):
                     logging.info(f"Manual finding: Emitting metamask finding for {url}")
-                    update_list(ALERTED_ENTITIES_MANUAL_METAMASK, ALERTED_ENTITIES_MANUAL_METAMASK_QUEUE_SIZE, url, alert_id, "ALERTED_ENTITIES_MANUAL_METAMASK", "manual_metamask")
+                    update_list(ALERTED_ENTITIES_MANUAL_METAMASK, url, alert_id, "ALERTED_ENTITIES_MANUAL_METAMASK", "manual_metamask")
                     finding = ScamDetectorFinding.scam_finding_manual(block_chain_indexer, forta_explorer, "Url", url, "Metamask phishing", "Metamask (https://github.com/MetaMask/eth-phishing-detect/)", "", "", INITIAL_METAMASK_LIST_CONSUMPTION)
                     if finding is not None:
                         findings.append(finding)
@@ -812,7 +860,7 @@ def emit_manual_finding(w3, test = False) -> list:
                         account = "" if 'nan' in str(row["Account"]) else row['Account']
                         comment = "" if 'nan' in str(row["Comment"]) else row['Comment']
                         attribution = "" if 'nan' in str(row["Attribution"]) else row['Attribution']
-                        update_list(ALERTED_ENTITIES_MANUAL, ALERTED_ENTITIES_MANUAL_QUEUE_SIZE, cluster, alert_id, "ALERTED_ENTITIES_MANUAL", "manual")
+                        update_list(ALERTED_ENTITIES_MANUAL, cluster, alert_id, "ALERTED_ENTITIES_MANUAL", "manual")
                         finding = ScamDetectorFinding.scam_finding_manual(block_chain_indexer, forta_explorer, entity_type, cluster, threat_category, account + " " + tweet, chain_id, comment, False, attribution)
                         if finding is not None:
                             findings.append(finding)
@@ -832,7 +880,7 @@ def emit_manual_finding(w3, test = False) -> list:
                         account = "" if 'nan' in str(row["Account"]) else row['Account']
                         comment = "" if 'nan' in str(row["Comment"]) else row['Comment']
                         attribution = "" if 'nan' in str(row["Attribution"]) else row['Attribution']
-                        update_list(ALERTED_ENTITIES_MANUAL, ALERTED_ENTITIES_MANUAL_QUEUE_SIZE, url_lower, alert_id, "ALERTED_ENTITIES_MANUAL", "manual")
+                        update_list(ALERTED_ENTITIES_MANUAL, url_lower, alert_id, "ALERTED_ENTITIES_MANUAL", "manual")
                         finding = ScamDetectorFinding.scam_finding_manual(block_chain_indexer, forta_explorer, entity_type, url_lower, threat_category, account + " " + tweet, chain_id, comment, False, attribution)
                         if finding is not None:
                             findings.append(finding)
@@ -970,7 +1018,7 @@ def emit_new_fp_finding(w3) -> list:
                     continue
                 cluster = row['address'].lower().strip()
                 if cluster not in ALERTED_FP_CLUSTERS.keys():
-                    update_list(ALERTED_FP_CLUSTERS, ALERTED_FP_CLUSTERS_QUEUE_SIZE, cluster, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
+                    update_list(ALERTED_FP_CLUSTERS, cluster, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
                     for address in cluster.split(','):
                         if scammer_association_labels is None:
                             scammer_association_labels = get_scammer_association_labels(w3, forta_explorer)
@@ -979,7 +1027,7 @@ def emit_new_fp_finding(w3) -> list:
                         
                         for (entity, label, metadata, unique_key) in obtain_all_fp_labels(w3, address, block_chain_indexer, forta_explorer, similar_contract_labels, scammer_association_labels, CHAIN_ID):
                             logging.info(f"{BOT_VERSION}: Emitting FP mitigation finding for {entity} {label}")
-                            update_list(ALERTED_FP_CLUSTERS, ALERTED_FP_CLUSTERS_QUEUE_SIZE, entity, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
+                            update_list(ALERTED_FP_CLUSTERS, entity, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
                             findings.append(ScamDetectorFinding.alert_FP(w3, entity, label, metadata, [unique_key]))
                             logging.info(f"{BOT_VERSION}: Findings count {len(findings)}")
             except Exception as e:
@@ -1042,12 +1090,12 @@ def update_reactive_likely_fps(w3, current_date) -> list:
             for label in labels:
                 if not label.remove:
                     # There may be multiple labels for the same scammer entity, due to different label metadata
-                    entity, metadata, unique_key = label.entity, label.metadata, label.unique_key
+                    entity, metadata, unique_key = label.entity.lower(), label.metadata, label.unique_key
                     if entity not in REACTIVE_LIKELY_FPS:
                        REACTIVE_LIKELY_FPS[entity] = ([metadata], [unique_key])
-                    else:
-                        REACTIVE_LIKELY_FPS[entity][0].append(metadata)  # Append to the metadata list
-                        REACTIVE_LIKELY_FPS[entity][1].append(unique_key)  # Append to the unique key list
+                    elif unique_key not in REACTIVE_LIKELY_FPS[entity][1]:
+                        # replaced rather than appended to, so the change is persisted by the delta log
+                        REACTIVE_LIKELY_FPS[entity] = (REACTIVE_LIKELY_FPS[entity][0] + [metadata], REACTIVE_LIKELY_FPS[entity][1] + [unique_key])
         end = time.time()
         logging.info(f"{BOT_VERSION}: update reactive likely fps (REACTIVE_LIKELY_FPS count): {len(REACTIVE_LIKELY_FPS)}")
         logging.info(f"{BOT_VERSION}: update reactive likely fps (processing took): {end - start} seconds")
@@ -1059,28 +1107,37 @@ def update_reactive_likely_fps(w3, current_date) -> list:
                 SIMILAR_CONTRACT_LABELS = None
                 SCAMMER_ASSOCIATION_LABELS = None
 
-            address = next(iter(REACTIVE_LIKELY_FPS), None)
-            logging.info(f"{BOT_VERSION}: Processing address: {address}")
-            if Utils.is_fp(w3, address, CHAIN_ID):
-                logging.info(f"{BOT_VERSION}: {address} is an FP. Emitting FP finding.")
-                update_list(ALERTED_FP_CLUSTERS, ALERTED_FP_CLUSTERS_QUEUE_SIZE, address, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
-                metadata_array, unique_keys_array = REACTIVE_LIKELY_FPS[address]
-                findings.append(ScamDetectorFinding.alert_FP(w3, address, "scammer", metadata_array, unique_keys_array))
-                if SCAMMER_ASSOCIATION_LABELS is None:
-                        SCAMMER_ASSOCIATION_LABELS = get_scammer_association_labels(w3, forta_explorer)
-                if SIMILAR_CONTRACT_LABELS is None:
-                    SIMILAR_CONTRACT_LABELS = get_similar_contract_labels(w3, forta_explorer)
-                for (entity, label, metadata, unique_key) in obtain_all_fp_labels(w3, address, block_chain_indexer, forta_explorer, SIMILAR_CONTRACT_LABELS, SCAMMER_ASSOCIATION_LABELS, CHAIN_ID):
-                        logging.info(f"{BOT_VERSION}: Processing entity: {entity} - {label}")
-                        if entity != address:
-                            logging.info(f"{BOT_VERSION}: Emitting FP mitigation finding for {entity} {label}")
-                            update_list(ALERTED_FP_CLUSTERS, ALERTED_FP_CLUSTERS_QUEUE_SIZE, entity, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
-                            findings.append(ScamDetectorFinding.alert_FP(w3, entity, label, metadata, [unique_key]))
-                            if entity in REACTIVE_LIKELY_FPS:
-                                del REACTIVE_LIKELY_FPS[entity]                            
-            
-            del REACTIVE_LIKELY_FPS[address]
-            logging.info(f"{BOT_VERSION}: {len(REACTIVE_LIKELY_FPS)} likely FPs yet to be processed")
+            # the FP checks (etherscan labels, tx count, deployed contracts) of a batch run concurrently; the FP findings are emitted here,
+            # as obtaining the labels to remove updates ALERTED_FP_CLUSTERS
+            start = time.time()
+            verdicts = REACTIVE_LIKELY_FPS_WORKER.run(iter(REACTIVE_LIKELY_FPS), len(REACTIVE_LIKELY_FPS), w3)
+            for address, is_fp in verdicts.items():
+                if address not in REACTIVE_LIKELY_FPS:
+                    continue  # removed as part of the labels of an FP emitted before
+                if is_fp is None:
+                    continue  # the check raised; kept to be checked again on a later block
+                if is_fp:
+                    if len(findings) > 0 and time.time() - start > REACTIVE_LIKELY_FPS_TIME_BUDGET_IN_SECONDS:
+                        break  # emitted on a later block; the verdict is cached by then
+                    logging.info(f"{BOT_VERSION}: {address} is an FP. Emitting FP finding.")
+                    update_list(ALERTED_FP_CLUSTERS, address, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
+                    metadata_array, unique_keys_array = REACTIVE_LIKELY_FPS[address]
+                    findings.append(ScamDetectorFinding.alert_FP(w3, address, "scammer", metadata_array, unique_keys_array))
+                    if SCAMMER_ASSOCIATION_LABELS is None:
+                            SCAMMER_ASSOCIATION_LABELS = get_scammer_association_labels(w3, forta_explorer)
+                    if SIMILAR_CONTRACT_LABELS is None:
+                        SIMILAR_CONTRACT_LABELS = get_similar_contract_labels(w3, forta_explorer)
+                    for (entity, label, metadata, unique_key) in obtain_all_fp_labels(w3, address, block_chain_indexer, forta_explorer, SIMILAR_CONTRACT_LABELS, SCAMMER_ASSOCIATION_LABELS, CHAIN_ID):
+                            logging.info(f"{BOT_VERSION}: Processing entity: {entity} - {label}")
+                            if entity != address:
+                                logging.info(f"{BOT_VERSION}: Emitting FP mitigation finding for {entity} {label}")
+                                update_list(ALERTED_FP_CLUSTERS, entity, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
+                                findings.append(ScamDetectorFinding.alert_FP(w3, entity, label, metadata, [unique_key]))
+                                if entity in REACTIVE_LIKELY_FPS:
+                                    del REACTIVE_LIKELY_FPS[entity]
+
+                del REACTIVE_LIKELY_FPS[address]
+            logging.info(f"{BOT_VERSION}: {len(REACTIVE_LIKELY_FPS)} likely FPs yet to be processed. Reactive likely fps worker stats: {REACTIVE_LIKELY_FPS_WORKER.stats()}")
    
     return findings
 
@@ -1203,7 +1260,7 @@ def obtain_all_fp_labels(w3, starting_address: str, block_chain_indexer, forta_e
                         
 
         processed.add(address)
-        update_list(ALERTED_FP_CLUSTERS, ALERTED_FP_CLUSTERS_QUEUE_SIZE, address, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
+        update_list(ALERTED_FP_CLUSTERS, address, "SCAM-DETECTOR-FALSE-POSITIVE", "ALERTED_FP_CLUSTERS")
 
     return fp_labels
 
@@ -1224,7 +1281,7 @@ def get_original_threat_category_alert_hash(address: str) -> (tuple):
 
 
 def detect_scammer_contract_creation(w3, transaction_event: forta_agent.transaction_event.TransactionEvent) -> list:
-    global DF_CONTRACT_SIGNATURES
+    global CONTRACT_SIGNATURES
     global ALERTED_ENTITIES_MANUAL
     global ALERTED_ENTITIES_MANUAL_QUEUE_SIZE
     findings = []
@@ -1239,25 +1296,24 @@ def detect_scammer_contract_creation(w3, transaction_event: forta_agent.transact
                 findings.append(ScamDetectorFinding.scammer_contract_deployment(transaction_event.from_, created_contract_address.lower(), original_threat_category, original_alert_hash, CHAIN_ID, []))
 
             code = Utils.get_code(w3, created_contract_address)
-            for index, row in DF_CONTRACT_SIGNATURES.iterrows():
+            row = CONTRACT_SIGNATURES.match(code)
+            if row is not None:
                 code_regex = row["Entity"]
-                if re.search(code_regex, code):
-                    logging.info(row['Threat category'])
-                    logging.info(f"{BOT_VERSION}: {transaction_event.from_} created contract {created_contract_address} matches {code_regex}")
-                    threat_category = "unknown" if 'nan' in str(row["Threat category"]) else row['Threat category']
-                    alert_id_threat_category = threat_category.upper().replace(" ", "-")
-                    alert_id = "SCAM-DETECTOR-MANUAL-"+alert_id_threat_category
-                    if not already_alerted(transaction_event.from_, alert_id, "manual"):
-                        tweet = "" if 'nan' in str(row["Tweet"]) else row['Tweet']
-                        account = "" if 'nan' in str(row["Account"]) else row['Account']
-                        comment = "" if 'nan' in str(row["Comment"]) else row['Comment']
-                        attribution = "" if 'nan' in str(row["Attribution"]) else row['Attribution']
-                        update_list(ALERTED_ENTITIES_MANUAL, ALERTED_ENTITIES_MANUAL_QUEUE_SIZE, transaction_event.from_, alert_id, "manual", "ALERTED_ENTITIES_MANUAL")
-                        finding = ScamDetectorFinding.scam_finding_manual(block_chain_indexer, forta_explorer, "Address", transaction_event.from_, threat_category, account + " " + tweet, CHAIN_ID, comment, False, attribution)
-                        if finding is not None:
-                            logging.info(f"Manual finding: Emitting manual finding for {transaction_event.from_}")
-                            findings.append(finding)
-                    break
+                logging.info(row['Threat category'])
+                logging.info(f"{BOT_VERSION}: {transaction_event.from_} created contract {created_contract_address} matches {code_regex}")
+                threat_category = "unknown" if 'nan' in str(row["Threat category"]) else row['Threat category']
+                alert_id_threat_category = threat_category.upper().replace(" ", "-")
+                alert_id = "SCAM-DETECTOR-MANUAL-"+alert_id_threat_category
+                if not already_alerted(transaction_event.from_, alert_id, "manual"):
+                    tweet = "" if 'nan' in str(row["Tweet"]) else row['Tweet']
+                    account = "" if 'nan' in str(row["Account"]) else row['Account']
+                    comment = "" if 'nan' in str(row["Comment"]) else row['Comment']
+                    attribution = "" if 'nan' in str(row["Attribution"]) else row['Attribution']
+                    update_list(ALERTED_ENTITIES_MANUAL, transaction_event.from_, alert_id, "manual", "ALERTED_ENTITIES_MANUAL")
+                    finding = ScamDetectorFinding.scam_finding_manual(block_chain_indexer, forta_explorer, "Address", transaction_event.from_, threat_category, account + " " + tweet, CHAIN_ID, comment, False, attribution)
+                    if finding is not None:
+                        logging.info(f"Manual finding: Emitting manual finding for {transaction_event.from_}")
+                        findings.append(finding)
         elif len(transaction_event.traces) > 0:
             for trace in transaction_event.traces:
                 if trace.type == "create" and trace.error is None:
@@ -1299,19 +1355,26 @@ def detect_scammer_contract_creation(w3, transaction_event: forta_agent.transact
 
 def clear_state():
     # delete cache file
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_ML_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_ENTITIES_MANUAL_METAMASK_KEY)
-    L2Cache.remove(CHAIN_ID, ALERTED_FP_CLUSTERS_KEY)
-    L2Cache.remove(CHAIN_ID, FINDINGS_CACHE_BLOCK_KEY)
-    L2Cache.remove(CHAIN_ID, FINDINGS_CACHE_ALERT_KEY)
-    L2Cache.remove(CHAIN_ID, FINDINGS_CACHE_TRANSACTION_KEY)
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_ML_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_ENTITIES_MANUAL_METAMASK_KEY).remove()
+    get_delta_log(CHAIN_ID, ALERTED_FP_CLUSTERS_KEY).remove()
+    get_delta_log(CHAIN_ID, FINDINGS_CACHE_BLOCK_KEY).remove()
+    get_delta_log(CHAIN_ID, FINDINGS_CACHE_ALERT_KEY).remove()
+    get_delta_log(CHAIN_ID, FINDINGS_CACHE_TRANSACTION_KEY).remove()
+    get_delta_log(CHAIN_ID, REACTIVE_LIKELY_FPS_KEY).remove()
+    DELTA_LOGS.clear()
+    L2Cache.remove(CHAIN_ID, ETHERSCAN_LABEL_SNAPSHOT_KEY)
+    BlockChainIndexer.LABEL_SNAPSHOT = None
     
     Utils.FP_MITIGATION_ADDRESSES = set()
+    Utils.FP_VERDICT_CACHE.clear()
     Utils.CONTRACT_CACHE = OrderedDict()
+    ENTITY_CLUSTERS_CACHE.clear()
+    ALERTS_CACHE.clear()
     Utils.IS_BETA_ALT = None
     Utils.IS_BETA = None
 
@@ -1347,33 +1410,59 @@ def persist_state():
     global FINDINGS_CACHE_TRANSACTION
     global FINDINGS_CACHE_TRANSACTION_KEY
 
+    global REACTIVE_LIKELY_FPS
+
     global CHAIN_ID
 
     start = time.time()
-    persist(ALERTED_ENTITIES_ML, CHAIN_ID, ALERTED_ENTITIES_ML_KEY)
-    persist(ALERTED_ENTITIES_PASSTHROUGH, CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY)
-    persist(ALERTED_ENTITIES_SCAMMER_ASSOCIATION, CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY)
-    persist(ALERTED_ENTITIES_SIMILAR_CONTRACT, CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY)
-    persist(ALERTED_ENTITIES_MANUAL, CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY)
-    persist(ALERTED_FP_CLUSTERS, CHAIN_ID, ALERTED_FP_CLUSTERS_KEY)
+    if dynamo_writer is not None:
+        dynamo_writer.flush()  # the buffered alerts and entity clusters become visible to other shards and survive a restart
+    persist(ALERTED_ENTITIES_ML.entities, CHAIN_ID, ALERTED_ENTITIES_ML_KEY)
+    persist(ALERTED_ENTITIES_PASSTHROUGH.entities, CHAIN_ID, ALERTED_ENTITIES_PASSTHROUGH_KEY)
+    persist(ALERTED_ENTITIES_SCAMMER_ASSOCIATION.entities, CHAIN_ID, ALERTED_ENTITIES_SCAMMER_ASSOCIATION_KEY)
+    persist(ALERTED_ENTITIES_SIMILAR_CONTRACT.entities, CHAIN_ID, ALERTED_ENTITIES_SIMILAR_CONTRACT_KEY)
+    persist(ALERTED_ENTITIES_MANUAL.entities, CHAIN_ID, ALERTED_ENTITIES_MANUAL_KEY)
+    persist(ALERTED_FP_CLUSTERS.entities, CHAIN_ID, ALERTED_FP_CLUSTERS_KEY)
     persist(FINDINGS_CACHE_BLOCK, CHAIN_ID, FINDINGS_CACHE_BLOCK_KEY)
     persist(FINDINGS_CACHE_ALERT, CHAIN_ID, FINDINGS_CACHE_ALERT_KEY)
     persist(FINDINGS_CACHE_TRANSACTION, CHAIN_ID, FINDINGS_CACHE_TRANSACTION_KEY)
+    persist(REACTIVE_LIKELY_FPS, CHAIN_ID, REACTIVE_LIKELY_FPS_KEY)
 
     if CHAIN_ID == 1 and len(ALERTED_ENTITIES_MANUAL_METAMASK.keys()) > 0:
         ALERTED_ENTITIES_MANUAL_METAMASK_LIST = list(ALERTED_ENTITIES_MANUAL_METAMASK.keys())
         persist(ALERTED_ENTITIES_MANUAL_METAMASK_LIST, CHAIN_ID, ALERTED_ENTITIES_MANUAL_METAMASK_KEY)
 
+    label_snapshot = BlockChainIndexer.get_label_snapshot()
+    label_snapshot_version = label_snapshot.version
+    if label_snapshot_version != label_snapshot.persisted_version and L2Cache.write(label_snapshot, CHAIN_ID, ETHERSCAN_LABEL_SNAPSHOT_KEY) > 0:
+        label_snapshot.persisted_version = label_snapshot_version
+
     end = time.time()
-    logging.info(f"Persisted bot state. took {end - start} seconds")
+    logging.info(f"Persisted bot state. took {end - start} seconds. Persisted sizes: { {key: delta_log.size() for key, delta_log in DELTA_LOGS.items()} }")
+    logging.info(f"Entity clusters cache stats: {ENTITY_CLUSTERS_CACHE.stats()}. Alerts cache stats: {ALERTS_CACHE.stats()}")
+    logging.info(f"FP verdict cache stats: {Utils.FP_VERDICT_CACHE.stats()}. Etherscan label snapshot stats: {BlockChainIndexer.get_label_snapshot().stats()}")
+    logging.info(f"Findings cache stats: { {findings_cache.name: findings_cache.stats() for findings_cache in [FINDINGS_CACHE_BLOCK, FINDINGS_CACHE_ALERT, FINDINGS_CACHE_TRANSACTION]} }")
+    logging.info(f"Reactive likely fps worker stats: {REACTIVE_LIKELY_FPS_WORKER.stats()}")
 
 
+def get_delta_log(chain_id: int, key: str) -> DeltaLog:
+    global DELTA_LOGS
+
+    if key not in DELTA_LOGS:
+        DELTA_LOGS[key] = DeltaLog(chain_id, key)
+    return DELTA_LOGS[key]
+
+
+# only the changes since the last persist are written; see DeltaLog
 def persist(obj: object, chain_id: int, key: str):
-    L2Cache.write(obj, chain_id, key)
+    get_delta_log(chain_id, key).write(obj)
 
 
 def load(chain_id: int, key: str) -> object:
-    return L2Cache.load(chain_id, key)
+    global DELTA_LOGS
+
+    DELTA_LOGS[key] = DeltaLog(chain_id, key)
+    return DELTA_LOGS[key].load()
 
 
 def parse_datetime_with_high_precision(time_str):
@@ -1439,10 +1528,9 @@ def provide_handle_alert(w3):
             persist_state()
             logging.info(f"{BOT_VERSION}: Persisted state")
        
-        for finding in FINDINGS_CACHE_ALERT[0:10]:  # 10 findings per handle alert due to size limitation
+        for finding in FINDINGS_CACHE_ALERT.drain(10):  # 10 findings per handle alert due to size limitation
             if finding is not None:
                 findings.append(finding)
-        FINDINGS_CACHE_ALERT = FINDINGS_CACHE_ALERT[10:]
 
         logging.info(f"{BOT_VERSION}: Return {len(findings)} finding(s) to handleAlert.") 
 
@@ -1480,6 +1568,9 @@ def provide_handle_block(w3):
         dt = datetime.fromtimestamp(timestamp, tz=utc_timezone)    
         logging.info(f"{BOT_VERSION}: handle block called with block timestamp {dt}")
         
+        if dynamo_writer is not None and dynamo_writer.is_expired():
+            dynamo_writer.flush()
+
         if Utils.is_beta() or Utils.is_beta_alt():
             logging.info(f"{BOT_VERSION}: Handle block called. Adding {Utils.ERROR_CACHE.len()} error findings.")
             findings.extend(Utils.ERROR_CACHE.get_all())
@@ -1491,11 +1582,11 @@ def provide_handle_block(w3):
             logging.info(f"{BOT_VERSION}: Added {len(manual_findings)} manual findings.")
             FINDINGS_CACHE_BLOCK.extend(manual_findings)
 
-            global DF_CONTRACT_SIGNATURES
+            global CONTRACT_SIGNATURES
             try:
                 df_manual_list = Utils.get_manual_list()
-                DF_CONTRACT_SIGNATURES = df_manual_list[df_manual_list['EntityType']=='Code']
-                logging.info(f"{BOT_VERSION}: Loaded {len(DF_CONTRACT_SIGNATURES)} contract signatures.")
+                CONTRACT_SIGNATURES = SignatureMatcher(df_manual_list[df_manual_list['EntityType']=='Code'])
+                logging.info(f"{BOT_VERSION}: Loaded {len(CONTRACT_SIGNATURES)} contract signatures.")
             except BaseException as e:
                 logging.warning(f"{BOT_VERSION}: Failed to load contract signatures.")
                 Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.handle_block", traceback.format_exc()))
@@ -1526,10 +1617,9 @@ def provide_handle_block(w3):
         reactive_fp_findings = update_reactive_likely_fps(w3, dt) 
         FINDINGS_CACHE_BLOCK.extend(reactive_fp_findings)
 
-        for finding in FINDINGS_CACHE_BLOCK[0:25]:  # 25 findings per block due to size limitation
+        for finding in FINDINGS_CACHE_BLOCK.drain(25):  # 25 findings per block due to size limitation
             if finding is not None:
                 findings.append(finding)
-        FINDINGS_CACHE_BLOCK = FINDINGS_CACHE_BLOCK[25:]
 
         logging.info(f"{BOT_VERSION}: Return {len(findings)} to handleBlock. FINDINGS_CACHE_BLOCK size: {len(FINDINGS_CACHE_BLOCK)}")
 
@@ -1576,10 +1666,9 @@ def provide_handle_transaction(w3):
 
         logging.debug(f"{BOT_VERSION}: Handle transaction on the hour was called. Findings cache for transaction size now: {len(FINDINGS_CACHE_TRANSACTION)}")
             
-        for finding in FINDINGS_CACHE_TRANSACTION[0:10]:  # 10 findings per block due to size limitation
+        for finding in FINDINGS_CACHE_TRANSACTION.drain(10):  # 10 findings per block due to size limitation
             if finding is not None:
                 findings.append(finding)
-        FINDINGS_CACHE_TRANSACTION = FINDINGS_CACHE_TRANSACTION[10:]
 
         logging.debug(f"{BOT_VERSION}: Return {len(findings)} to handleTransaction.")
 
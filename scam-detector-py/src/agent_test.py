@@ -906,6 +906,20 @@ class TestScamDetector:
         assert ("0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH-2", "0xabc") in alerts, "should be in alerts"
 
 
+    def test_read_alerts_batch(self):
+        agent.initialize()
+        agent.item_id_prefix = "test_" + str(random.randint(0, 1000000))
+
+        alert = TestScamDetector.generate_alert("0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH-1", timestamp=1679508064)
+        agent.put_alert(alert, EOA_ADDRESS_SMALL_TX)
+        agent.put_alert(alert, EOA_ADDRESS_LARGE_TX)
+
+        alerts = agent.read_alerts_batch([EOA_ADDRESS_SMALL_TX, EOA_ADDRESS_LARGE_TX, CONTRACT])
+        assert len(alerts) == 3, "should have an entry for each cluster"
+        assert alerts[EOA_ADDRESS_SMALL_TX] == [("0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH-1", "0xabc")]
+        assert alerts[EOA_ADDRESS_LARGE_TX] == [("0xa91a31df513afff32b9d85a2c2b7e786fdd681b3cdd8d93d6074943ba31ae400", "FUNDING-TORNADO-CASH-1", "0xabc")]
+        assert alerts[CONTRACT] == [], "should have no alerts"
+
     def test_scammer_contract_deployment(self):
         agent.clear_state()
         agent.initialize()
@@ -0,0 +1,80 @@
+import sys
+from collections import OrderedDict
+
+
+class AlertedEntityStore:
+    """
+    bounded, insertion ordered store of the entities (clusters, urls, ...) that have been alerted on; entity -> set of logic+alert_id
+    the oldest entities are evicted once the store holds more than max_size entities or its estimated pickled size exceeds size_limit
+    the size is maintained on every add/evict; the alert ids are interned, so pickle stores each distinct alert id once and refers to it afterwards
+    """
+
+    # pickle opcode bytes as measured for protocol 4
+    ENTITY_OVERHEAD = 8  # entity string and its (empty) set
+    STRING_OVERHEAD = 8  # first occurrence of an alert id
+    REFERENCE_SIZE = 5  # each further occurrence of an alert id (memo lookup)
+
+    def __init__(self, max_size: int, size_limit: int, entities: dict = None):
+        self.max_size = max_size
+        self.size_limit = size_limit
+        self.entities = OrderedDict()  # entity -> set of logic+alert_id; this is what is persisted
+        self.value_counts = dict()  # logic+alert_id -> number of entities it is stored for
+        self.size = 0
+
+        if entities is not None:
+            for entity, values in entities.items():
+                for value in values:
+                    self.add(entity, value)
+
+    def __contains__(self, entity: str) -> bool:
+        return entity in self.entities
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def keys(self):
+        return self.entities.keys()
+
+    def values(self):
+        return self.entities.values()
+
+    def contains(self, entity: str, value: str) -> bool:
+        values = self.entities.get(entity)
+        return values is not None and value in values
+
+    def add(self, entity: str, value: str) -> int:
+        """adds the value to the entity; returns the number of entities evicted due to the size limit"""
+        values = self.entities.get(entity)
+        if values is None:
+            values = set()
+            self.entities[entity] = values
+            self.size += len(entity) + AlertedEntityStore.ENTITY_OVERHEAD
+        elif value in values:
+            return 0
+
+        value = sys.intern(value)
+        values.add(value)
+        count = self.value_counts.get(value, 0)
+        self.value_counts[value] = count + 1
+        self.size += AlertedEntityStore.REFERENCE_SIZE if count > 0 else len(value) + AlertedEntityStore.STRING_OVERHEAD
+
+        while len(self.entities) > self.max_size:
+            self.evict()
+
+        evicted = 0
+        while len(self.entities) > 0 and self.size > self.size_limit:
+            self.evict()
+            evicted += 1
+        return evicted
+
+    def evict(self):
+        entity, values = self.entities.popitem(last=False)
+        self.size -= len(entity) + AlertedEntityStore.ENTITY_OVERHEAD
+        for value in values:
+            count = self.value_counts[value] - 1
+            if count == 0:
+                del self.value_counts[value]
+                self.size -= len(value) + AlertedEntityStore.STRING_OVERHEAD
+            else:
+                self.value_counts[value] = count
+                self.size -= AlertedEntityStore.REFERENCE_SIZE
@@ -0,0 +1,57 @@
+import pickle
+import random
+from collections import OrderedDict
+
+from alerted_entity_store import AlertedEntityStore
+
+
+class TestAlertedEntityStore:
+
+    @staticmethod
+    def random_address(rnd: random.Random) -> str:
+        return "0x" + "".join(rnd.choice("0123456789abcdef") for _ in range(40))
+
+    def test_add_contains(self):
+        store = AlertedEntityStore(10, 1024 * 1024)
+        store.add("0x1", "mlSCAM-DETECTOR-ICE-PHISHING")
+        assert "0x1" in store
+        assert store.contains("0x1", "mlSCAM-DETECTOR-ICE-PHISHING")
+        assert not store.contains("0x1", "mlSCAM-DETECTOR-ADDRESS-POISONER")
+        assert not store.contains("0x2", "mlSCAM-DETECTOR-ICE-PHISHING")
+
+    def test_fifo_eviction(self):
+        store = AlertedEntityStore(2, 1024 * 1024)
+        store.add("0x1", "ml1")
+        store.add("0x2", "ml1")
+        store.add("0x1", "ml2")  # doesnt change the order
+        assert store.add("0x3", "ml1") == 0, "evictions due to max size should not be reported"
+        assert list(store.keys()) == ["0x2", "0x3"]
+        assert store.value_counts["ml1"] == 2, "evicted values should no longer be counted"
+        assert "ml2" not in store.value_counts
+
+    def test_size_estimate(self):
+        rnd = random.Random(7)
+        alert_ids = ["mlSCAM-DETECTOR-ICE-PHISHING", "mlSCAM-DETECTOR-ADDRESS-POISONER", "mlSCAM-DETECTOR-FRAUDULENT-NFT-ORDER"]
+        store = AlertedEntityStore(5000, 1024 * 1024 * 1024)
+        for _ in range(10000):
+            store.add(TestAlertedEntityStore.random_address(rnd), rnd.choice(alert_ids))  # evicts the first 5000 entities
+
+        persisted_size = len(pickle.dumps(store.entities))
+        assert persisted_size <= store.size <= persisted_size * 1.2, "estimate should be an upper bound close to the pickled size"
+
+    def test_size_limit(self):
+        store = AlertedEntityStore(1000, 500)
+        evicted = 0
+        for i in range(100):
+            evicted += store.add(f"0x{i:040x}", "mlSCAM-DETECTOR-ICE-PHISHING")
+        assert evicted > 0, "should evict due to size"
+        assert store.size <= 500
+        assert len(pickle.dumps(store.entities)) <= 500
+        assert f"0x{99:040x}" in store, "should keep the most recent entity"
+
+    def test_load(self):
+        entities = OrderedDict([("0x1", {"ml1", "ml2"}), ("0x2", {"ml1"})])
+        store = AlertedEntityStore(10, 1024 * 1024, entities)
+        assert store.entities == entities
+        assert list(store.keys()) == ["0x1", "0x2"]
+        assert store.value_counts == {"ml1": 2, "ml2": 1}
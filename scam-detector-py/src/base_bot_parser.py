@@ -5,10 +5,33 @@ import pandas as pd
 from forta_agent import EntityType
 
 
+URL_REGEX = re.compile(r"(?:(?:https?|ftp)://)?[\w\-]+(?:\.[\w\-]+)+[\w\-\.,@?^=%&:/~\+#]*[\w\-\@?^=%&/~\+#]")
+ADDRESS_REGEX = re.compile(r"0x[a-fA-F0-9]{40}")
+
+
 class BaseBotParser:
 
     BASEBOT_PARSING_CONFIG_DF = pd.read_csv('basebot_parsing_config.csv')
+    CONFIG_BY_BOT_ID = None  # bot_id -> parsing config rows (as dicts) in file order; built on first use
+    CONFIG_BY_ALERT = dict()  # (bot_id, alert_id, type) -> parsing config rows that apply to the alert
 
+    @staticmethod
+    def get_config_rows(alert_event: forta_agent.alert_event.AlertEvent, type: str) -> list:
+        """
+        returns the parsing config rows of the given type that apply to the alert, in file order
+        a row applies if its alert_id is part of the alert id of the alert, so the matching rows are resolved once per alert id and then looked up
+        """
+        key = (alert_event.bot_id, alert_event.alert_id, type)
+        rows = BaseBotParser.CONFIG_BY_ALERT.get(key)
+        if rows is None:
+            if BaseBotParser.CONFIG_BY_BOT_ID is None:
+                config_by_bot_id = dict()
+                for row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.to_dict('records'):
+                    config_by_bot_id.setdefault(row['bot_id'], []).append(row)
+                BaseBotParser.CONFIG_BY_BOT_ID = config_by_bot_id
+            rows = [row for row in BaseBotParser.CONFIG_BY_BOT_ID.get(alert_event.bot_id, []) if row['alert_id'] in alert_event.alert_id and row['type'] == type]
+            BaseBotParser.CONFIG_BY_ALERT[key] = rows
+        return rows
 
     @staticmethod
     def collect_all_metadata(alert_event: forta_agent.alert_event.AlertEvent) -> dict:
@@ -23,33 +46,31 @@ class BaseBotParser:
         scammer_urls = dict()
        
                     
-        for index, row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.iterrows():
+        for row in BaseBotParser.get_config_rows(alert_event, 'url'):
             #  bot_id,alert_id,location,attacker_address_location_in_description,metadata_field,address_information
             #  address information is to further differentiate one type of address vs the other from the same bot alert (e.g. address-poisioning vs address-posioner)
 
-            if row['bot_id'] == alert_event.bot_id and row['alert_id'] in alert_event.alert_id and row["type"] == 'url':
-                if row['location'] == 'description':
-                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    description = alert_event.alert.description.lower()
-                    loc = int(row["attacker_address_location_in_description"])
+            if row['location'] == 'description':
+                metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                description = alert_event.alert.description.lower()
+                metadata_obj["address_information"] = row["address_information"]
+                for url in URL_REGEX.findall(description):
                     metadata_obj["address_information"] = row["address_information"]
-                    for url in re.findall(r"(?:(?:https?|ftp)://)?[\w\-]+(?:\.[\w\-]+)+[\w\-\.,@?^=%&:/~\+#]*[\w\-\@?^=%&/~\+#]", description):
+                    scammer_urls[url.lower()] = metadata_obj
+            elif row['location'] == 'label':
+                metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                label_name = row['metadata_field']
+                for label in alert_event.alert.labels:
+                    if label.label == label_name and label.entity_type == EntityType.Address:
                         metadata_obj["address_information"] = row["address_information"]
-                        scammer_urls[url.lower()] = metadata_obj
-                elif row['location'] == 'label':
+                        scammer_urls[label.entity] = metadata_obj
+            elif row['location'] == 'metadata':
+                if row['metadata_field'] in alert_event.alert.metadata.keys():
                     metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    label_name = row['metadata_field']
-                    for label in alert_event.alert.labels:
-                        if label.label == label_name and label.entity_type == EntityType.Address:
-                            metadata_obj["address_information"] = row["address_information"]
-                            scammer_urls[label.entity] = metadata_obj
-                elif row['location'] == 'metadata':
-                    if row['metadata_field'] in alert_event.alert.metadata.keys():
-                        metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                        metadata = metadata_obj[row["metadata_field"]]
-                        for url in re.findall(r"(?:(?:https?|ftp)://)?[\w\-]+(?:\.[\w\-]+)+[\w\-\.,@?^=%&:/~\+#]*[\w\-\@?^=%&/~\+#]", metadata):
-                            metadata_obj["address_information"] = row["address_information"]
-                            scammer_urls[url.lower()] = metadata_obj
+                    metadata = metadata_obj[row["metadata_field"]]
+                    for url in URL_REGEX.findall(metadata):
+                        metadata_obj["address_information"] = row["address_information"]
+                        scammer_urls[url.lower()] = metadata_obj
             
         return scammer_urls
     
@@ -57,43 +78,48 @@ class BaseBotParser:
     @staticmethod
     def get_scammer_addresses(w3, alert_event: forta_agent.alert_event.AlertEvent) -> dict:
         scammer_addresses = dict() #address -> findings metadata union labels metadata
+        scammer_contracts = None  # parsed on first use, once per alert
        
+        def get_scammer_contracts() -> set:
+            nonlocal scammer_contracts
+            if scammer_contracts is None:
+                scammer_contracts = BaseBotParser.get_scammer_contract_addresses(w3, alert_event)
+            return set(scammer_contracts)
                     
-        for index, row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.iterrows():
+        for row in BaseBotParser.get_config_rows(alert_event, 'eoa'):
             #  bot_id,alert_id,location,attacker_address_location_in_description,metadata_field,address_information
             #  address information is to further differentiate one type of address vs the other from the same bot alert (e.g. address-poisioning vs address-posioner)
 
             #  contract address is also parsed where applicable and added as 'scammer-contracts' set in the metadata 
 
-            if row['bot_id'] == alert_event.bot_id and row['alert_id'] in alert_event.alert_id and row["type"] == 'eoa':
-                if row['location'] == 'description':
-                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    description = alert_event.alert.description.lower()
-                    loc = int(row["attacker_address_location_in_description"])
-                    metadata_obj["address_information"] = row["address_information"]
-                    metadata_obj["scammer-contracts"] = BaseBotParser.get_scammer_contract_addresses(w3, alert_event)
-                    scammer_addresses[description[loc:42+loc]] = metadata_obj
-                elif row['location'] == 'label':
-                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    label_name = row['metadata_field']
-                    for label in alert_event.alert.labels:
-                        if label.label == label_name and label.entity_type == EntityType.Address:
-                            metadata_obj["address_information"] = row["address_information"]
-                            metadata_obj["scammer-contracts"] = BaseBotParser.get_scammer_contract_addresses(w3, alert_event)
-                            scammer_addresses[label.entity] = metadata_obj
-                elif row['location'] == 'metadata':
-                    if row['metadata_field'] in alert_event.alert.metadata.keys():
-                        metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                        metadata = metadata_obj[row["metadata_field"]]
-                        for address in re.findall(r"0x[a-fA-F0-9]{40}", metadata):
-                            metadata_obj["address_information"] = row["address_information"]
-                            metadata_obj["scammer-contracts"] = BaseBotParser.get_scammer_contract_addresses(w3, alert_event)
-                            scammer_addresses[address.lower()] = metadata_obj
-                elif row['location'] == 'tx_to':
+            if row['location'] == 'description':
+                metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                description = alert_event.alert.description.lower()
+                loc = int(row["attacker_address_location_in_description"])
+                metadata_obj["address_information"] = row["address_information"]
+                metadata_obj["scammer-contracts"] = get_scammer_contracts()
+                scammer_addresses[description[loc:42+loc]] = metadata_obj
+            elif row['location'] == 'label':
+                metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                label_name = row['metadata_field']
+                for label in alert_event.alert.labels:
+                    if label.label == label_name and label.entity_type == EntityType.Address:
+                        metadata_obj["address_information"] = row["address_information"]
+                        metadata_obj["scammer-contracts"] = get_scammer_contracts()
+                        scammer_addresses[label.entity] = metadata_obj
+            elif row['location'] == 'metadata':
+                if row['metadata_field'] in alert_event.alert.metadata.keys():
                     metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    metadata_obj["address_information"] = row["address_information"]
-                    metadata_obj["scammer-contracts"] = BaseBotParser.get_scammer_contract_addresses(w3, alert_event)
-                    scammer_addresses[w3.eth.get_transaction(alert_event.transaction_hash)['to'].lower()] = metadata_obj
+                    metadata = metadata_obj[row["metadata_field"]]
+                    for address in ADDRESS_REGEX.findall(metadata):
+                        metadata_obj["address_information"] = row["address_information"]
+                        metadata_obj["scammer-contracts"] = get_scammer_contracts()
+                        scammer_addresses[address.lower()] = metadata_obj
+            elif row['location'] == 'tx_to':
+                metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                metadata_obj["address_information"] = row["address_information"]
+                metadata_obj["scammer-contracts"] = get_scammer_contracts()
+                scammer_addresses[w3.eth.get_transaction(alert_event.transaction_hash)['to'].lower()] = metadata_obj
             
         return scammer_addresses
     
@@ -101,27 +127,23 @@ class BaseBotParser:
     def get_scammer_contract_addresses(w3, alert_event: forta_agent.alert_event.AlertEvent) -> set:
         scammer_contract_addresses = set()
 
-        for index, row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.iterrows():
-            if row['bot_id'] == alert_event.bot_id and row['alert_id'] in alert_event.alert_id and row["type"] == 'contract':
-                if row['location'] == 'description':
-                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    description = alert_event.alert.description.lower()
-                    loc = int(row["attacker_address_location_in_description"])
-                    scammer_contract_addresses.add(description[loc:42+loc])
-                elif row['location'] == 'label':
-                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    label_name = row['metadata_field']
-                    for label in alert_event.alert.labels:
-                        if label.label == label_name and label.entity_type == EntityType.Address:
-                            scammer_contract_addresses.add(label.entity)
-                elif row['location'] == 'metadata':
-                    if row['metadata_field'] in alert_event.alert.metadata.keys():
-                        metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                        metadata = metadata_obj[row["metadata_field"]]
-                        for address in re.findall(r"0x[a-fA-F0-9]{40}", metadata):
-                            scammer_contract_addresses.add(address.lower())
-                elif row['location'] == 'tx_to':
+        for row in BaseBotParser.get_config_rows(alert_event, 'contract'):
+            if row['location'] == 'description':
+                description = alert_event.alert.description.lower()
+                loc = int(row["attacker_address_location_in_description"])
+                scammer_contract_addresses.add(description[loc:42+loc])
+            elif row['location'] == 'label':
+                label_name = row['metadata_field']
+                for label in alert_event.alert.labels:
+                    if label.label == label_name and label.entity_type == EntityType.Address:
+                        scammer_contract_addresses.add(label.entity)
+            elif row['location'] == 'metadata':
+                if row['metadata_field'] in alert_event.alert.metadata.keys():
                     metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
-                    scammer_contract_addresses.add(w3.eth.get_transaction(alert_event.transaction_hash)['to'].lower())
+                    metadata = metadata_obj[row["metadata_field"]]
+                    for address in ADDRESS_REGEX.findall(metadata):
+                        scammer_contract_addresses.add(address.lower())
+            elif row['location'] == 'tx_to':
+                scammer_contract_addresses.add(w3.eth.get_transaction(alert_event.transaction_hash)['to'].lower())
 
         return scammer_contract_addresses
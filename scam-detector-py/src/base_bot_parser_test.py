@@ -1,3 +1,7 @@
+import re
+import time
+from unittest.mock import patch
+
 from forta_agent import create_alert_event,FindingSeverity, AlertEvent, Label, EntityType
 from web3_mock import Web3Mock
 
@@ -214,3 +218,87 @@ class TestBaseBotParser:
 
         contract_addresses = BaseBotParser.get_scammer_contract_addresses(w3,alert_event)
         assert "0x00000fb3146cd2eac390ea73acc83f80d6020000" in contract_addresses, "this should be the contract address"
+
+    def test_get_scammer_addresses_same_as_config_scan(self):
+        for alert_event in TestBaseBotParser.recorded_alerts():
+            assert TestBaseBotParser.summarize(BaseBotParser.get_scammer_addresses(w3, alert_event)) == TestBaseBotParser.summarize(TestBaseBotParser.scan_get_scammer_addresses(w3, alert_event))
+
+    def test_get_scammer_addresses_benchmark(self):
+        alert_events = TestBaseBotParser.recorded_alerts() * 5
+        start = time.perf_counter()
+        expected = [TestBaseBotParser.summarize(TestBaseBotParser.scan_get_scammer_addresses(w3, alert_event)) for alert_event in alert_events]
+        scan_elapsed = time.perf_counter() - start
+
+        BaseBotParser.CONFIG_BY_BOT_ID = None
+        BaseBotParser.CONFIG_BY_ALERT = dict()
+        config_df = BaseBotParser.BASEBOT_PARSING_CONFIG_DF
+        with patch.object(config_df, "to_dict", wraps=config_df.to_dict) as to_dict, patch.object(config_df, "iterrows", side_effect=AssertionError("should not scan the config")):
+            start = time.perf_counter()
+            addresses = [TestBaseBotParser.summarize(BaseBotParser.get_scammer_addresses(w3, alert_event)) for alert_event in alert_events]
+            elapsed = time.perf_counter() - start
+
+        print(f"scanning parser: {len(alert_events) / scan_elapsed:.0f} alerts/sec; indexed parser (including indexing the config): {len(alert_events) / elapsed:.0f} alerts/sec; speedup {scan_elapsed / elapsed:.1f}x")
+        assert addresses == expected
+        assert elapsed < scan_elapsed, "the indexed parser should parse faster than scanning the config"
+        assert to_dict.call_count == 1, "the config should be indexed once"
+        distinct_alerts = {(alert_event.bot_id, alert_event.alert_id) for alert_event in alert_events}
+        assert {(bot_id, alert_id) for bot_id, alert_id, _ in BaseBotParser.CONFIG_BY_ALERT.keys()} == distinct_alerts, "the rows of an alert should be resolved once per alert id"
+        assert sum(len(rows) for rows in BaseBotParser.CONFIG_BY_ALERT.values()) < len(config_df) / 5, "parsing an alert should only touch its own config rows"
+
+    def recorded_alerts() -> list:
+        return [
+            TestBaseBotParser.generate_alert("0xc608f1aff80657091ad14d974ea37607f6e7513fdb8afaa148b3bff5ba305c15", "HARD-RUG-PULL-1", "description", {"attacker_deployer_address":"0xe75512aa3bec8f00434bbd6ad8b0a3fbff100ad6","rugpull_techniques":"HIDDENFEEMODIFIERS, HIDDENTRANSFERREVERTS","token_contract_address":"0x58089C1E2d5A4c5332F777A8698E8AA9A140159B"}),
+            TestBaseBotParser.generate_alert("0x98b87a29ecb6c8c0f8e6ea83598817ec91e01c15d379f03c7ff781fd1141e502", "ADDRESS-POISONING", "description", {"attackerAddresses":"0x1a1c0eda425a77fcf7ef4ba6ff1a5bf85e4fc168,0x55d398326f99059ff775485246999027b3197955","phishingContract":"0x81ff66ef2097c8c699bff5b7edcf849eb4f452ce","phishingEoa":"0xf6eb5da5850a1602d3d759395480179624cffe2c"}),
+            TestBaseBotParser.generate_alert("0x15e9b3cd277d3be1fcfd5e23d61b3496026d8c3d9c98ef47a48e37b3c216ab9f", "nft-phishing-sale", "description", {"toAddr": "0xBF96d79074b269F75c20BD9fa6DAed0773209EE7","fromAddr": "0x08395C15C21DC3534B1C3b1D4FA5264E5Bd7020C","initiator": "0xaefc35de05da370f121998b0e2e95698841de9b1"}),
+            TestBaseBotParser.generate_alert("0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14", "ICE-PHISHING-SCAM-APPROVAL", "Scam address 0xFB4d3EB37bDe8FA4B52c60AAbE55B3Cd9908EC73 got approval for 0x402E727AB6B0a8dcE41E74C4Bf385cEd14B6E80c's assets"),
+            TestBaseBotParser.generate_alert("0x9ba66b24eb2113ca3217c5e02ac6671182247c354327b27f645abb7c8a3e4534", "Ice-phishing", "description", {"test": "foo"}, [{"entity": "0x2ed12fb3146cd2eac390ea73acc83f80d6020b03","entityType": "ADDRESS","label": "phish","metadata": {"drainer-name": "Inferno Drainer"},"confidence": 1}]),
+            TestBaseBotParser.generate_alert("0x715c40c11a3e24f3f21c3e2db1c109bba358ccfcbceada84ee1e0f4dba4410e7", "GAS-ANOMALOUS-LARGE-CONSUMPTION", "Suspicious function with anomalous gas detected: 14246778", {"contractAddress":"\"0xe3e1147acd39687a25ca7716227c604500f5c31a\"","deployer":"\"0xdfb44e29fdf01adb886fbf9bc1521f79253b3176\""}),
+            TestBaseBotParser.generate_alert("0x0000000000000000000000000000000000000000000000000000000000000000", "UNKNOWN-BOT", "description"),
+        ]
+
+    def summarize(addresses: dict) -> dict:
+        return {address: (str(metadata["address_information"]), sorted(metadata["scammer-contracts"])) for address, metadata in addresses.items()}
+
+    def scan_get_scammer_addresses(w3, alert_event: AlertEvent) -> dict:
+        # reference implementation scanning the whole parsing config for every alert, as the parser used to
+        def scan_get_scammer_contract_addresses() -> set:
+            scammer_contract_addresses = set()
+            for index, row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.iterrows():
+                if row['bot_id'] == alert_event.bot_id and row['alert_id'] in alert_event.alert_id and row["type"] == 'contract':
+                    if row['location'] == 'description':
+                        loc = int(row["attacker_address_location_in_description"])
+                        scammer_contract_addresses.add(alert_event.alert.description.lower()[loc:42+loc])
+                    elif row['location'] == 'label':
+                        for label in alert_event.alert.labels:
+                            if label.label == row['metadata_field'] and label.entity_type == EntityType.Address:
+                                scammer_contract_addresses.add(label.entity)
+                    elif row['location'] == 'metadata':
+                        if row['metadata_field'] in alert_event.alert.metadata.keys():
+                            for address in re.findall(r"0x[a-fA-F0-9]{40}", BaseBotParser.collect_all_metadata(alert_event)[row["metadata_field"]]):
+                                scammer_contract_addresses.add(address.lower())
+            return scammer_contract_addresses
+
+        scammer_addresses = dict()
+        for index, row in BaseBotParser.BASEBOT_PARSING_CONFIG_DF.iterrows():
+            if row['bot_id'] == alert_event.bot_id and row['alert_id'] in alert_event.alert_id and row["type"] == 'eoa':
+                if row['location'] == 'description':
+                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                    loc = int(row["attacker_address_location_in_description"])
+                    metadata_obj["address_information"] = row["address_information"]
+                    metadata_obj["scammer-contracts"] = scan_get_scammer_contract_addresses()
+                    scammer_addresses[alert_event.alert.description.lower()[loc:42+loc]] = metadata_obj
+                elif row['location'] == 'label':
+                    metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                    for label in alert_event.alert.labels:
+                        if label.label == row['metadata_field'] and label.entity_type == EntityType.Address:
+                            metadata_obj["address_information"] = row["address_information"]
+                            metadata_obj["scammer-contracts"] = scan_get_scammer_contract_addresses()
+                            scammer_addresses[label.entity] = metadata_obj
+                elif row['location'] == 'metadata':
+                    if row['metadata_field'] in alert_event.alert.metadata.keys():
+                        metadata_obj = BaseBotParser.collect_all_metadata(alert_event)
+                        for address in re.findall(r"0x[a-fA-F0-9]{40}", metadata_obj[row["metadata_field"]]):
+                            metadata_obj["address_information"] = row["address_information"]
+                            metadata_obj["scammer-contracts"] = scan_get_scammer_contract_addresses()
+                            scammer_addresses[address.lower()] = metadata_obj
+        return scammer_addresses
@@ -0,0 +1,80 @@
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class BatchWorker:
+    """
+    works off a queue of pending items a batch per cycle: up to batch_size items are processed concurrently, within time_budget seconds
+    items that are not processed within the budget stay pending; items that already started stay in flight and are collected by a later cycle rather than submitted again
+    keeps the queue depth and the drain rate (items processed per second spent in cycles) as metrics
+    """
+
+    def __init__(self, name: str, process, batch_size: int, time_budget: float, max_workers: int):
+        self.name = name
+        self.process = process  # (item, *args) -> result; called on the worker threads
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.in_flight = dict()  # item -> future of the items that started but didnt finish within the budget of their cycle
+        self.depth = 0
+        self.cycles = 0
+        self.processed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.busy_time = 0.0
+
+    def run(self, pending, depth: int, *args) -> dict:
+        """
+        processes the items still in flight from earlier cycles and the first distinct items of pending (an iterable over the queue of depth items), up to batch_size in total;
+        args are passed on to process
+        returns item -> result of the items processed in time; items whose processing raised are logged and returned with a result of None
+        """
+        start = time.time()
+        deadline = start + self.time_budget
+        self.depth = depth
+
+        batch = list(self.in_flight.keys())
+        for item in pending:
+            if len(batch) >= self.batch_size:
+                break
+            if item not in batch:
+                batch.append(item)
+        for item in batch:
+            if item not in self.in_flight:
+                self.in_flight[item] = self.executor.submit(self.process, item, *args)
+        futures = {self.in_flight[item]: item for item in batch}
+        done, not_done = wait(futures.keys(), timeout=max(0.0, deadline - time.time()))
+        for future in done:
+            del self.in_flight[futures[future]]
+        for future in not_done:
+            if future.cancel():
+                del self.in_flight[futures[future]]  # not started yet; submitted again once it is up in pending
+
+        results = dict()
+        for future in done:
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                logging.warning(f"{self.name}: failed to process {item}: {e} - {traceback.format_exc()}")
+                self.failed += 1
+                results[item] = None
+
+        self.cycles += 1
+        self.processed += len(results)
+        self.timed_out += len(not_done)
+        self.busy_time += time.time() - start
+        return {item: results[item] for item in batch if item in results}
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "cycles": self.cycles,
+            "processed": self.processed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "in_flight": len(self.in_flight),
+            "drain_rate": self.processed / self.busy_time if self.busy_time > 0 else 0.0
+        }
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from batch_worker import BatchWorker
+
+LATENCY = 0.05
+
+
+class TestBatchWorker:
+
+    def test_run_batch_concurrently(self):
+        in_flight = []
+        lock = threading.Lock()
+
+        def process(item, suffix):
+            with lock:
+                in_flight.append(item)
+            time.sleep(LATENCY)
+            return item + suffix
+
+        worker = BatchWorker("test", process, 4, 10, 4)
+        pending = ["a", "b", "a", "c", "d", "e", "f"]
+        start = time.time()
+        results = worker.run(iter(pending), len(pending), "!")
+        elapsed = time.time() - start
+
+        assert results == {"a": "a!", "b": "b!", "c": "c!", "d": "d!"}, "should process the first batch_size distinct items"
+        assert sorted(in_flight) == ["a", "b", "c", "d"]
+        assert elapsed < 4 * LATENCY, "should process the batch concurrently"
+        assert worker.stats()["depth"] == 7
+        assert worker.stats()["processed"] == 4
+
+    def test_time_budget(self):
+        def process(item):
+            time.sleep(0.5 if item == "slow" else 0)
+            return True
+
+        worker = BatchWorker("test", process, 3, 0.1, 3)
+        start = time.time()
+        results = worker.run(["fast", "slow", "fast2"], 3)
+        assert time.time() - start < 0.4, "should not wait beyond the time budget"
+        assert results == {"fast": True, "fast2": True}, "should leave the slow item pending"
+        assert worker.stats()["timed_out"] == 1
+
+    def test_failure(self):
+        def process(item):
+            if item == "b":
+                raise ValueError("boom")
+            return item
+
+        worker = BatchWorker("test", process, 3, 10, 2)
+        assert worker.run(["a", "b", "c"], 3) == {"a": "a", "b": None, "c": "c"}
+        assert worker.stats()["failed"] == 1
+        assert worker.stats()["drain_rate"] > 0
+
+    def test_in_flight_items_are_not_resubmitted(self):
+        release = threading.Event()
+        calls = []
+
+        def process(item):
+            calls.append(item)
+            if item == "slow":
+                release.wait(5)
+            return item
+
+        worker = BatchWorker("test", process, 2, 0.1, 2)
+        assert worker.run(["slow", "fast"], 2) == {"fast": "fast"}
+        assert worker.stats()["in_flight"] == 1
+
+        assert worker.run(["slow", "next"], 2) == {"next": "next"}, "should keep the slow item in flight rather than submit it again"
+        assert sorted(calls) == ["fast", "next", "slow"]
+
+        release.set()
+        assert worker.run(["other"], 1) == {"slow": "slow", "other": "other"}, "should collect the slow item once it finished"
+        assert sorted(calls) == ["fast", "next", "other", "slow"]
+        assert worker.stats()["in_flight"] == 0
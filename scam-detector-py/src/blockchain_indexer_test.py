@@ -1,4 +1,8 @@
+import time
+from unittest.mock import patch
+
 from blockchain_indexer_service import BlockChainIndexer
+from indexer_cache import IndexerCache
 from web3_mock import EOA_ADDRESS_SMALL_TX
 
 class TestBlockChainIndexer:
@@ -35,3 +39,29 @@ class TestBlockChainIndexer:
         labels = BlockChainIndexer.get_etherscan_labels([address])
         assert labels == {'0x1673888242bad06cc87a7bcaff392cb27218b3e3': {'labels': ['Uniswap'], 'nametag': 'Uniswap V3: FORT-USDC'}},"should return one Uniswap label and a nametag"
 
+    def test_get_contracts_concurrent_providers(self):
+        def get_etherscan_contracts(address, chain_id, start_block):
+            time.sleep(0.5)
+            return {"0x1"}, start_block
+
+        def get_zettablock_contracts(address, chain_id):
+            time.sleep(0.5)
+            return {"0x2"}
+
+        BlockChainIndexer.CACHE = IndexerCache(":memory:", 60)
+        try:
+            with patch.object(BlockChainIndexer, "get_etherscan_contracts", side_effect=get_etherscan_contracts), \
+                    patch.object(BlockChainIndexer, "get_zettablock_contracts", side_effect=get_zettablock_contracts):
+                start = time.time()
+                contracts = BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1)
+                assert time.time() - start < 0.9, "providers should be queried concurrently"
+                assert contracts == {"0x1", "0x2"}, "should merge the results of both providers"
+        finally:
+            BlockChainIndexer.CACHE = None
+
+    def test_throttle_per_api_key(self):
+        BlockChainIndexer.throttle('ETHERSCAN_TOKEN')
+        start = time.time()
+        BlockChainIndexer.throttle('ZETTABLOCK')
+        BlockChainIndexer.throttle('POLYGONSCAN_TOKEN')
+        assert time.time() - start < 0.5, "api keys should not wait for each other's rate limit"
@@ -1,8 +1,28 @@
+import os
+
 DEBUG_ALERT_ENABLED = False
 ENABLE_METAMASK_CONSUMPTION = True
 
 ALERT_LOOKBACK_WINDOW_IN_DAYS = 7
 
+DYNAMO_BATCH_WRITE_SIZE = 25  # max number of items BatchWriteItem accepts per request
+DYNAMO_BATCH_WRITE_MAX_AGE_IN_SECONDS = 5  # pending puts older than this are flushed on the next put or block
+DYNAMO_BATCH_WRITE_MAX_RETRIES = 5
+DYNAMO_BATCH_WRITE_BACKOFF_IN_SECONDS = 0.05  # doubled on every retry of unprocessed items
+DYNAMO_BATCH_WRITE_FAILURE_BACKOFF_IN_SECONDS = 60  # after a batch could not be written, flushes are skipped for this long
+DYNAMO_BATCH_WRITE_MAX_PENDING = 10000  # pending puts beyond this (e.g. while dynamo keeps failing) drop the oldest
+
+DYNAMO_READ_CACHE_SIZE = 10000  # entries per reader (entity clusters, alerts)
+DYNAMO_READ_CACHE_TTL_IN_SECONDS = 30  # bounds how long alerts written by other shards can remain unseen
+DYNAMO_READ_MAX_WORKERS = 8  # parallel queries when reading the clusters/alerts of several addresses
+
+PAGINATION_MAX_WORKERS = 4  # parallel requests when paging through alerts/labels
+PAGINATION_RECOVERY_PAGES = 3  # successful pages after which a reduced page size is doubled again
+FETCH_ALERTS_PAGE_SIZE = 1200
+FETCH_ALERTS_MIN_WINDOW_IN_MS = 15 * 60 * 1000  # time ranges are split into sub windows of at least this length, paged in parallel
+FETCH_LABELS_PAGE_SIZE = 1000
+FETCH_LABELS_ENTITY_BATCH_SIZE = 200
+
 ENTITY_CLUSTER_BOTS = [("0xd3061db4662d5b3406b52b20f34234e462d2c275b99414d76dc644e2486be3e9", "ENTITY-CLUSTER")]
 
 CONTRACT_SIMILARITY_BOTS = [("0x3acf759d5e180c05ecabac2dbd11b79a1f07e746121fc3c86910aaace8910560", "NEW-SCAMMER-CONTRACT-CODE-HASH")]
@@ -12,10 +32,20 @@ EOA_ASSOCIATION_BOTS = [("0xcd9988f3d5c993592b61048628c28a7424235794ada5dc80d55e
 EOA_ASSOCIATION_BOT_THRESHOLDS = [0.0]
 
 ENCRYPTED_BOTS = {"0x9ba66b24eb2113ca3217c5e02ac6671182247c354327b27f645abb7c8a3e4534": "BLOCKSEC"}
+DECRYPTION_CACHE_SIZE = 10000  # decrypted findings kept by ciphertext hash, for redelivered alerts
+DECRYPTION_CACHE_TTL_IN_SECONDS = 24 * 60 * 60
 
 FINDINGS_CACHE_BLOCK_KEY = "findings_cache_block_key"
 FINDINGS_CACHE_TRANSACTION_KEY = "findings_cache_transaction_key"
 FINDINGS_CACHE_ALERT_KEY = "findings_cache_alert_key"
+FINDINGS_CACHE_BLOCK_CAPACITY = 5000  # findings waiting to be returned by handle_block; 25 are returned per block
+FINDINGS_CACHE_ALERT_CAPACITY = 5000  # findings waiting to be returned by handle_alert; 10 are returned per alert
+FINDINGS_CACHE_TRANSACTION_CAPACITY = 1000  # findings waiting to be returned by handle_transaction; 10 are returned per transaction
+FINDINGS_CACHE_DROP_POLICY = "drop_oldest"  # drop_oldest or drop_newest once a findings cache is at capacity
+REACTIVE_LIKELY_FPS_KEY = "reactive_likely_fps_key"
+REACTIVE_LIKELY_FPS_BATCH_SIZE = 8  # likely FPs checked per block
+REACTIVE_LIKELY_FPS_MAX_WORKERS = 4  # likely FPs checked concurrently
+REACTIVE_LIKELY_FPS_TIME_BUDGET_IN_SECONDS = 10  # per block; unchecked likely FPs are checked on a later block
 
 ALERTED_ENTITIES_ML_KEY = "alerted_entities_ml_per_alert_id_key"
 ALERTED_ENTITIES_ML_QUEUE_SIZE = 100000
@@ -32,8 +62,32 @@ ALERTED_ENTITIES_MANUAL_METAMASK_QUEUE_SIZE = 250000
 ALERTED_FP_CLUSTERS_KEY = "alerted_fp_addresses_per_alert_id_key"
 ALERTED_FP_CLUSTERS_QUEUE_SIZE = 10000
 
+DELTA_LOG_MAX_DELTAS = 12  # deltas persisted per key before they are compacted into a snapshot; also the number of delta slots per key
+DELTA_LOG_COMPACTION_RATIO = 0.5  # compact earlier if the deltas add up to more than this fraction of the snapshot
+
 TX_COUNT_FILTER_THRESHOLD = 2000  # ignore EOAs with tx count larger than this threshold to mitigate FPs
 CONTRACTS_TX_COUNT_FILTER_THRESHOLD = 5000 # ignore EOAs that have deployed a contract with tx count larger than this threshold to mitigate FPs
+DATA_DIR = os.environ.get("DATA_DIR", "data")  # local files the bot keeps across restarts
+# contracts and tx counts looked up by the block chain indexer; survives restarts. tests (PYTHON_ENV=test, see pytest.ini) dont share cached lookups
+INDEXER_CACHE_PATH = ":memory:" if os.environ.get("PYTHON_ENV") == "test" else os.path.join(DATA_DIR, "indexer_cache.sqlite3")
+INDEXER_CACHE_TTL_IN_SECONDS = 60 * 60  # after this, cached entries are refreshed from their last scanned block
+INDEXER_DEFAULT_CALLS_PER_SECOND = 1
+INDEXER_TXLIST_MAX_RESULTS = 10000  # rows etherscan returns per txlist query; a full result may end within a block
+INDEXER_CALLS_PER_SECOND = {  # rate budget per api key name; keys not listed use INDEXER_DEFAULT_CALLS_PER_SECOND
+    'ETHERSCAN_TOKEN': 1,
+    'ZETTABLOCK': 1
+}
+
+LIST_CACHE_DIR = "list_cache"  # last known good copies of the downloaded fp, manual and metamask lists
+LIST_DOWNLOAD_TIMEOUT_IN_SECONDS = 30
+
+ETHERSCAN_LABEL_SNAPSHOT_KEY = "etherscan_label_snapshot_key"
+ETHERSCAN_LABEL_SNAPSHOT_CAPACITY = 500000  # unlabeled addresses; ~1.2MB bloom filter at the error rate below
+ETHERSCAN_LABEL_SNAPSHOT_ERROR_RATE = 0.0001  # share of never looked up addresses assumed to be unlabeled without querying etherscan
+ETHERSCAN_LABEL_SNAPSHOT_TTL_IN_SECONDS = 7 * 24 * 60 * 60
+
+FP_VERDICT_CACHE_SIZE = 10000
+FP_VERDICT_CACHE_TTL_IN_SECONDS = 60 * 60  # etherscan labels and tx counts of a cluster rarely change within this time
 
 SCAM_DETECTOR_BOT_ID = '0x1d646c4045189991fdfd24a66b192a294158b839a6ec121d740474bdacb3ab23'
 SCAM_DETECTOR_BETA_BOT_ID = '0x47c45816807d2eac30ba88745bf2778b61bc106bc76411b520a5289495c76db8'
@@ -279,6 +333,8 @@ MODEL_FEATURES = ['0x067e4c4f771f288c686efa574b685b98a92918f038a478b82c9ac5b5b64
        '0xf496e3f522ec18ed9be97b815d94ef6a92215fc8e9a1a16338aee9603a5035fb_uniqalertid_count']
 MODEL_ALERT_THRESHOLD_LOOSE = 0.70  # precison of 42/48 (88%) on test set; 183/192 (95%) on train set
 MODEL_ALERT_THRESHOLD_STRICT = 0.896  # precision of 100% on test and train set
+MODEL_SCORER_CHECK_SAMPLE_SIZE = 1000  # feature vectors the compiled model has to score identically to predict_proba at startup
+MODEL_SCORER_CHECK_SEED = 42
 
 
 # utilized for passthrough and combiner labels
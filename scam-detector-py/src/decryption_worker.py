@@ -0,0 +1,56 @@
+import hashlib
+import logging
+
+import gnupg
+
+from src.constants import DECRYPTION_CACHE_SIZE, DECRYPTION_CACHE_TTL_IN_SECONDS
+from src.ttl_cache import TTLCache
+
+
+class DecryptionWorker:
+    """
+    long lived gnupg decryption of encrypted alerts; the keyring is set up once and private keys are imported once
+    plaintexts are cached by the hash of their ciphertext, as subscribed alerts are often redelivered
+    """
+
+    def __init__(self, gnupghome: str = '.', cache_size: int = DECRYPTION_CACHE_SIZE, cache_ttl: float = DECRYPTION_CACHE_TTL_IN_SECONDS):
+        self.gpg = gnupg.GPG(gnupghome=gnupghome)
+        self.imported_keys = set()  # hashes of the private keys imported into the keyring
+        self.cache = TTLCache(cache_size, cache_ttl)  # ciphertext hash -> plaintext
+        self.decryptions = 0
+
+    def import_key(self, private_key: str):
+        key_hash = hashlib.sha256(private_key.encode()).hexdigest()
+        if key_hash in self.imported_keys:
+            return
+
+        logging.info("Importing private keys into GPG")
+        import_result = self.gpg.import_keys(private_key)
+        if len(import_result.fingerprints) == 0:
+            logging.info("Imported no private key into GPG")
+
+        for fingerprint in import_result.fingerprints:
+            self.gpg.trust_keys(fingerprint, 'TRUST_ULTIMATE')
+            logging.info(f"Imported private key {fingerprint} into GPG")
+        self.imported_keys.add(key_hash)
+
+    def decrypt(self, ciphertext: str, private_key: str) -> str:
+        """returns the plaintext of the ciphertext; an empty string if it couldnt be decrypted"""
+        self.import_key(private_key)
+
+        ciphertext_hash = hashlib.sha256(ciphertext.encode()).hexdigest()
+        plaintext = self.cache.get(ciphertext_hash)
+        if plaintext is not None:
+            return plaintext
+
+        self.decryptions += 1
+        decrypted = self.gpg.decrypt(ciphertext)
+        plaintext = str(decrypted)
+        if decrypted.ok and len(plaintext) > 0:
+            self.cache.put(ciphertext_hash, plaintext)
+        else:
+            logging.warning(f"Unable to decrypt finding: {decrypted.status}")
+        return plaintext
+
+    def stats(self) -> dict:
+        return {"decryptions": self.decryptions, "cache": self.cache.stats()}
@@ -0,0 +1,54 @@
+import json
+import tempfile
+
+import gnupg
+
+from decryption_worker import DecryptionWorker
+from utils import Utils
+
+FINDING = {"name": "Ice phishing", "description": "Ice phishing report.", "alertId": "Ice-phishing", "severity": 4, "type": 2, "metadata": {}, "labels": [{"entity": "0x2ed12fb3146cd2eac390ea73acc83f80d6020b03", "entityType": 1, "label": "phish", "confidence": 1, "metadata": {}}]}
+
+
+class TestDecryptionWorker:
+
+    def setup_class(cls):
+        # sender side keyring with a throw away key pair
+        cls.sender = gnupg.GPG(gnupghome=tempfile.mkdtemp())
+        key = cls.sender.gen_key(cls.sender.gen_key_input(key_type="RSA", key_length=1024, name_email="test@scam-detector", no_protection=True))
+        cls.fingerprint = key.fingerprint
+        cls.private_key = cls.sender.export_keys(key.fingerprint, secret=True, expect_passphrase=False)
+
+    def encrypt(self, i: int) -> str:
+        return str(self.sender.encrypt(json.dumps(dict(FINDING, description=f"Ice phishing report {i}.")), self.fingerprint, always_trust=True, armor=True))
+
+    def test_decrypt(self, tmp_path):
+        worker = DecryptionWorker(gnupghome=str(tmp_path))
+        ciphertexts = [self.encrypt(i) for i in range(3)]
+        plaintexts = [worker.decrypt(ciphertext, self.private_key) for ciphertext in ciphertexts]
+
+        assert [json.loads(plaintext)["description"] for plaintext in plaintexts] == ["Ice phishing report 0.", "Ice phishing report 1.", "Ice phishing report 2."]
+        assert worker.decrypt("not encrypted", self.private_key) == "", "should return an empty string for ciphertexts that cant be decrypted"
+        assert worker.decryptions == 4
+        assert len(worker.imported_keys) == 1, "should import the private key once"
+
+    def test_decrypt_alert(self, tmp_path):
+        Utils.DECRYPTION_WORKER = DecryptionWorker(gnupghome=str(tmp_path))
+        try:
+            finding = Utils.decrypt_alert(self.encrypt(0), self.private_key)
+            assert finding.description == "Ice phishing report 0."
+            assert finding.alert_id == "Ice-phishing"
+        finally:
+            Utils.DECRYPTION_WORKER = None
+
+    def test_redelivered_alerts_are_not_decrypted_again(self, tmp_path):
+        ciphertexts = [self.encrypt(i) for i in range(10)]
+        worker = DecryptionWorker(gnupghome=str(tmp_path))
+
+        plaintexts = [worker.decrypt(ciphertext, self.private_key) for ciphertext in ciphertexts]
+        redelivered = [worker.decrypt(ciphertext, self.private_key) for ciphertext in ciphertexts + ciphertexts]
+
+        assert redelivered == plaintexts + plaintexts
+        assert worker.decryptions == 10, "should decrypt each ciphertext once"
+        assert worker.cache.hits == 20
+        assert worker.decrypt("not encrypted", self.private_key) == "" and worker.decrypt("not encrypted", self.private_key) == ""
+        assert worker.decryptions == 12, "should not cache failed decryptions"
@@ -0,0 +1,185 @@
+import copy
+import logging
+import traceback
+from collections import OrderedDict
+
+from src.constants import DELTA_LOG_MAX_DELTAS, DELTA_LOG_COMPACTION_RATIO
+from src.findings_queue import FindingsQueue
+from src.l2_cache import L2Cache, L2CacheLoadError
+from src.utils import Utils
+
+
+class DeltaLog:
+    """
+    persists an OrderedDict, list or FindingsQueue as a snapshot plus an append-only log of deltas, so a persist cycle only uploads what changed since the last one
+    the snapshot is stored under the key itself as (sequence, state); delta n is stored as (n, ops) under <key>-delta-<n % DELTA_LOG_MAX_DELTAS>
+    loading replays the deltas following the snapshot sequence until a slot is missing or holds an older sequence; a delta that fails to load raises, so a truncated state is never persisted
+    the log is compacted into a new snapshot once it holds DELTA_LOG_MAX_DELTAS deltas or its bytes exceed DELTA_LOG_COMPACTION_RATIO of the snapshot
+    a snapshot takes the next sequence, so a delta whose write reported a failure but was stored anyway is never replayed onto it
+    a FindingsQueue tracks its own changes since the last persist, so it is neither copied nor diffed; it is loaded as a list
+    """
+
+    def __init__(self, chain_id: int, key: str):
+        self.chain_id = chain_id
+        self.key = key
+        self.sequence = 0  # sequence of the last persisted delta (or snapshot)
+        self.deltas = 0  # number of deltas persisted since the last snapshot
+        self.snapshot_size = 0
+        self.delta_size = 0
+        self.shadow = None  # copy of the state as of the last persisted sequence; None forces a snapshot
+
+    def delta_key(self, sequence: int) -> str:
+        return f"{self.key}-delta-{sequence % DELTA_LOG_MAX_DELTAS}"
+
+    def size(self) -> int:
+        """bytes persisted for the current state; maintained as snapshots and deltas are written"""
+        return self.snapshot_size + self.delta_size
+
+    def load(self) -> object:
+        snapshot = L2Cache.load(self.chain_id, self.key)
+        if snapshot is None:
+            return None
+
+        if isinstance(snapshot, tuple):
+            self.sequence, state = snapshot
+        else:
+            self.sequence, state = 0, snapshot  # persisted as a whole before the delta log was introduced
+
+        for _ in range(DELTA_LOG_MAX_DELTAS):
+            try:
+                delta = L2Cache.load(self.chain_id, self.delta_key(self.sequence + 1), report_missing=False, raise_errors=True)
+            except L2CacheLoadError as e:
+                Utils.ERROR_CACHE.add(Utils.alert_error(f"Failed to load delta {self.sequence + 1} of {self.key}_{self.chain_id}: {e}", "delta_log.load", traceback.format_exc()))
+                raise
+            if delta is None or delta[0] != self.sequence + 1:
+                break
+            state = DeltaLog.apply(state, delta[1])
+            self.sequence += 1
+            self.deltas += 1
+
+        logging.info(f"Loaded {self.key}_{self.chain_id} from snapshot and {self.deltas} deltas; sequence {self.sequence}.")
+        self.shadow = DeltaLog.copy(state)
+        return state
+
+    def write(self, state: object):
+        if self.shadow is None or self.deltas >= DELTA_LOG_MAX_DELTAS or self.delta_size > self.snapshot_size * DELTA_LOG_COMPACTION_RATIO:
+            self.compact(state)
+            return
+
+        if isinstance(state, FindingsQueue) and self.shadow is state:
+            ops = state.delta()
+        elif isinstance(state, FindingsQueue):
+            ops = DeltaLog.diff_list(list(self.shadow), list(state))  # first write after loading, or a new queue
+        else:
+            ops = DeltaLog.diff(self.shadow, state)
+        if len(ops) == 0:
+            logging.debug(f"No changes to persist for {self.key}_{self.chain_id}")
+            if isinstance(state, FindingsQueue):
+                self.checkpoint(state)
+            return
+
+        byte_length = L2Cache.write((self.sequence + 1, ops), self.chain_id, self.delta_key(self.sequence + 1))
+        if byte_length == 0:
+            self.shadow = None  # the log has a gap now; the next write replaces it with a snapshot
+            return
+
+        self.sequence += 1
+        self.deltas += 1
+        self.delta_size += byte_length
+        self.checkpoint(state)
+        logging.info(f"Persisted delta {self.sequence} of {self.key}_{self.chain_id} with {len(ops)} ops; {byte_length} bytes.")
+
+    def compact(self, state: object):
+        byte_length = L2Cache.write((self.sequence + 1, list(state) if isinstance(state, FindingsQueue) else state), self.chain_id, self.key)
+        if byte_length == 0:
+            self.shadow = None
+            return
+
+        self.sequence += 1
+        self.deltas = 0
+        self.snapshot_size = byte_length
+        self.delta_size = 0
+        self.checkpoint(state)
+        logging.info(f"Compacted {self.key}_{self.chain_id} into snapshot at sequence {self.sequence}; {byte_length} bytes.")
+
+    def checkpoint(self, state: object):
+        if isinstance(state, FindingsQueue):
+            state.checkpoint()
+            self.shadow = state  # the queue is its own shadow
+        else:
+            self.shadow = DeltaLog.copy(state)
+
+    def remove(self):
+        L2Cache.remove(self.chain_id, self.key)
+        for slot in range(DELTA_LOG_MAX_DELTAS):
+            L2Cache.remove(self.chain_id, self.delta_key(slot))
+
+    @staticmethod
+    def copy(state: object) -> object:
+        if isinstance(state, dict):
+            return OrderedDict((key, copy.copy(value)) for key, value in state.items())  # values like sets are mutated in place
+        return list(state)
+
+    @staticmethod
+    def diff(shadow: object, state: object) -> list:
+        if isinstance(state, dict):
+            return DeltaLog.diff_dict(shadow, state)
+        return DeltaLog.diff_list(shadow, state)
+
+    @staticmethod
+    def diff_dict(shadow: OrderedDict, state: OrderedDict) -> list:
+        # state is expected to be the shadow with keys removed and keys (re)inserted at the end;
+        # the keys that still follow the shadow order are updated in place, all others are deleted and set again to preserve the order
+        positions = {key: i for i, key in enumerate(shadow.keys())}
+        in_place = set()
+        last_position = -1
+        for key in state.keys():
+            position = positions.get(key)
+            if position is None or position < last_position:
+                break
+            in_place.add(key)
+            last_position = position
+
+        deleted = [key for key in shadow.keys() if key not in in_place]
+        updated = [(key, value) for key, value in state.items() if key not in in_place or shadow[key] != value]
+
+        ops = []
+        if len(deleted) > 0:
+            ops.append(("delete", deleted))
+        if len(updated) > 0:
+            ops.append(("set", updated))
+        return ops
+
+    @staticmethod
+    def diff_list(shadow: list, state: list) -> list:
+        # state is expected to be the shadow with items popped from the front and items appended; items are compared by identity
+        popped = len(shadow)
+        if len(state) > 0:
+            popped = next((i for i, item in enumerate(shadow) if item is state[0]), len(shadow))
+        remaining = len(shadow) - popped
+        if remaining > len(state) or any(shadow[popped + i] is not state[i] for i in range(remaining)):
+            return [("replace", list(state))]
+
+        ops = []
+        if popped > 0:
+            ops.append(("popleft", popped))
+        if len(state) > remaining:
+            ops.append(("extend", state[remaining:]))
+        return ops
+
+    @staticmethod
+    def apply(state: object, ops: list) -> object:
+        for op, arg in ops:
+            if op == "delete":
+                for key in arg:
+                    state.pop(key, None)
+            elif op == "set":
+                for key, value in arg:
+                    state[key] = value
+            elif op == "popleft":
+                state = state[arg:]
+            elif op == "extend":
+                state.extend(arg)
+            elif op == "replace":
+                state = list(arg)
+        return state
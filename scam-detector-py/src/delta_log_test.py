@@ -0,0 +1,136 @@
+import os
+import pickle
+from collections import OrderedDict
+
+import pytest
+
+import delta_log as delta_log_module
+from constants import DELTA_LOG_MAX_DELTAS
+from delta_log import DeltaLog
+from l2_cache import VERSION
+
+KEY = "delta_log_test_key"
+
+
+class TestDeltaLog:
+
+    def setup_method(self):
+        DeltaLog(1, KEY).remove()
+
+    def teardown_method(self):
+        DeltaLog(1, KEY).remove()
+
+    def test_dict_round_trip(self):
+        state = OrderedDict([("a", {"mlA"}), ("b", {"mlB"}), ("c", {"mlC"})])
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+
+        state.popitem(last=False)  # evict a
+        state["b"].add("mlB2")  # update in place
+        state.pop("c")
+        state["d"] = {"mlD"}
+        state["c"] = {"mlC"}  # re-inserted at the end
+        delta_log.write(state)
+        assert delta_log.deltas == 1, "should have persisted a delta"
+        assert os.path.exists(f"{VERSION}-{KEY}-delta-2"), "delta should be persisted in the slot following the snapshot sequence 1"
+
+        loaded = DeltaLog(1, KEY).load()
+        assert loaded == state, "should be equal to the persisted state"
+        assert list(loaded.keys()) == ["b", "d", "c"], "should preserve the order"
+
+    def test_list_round_trip(self):
+        state = ["f1", "f2", "f3"]
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+
+        state = state[2:]
+        state.extend(["f4", "f5"])
+        delta_log.write(state)
+        assert DeltaLog.diff(["f1", "f2", "f3"], state) == [("popleft", 2), ("extend", ["f4", "f5"])]
+
+        state = ["f0"] + state  # not a queue operation
+        delta_log.write(state)
+        assert DeltaLog(1, KEY).load() == ["f0", "f3", "f4", "f5"]
+
+    def test_no_changes(self):
+        state = OrderedDict([("a", {"mlA"})])
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+        delta_log.write(state)
+        assert delta_log.sequence == 1, "should not persist a delta without changes"
+
+    def test_compaction(self):
+        state = OrderedDict([("a" * 1000, {"mlA"})])  # large snapshot, so compaction is triggered by the number of deltas
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+
+        for i in range(DELTA_LOG_MAX_DELTAS):
+            state[str(i)] = {"ml"}
+            delta_log.write(state)
+        assert delta_log.deltas == DELTA_LOG_MAX_DELTAS
+        assert delta_log.size() == delta_log.snapshot_size + delta_log.delta_size
+
+        state["x"] = {"ml"}
+        delta_log.write(state)
+        assert delta_log.deltas == 0, "should have compacted into a snapshot"
+        assert delta_log.delta_size == 0
+
+        state["y"] = {"ml"}
+        delta_log.write(state)  # overwrites the slot of an older delta
+        loaded_delta_log = DeltaLog(1, KEY)
+        assert loaded_delta_log.load() == state
+        assert loaded_delta_log.sequence == DELTA_LOG_MAX_DELTAS + 3
+        assert loaded_delta_log.deltas == 1
+
+    def test_orphan_delta_before_snapshot(self, monkeypatch):
+        state = OrderedDict([("a", {"mlA"}), ("b", {"mlB"})])
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+
+        write = delta_log_module.L2Cache.write
+
+        def write_reporting_failure(obj, chain_id, key):
+            write(obj, chain_id, key)  # stored, but the write is reported as failed
+            return 0
+
+        monkeypatch.setattr(delta_log_module.L2Cache, "write", write_reporting_failure)
+        state.pop("a")
+        delta_log.write(state)
+        monkeypatch.setattr(delta_log_module.L2Cache, "write", write)
+
+        state["a"] = {"mlA2"}
+        delta_log.write(state)  # a snapshot, as the log has a gap
+        assert delta_log.deltas == 0
+        assert DeltaLog(1, KEY).load() == state, "should not replay the orphan delta onto the snapshot"
+
+    def test_load_legacy_snapshot(self):
+        with open(f"{VERSION}-{KEY}", "wb") as f:
+            pickle.dump(OrderedDict([("a", {"mlA"})]), f)
+
+        delta_log = DeltaLog(1, KEY)
+        assert delta_log.load() == OrderedDict([("a", {"mlA"})]), "should load state persisted without a delta log"
+        assert delta_log.sequence == 0
+
+    def test_load_delta_error(self, monkeypatch):
+        state = OrderedDict([("a", {"mlA"})])
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(state)
+        state["b"] = {"mlB"}
+        delta_log.write(state)
+
+        load = delta_log_module.L2Cache.load
+
+        def failing_load(chain_id, key, report_missing=True, raise_errors=False):
+            if "-delta-" in key:
+                raise delta_log_module.L2CacheLoadError(f"request DB 500 while loading key {key}")
+            return load(chain_id, key, report_missing, raise_errors)
+
+        monkeypatch.setattr(delta_log_module.L2Cache, "load", failing_load)
+        delta_log_module.Utils.ERROR_CACHE.clear()
+        with pytest.raises(delta_log_module.L2CacheLoadError):
+            DeltaLog(1, KEY).load()
+        assert delta_log_module.Utils.ERROR_CACHE.len() == 1, "should report the failed delta"
+
+        monkeypatch.setattr(delta_log_module.L2Cache, "load", load)
+        assert DeltaLog(1, KEY).load() == state, "a missing delta is the end of the log"
+        delta_log_module.Utils.ERROR_CACHE.clear()
@@ -0,0 +1,100 @@
+import logging
+import time
+import traceback
+from collections import OrderedDict
+
+from src.constants import (DYNAMO_BATCH_WRITE_SIZE, DYNAMO_BATCH_WRITE_MAX_AGE_IN_SECONDS, DYNAMO_BATCH_WRITE_MAX_RETRIES, DYNAMO_BATCH_WRITE_BACKOFF_IN_SECONDS,
+                           DYNAMO_BATCH_WRITE_FAILURE_BACKOFF_IN_SECONDS, DYNAMO_BATCH_WRITE_MAX_PENDING)
+from src.utils import Utils
+
+
+class DynamoWriter:
+    """
+    write-behind buffer in front of the dynamo table; puts are coalesced into BatchWriteItem requests of up to 25 items
+    items that have not been flushed yet are exposed through pending_items, so readers can merge them into query results
+    once a batch could not be written, flushes are skipped for failure_backoff seconds and at most max_pending items are kept, dropping the oldest
+    """
+
+    def __init__(self, dynamo, batch_size: int = DYNAMO_BATCH_WRITE_SIZE, max_age: float = DYNAMO_BATCH_WRITE_MAX_AGE_IN_SECONDS,
+                 max_retries: int = DYNAMO_BATCH_WRITE_MAX_RETRIES, backoff: float = DYNAMO_BATCH_WRITE_BACKOFF_IN_SECONDS,
+                 failure_backoff: float = DYNAMO_BATCH_WRITE_FAILURE_BACKOFF_IN_SECONDS, max_pending: int = DYNAMO_BATCH_WRITE_MAX_PENDING):
+        self.dynamo = dynamo
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failure_backoff = failure_backoff
+        self.max_pending = max_pending
+        self.pending = OrderedDict()  # (itemId, sortKey) -> item
+        self.oldest_pending_time = None
+        self.retry_after = 0.0  # flushes are skipped until then after a failed batch
+        self.dropped = 0
+
+    def put_item(self, item: dict):
+        # items with the same key overwrite each other, same as put_item; BatchWriteItem also rejects duplicate keys within a request
+        self.pending[(item["itemId"], item["sortKey"])] = item
+        if self.oldest_pending_time is None:
+            self.oldest_pending_time = time.time()
+        if len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            if self.dropped == 0:
+                logging.error(f"More than {self.max_pending} items pending to be written to dynamoDB. Dropping the oldest.")
+                Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo_writer dropping pending items beyond {self.max_pending}', "dynamo_writer.put_item", ""))
+            self.dropped += 1
+
+        if len(self.pending) >= self.batch_size or self.is_expired():
+            self.flush()
+
+    def is_expired(self) -> bool:
+        return self.oldest_pending_time is not None and time.time() - self.oldest_pending_time >= self.max_age
+
+    def pending_items(self, item_id: str) -> list:
+        return [item for (pending_item_id, _), item in self.pending.items() if pending_item_id == item_id]
+
+    def flush(self, force: bool = False):
+        """writes the pending items; skipped while backing off from a failed batch, unless forced (e.g. on shutdown)"""
+        if not force and time.time() < self.retry_after:
+            return
+
+        while len(self.pending) > 0:
+            batch = []
+            while len(batch) < self.batch_size and len(self.pending) > 0:
+                batch.append(self.pending.popitem(last=False)[1])
+
+            unprocessed_items = self._write_batch(batch)
+            if len(unprocessed_items) > 0:
+                # keep the items around, so they are retried on the next flush and remain visible to readers
+                for item in unprocessed_items:
+                    self.pending[(item["itemId"], item["sortKey"])] = item
+                self.retry_after = time.time() + self.failure_backoff
+                break
+        else:
+            self.retry_after = 0.0
+            self.dropped = 0
+
+        self.oldest_pending_time = None if len(self.pending) == 0 else time.time()
+
+    def _write_batch(self, items: list) -> list:
+        request_items = [{"PutRequest": {"Item": item}} for item in items]
+        attempt = 0
+        while len(request_items) > 0:
+            try:
+                response = self.dynamo.meta.client.batch_write_item(RequestItems={self.dynamo.name: request_items})
+                if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
+                    logging.error(f"Error batch writing items to dynamoDB: {response}")
+                    Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo.batch_write_item HTTPStatusCode {response["ResponseMetadata"]["HTTPStatusCode"]}', "dynamo_writer._write_batch", ""))
+                else:
+                    logging.info(f"Successfully batch wrote {len(request_items)} items to dynamoDB.")
+                request_items = response.get("UnprocessedItems", {}).get(self.dynamo.name, [])
+            except Exception as e:
+                logging.warning(f"Exception in batch write to dynamoDB: {e} - {traceback.format_exc()}")
+
+            if len(request_items) > 0:
+                if attempt >= self.max_retries:
+                    logging.error(f"Unable to write {len(request_items)} items to dynamoDB after {attempt} retries.")
+                    Utils.ERROR_CACHE.add(Utils.alert_error(f'dynamo.batch_write_item {len(request_items)} unprocessed items', "dynamo_writer._write_batch", ""))
+                    return [request_item["PutRequest"]["Item"] for request_item in request_items]
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+
+        return []
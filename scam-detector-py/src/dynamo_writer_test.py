@@ -0,0 +1,131 @@
+from unittest.mock import Mock
+
+from dynamo_writer import DynamoWriter
+from utils import Utils
+
+TABLE_NAME = "test-table"
+
+
+class TestDynamoWriter:
+
+    @staticmethod
+    def get_dynamo(responses: list = None):
+        dynamo = Mock()
+        dynamo.name = TABLE_NAME
+        if responses is None:
+            dynamo.meta.client.batch_write_item.return_value = {'ResponseMetadata': {'HTTPStatusCode': 200}, 'UnprocessedItems': {}}
+        else:
+            dynamo.meta.client.batch_write_item.side_effect = responses
+        return dynamo
+
+    @staticmethod
+    def get_item(item_id: str, sort_key: str, cluster: str = "cluster") -> dict:
+        return {"itemId": item_id, "sortKey": sort_key, "cluster": cluster, "expiresAt": 0}
+
+    def test_put_item_buffers_until_batch_size(self):
+        dynamo = TestDynamoWriter.get_dynamo()
+        writer = DynamoWriter(dynamo, max_age=3600)
+
+        for i in range(24):
+            writer.put_item(TestDynamoWriter.get_item("id", str(i)))
+        assert dynamo.meta.client.batch_write_item.call_count == 0, "should not have written yet"
+        assert len(writer.pending_items("id")) == 24, "should have 24 pending items"
+
+        writer.put_item(TestDynamoWriter.get_item("id", "24"))
+        assert dynamo.meta.client.batch_write_item.call_count == 1, "should have written one batch"
+        request_items = dynamo.meta.client.batch_write_item.call_args.kwargs["RequestItems"][TABLE_NAME]
+        assert len(request_items) == 25, "batch should contain 25 items"
+        assert len(writer.pending_items("id")) == 0, "should have no pending items"
+
+    def test_put_item_coalesces_same_key(self):
+        dynamo = TestDynamoWriter.get_dynamo()
+        writer = DynamoWriter(dynamo, max_age=3600)
+
+        writer.put_item(TestDynamoWriter.get_item("id", "0", "cluster1"))
+        writer.put_item(TestDynamoWriter.get_item("id", "0", "cluster2"))
+        writer.put_item(TestDynamoWriter.get_item("id2", "0"))
+
+        assert writer.pending_items("id") == [TestDynamoWriter.get_item("id", "0", "cluster2")], "later put should overwrite earlier put"
+        writer.flush()
+        request_items = dynamo.meta.client.batch_write_item.call_args.kwargs["RequestItems"][TABLE_NAME]
+        assert len(request_items) == 2, "batch should contain 2 items"
+
+    def test_flush_splits_batches(self):
+        dynamo = TestDynamoWriter.get_dynamo()
+        writer = DynamoWriter(dynamo, batch_size=25, max_age=3600)
+        for i in range(60):
+            writer.pending[("id", str(i))] = TestDynamoWriter.get_item("id", str(i))
+
+        writer.flush()
+        batch_sizes = [len(call.kwargs["RequestItems"][TABLE_NAME]) for call in dynamo.meta.client.batch_write_item.call_args_list]
+        assert batch_sizes == [25, 25, 10], "should have written three batches"
+
+    def test_flush_retries_unprocessed_items(self):
+        item = TestDynamoWriter.get_item("id", "1")
+        responses = [{'ResponseMetadata': {'HTTPStatusCode': 200}, 'UnprocessedItems': {TABLE_NAME: [{"PutRequest": {"Item": item}}]}},
+                     {'ResponseMetadata': {'HTTPStatusCode': 200}, 'UnprocessedItems': {}}]
+        dynamo = TestDynamoWriter.get_dynamo(responses)
+        writer = DynamoWriter(dynamo, max_age=3600, backoff=0)
+
+        writer.put_item(TestDynamoWriter.get_item("id", "0"))
+        writer.put_item(item)
+        writer.flush()
+
+        assert dynamo.meta.client.batch_write_item.call_count == 2, "should have retried unprocessed item"
+        retried = dynamo.meta.client.batch_write_item.call_args.kwargs["RequestItems"][TABLE_NAME]
+        assert retried == [{"PutRequest": {"Item": item}}], "should only retry the unprocessed item"
+        assert len(writer.pending) == 0, "should have no pending items"
+
+    def test_flush_keeps_items_after_max_retries(self):
+        Utils.ERROR_CACHE.clear()
+        dynamo = TestDynamoWriter.get_dynamo()
+        dynamo.meta.client.batch_write_item.side_effect = Exception("ProvisionedThroughputExceededException")
+        writer = DynamoWriter(dynamo, max_age=3600, max_retries=2, backoff=0)
+
+        writer.put_item(TestDynamoWriter.get_item("id", "0"))
+        writer.flush()
+
+        assert dynamo.meta.client.batch_write_item.call_count == 3, "should have tried once and retried twice"
+        assert len(writer.pending_items("id")) == 1, "item should remain pending and readable"
+        assert Utils.ERROR_CACHE.len() == 1, "should have added an error"
+        Utils.ERROR_CACHE.clear()
+
+    def test_put_item_flushes_expired(self):
+        dynamo = TestDynamoWriter.get_dynamo()
+        writer = DynamoWriter(dynamo, max_age=0)
+
+        writer.put_item(TestDynamoWriter.get_item("id", "0"))
+        assert dynamo.meta.client.batch_write_item.call_count == 1, "should have flushed expired item"
+        assert not writer.is_expired(), "should not be expired after flush"
+
+    def test_flush_backs_off_after_failure(self):
+        Utils.ERROR_CACHE.clear()
+        dynamo = TestDynamoWriter.get_dynamo()
+        dynamo.meta.client.batch_write_item.side_effect = Exception("ProvisionedThroughputExceededException")
+        writer = DynamoWriter(dynamo, max_age=3600, max_retries=0, backoff=0, failure_backoff=3600)
+
+        for i in range(26):
+            writer.put_item(TestDynamoWriter.get_item("id", str(i)))
+        assert dynamo.meta.client.batch_write_item.call_count == 1, "should not retry on every put while backing off"
+        writer.flush()
+        assert dynamo.meta.client.batch_write_item.call_count == 1, "should skip flushes while backing off"
+
+        dynamo.meta.client.batch_write_item.side_effect = None
+        dynamo.meta.client.batch_write_item.return_value = {'ResponseMetadata': {'HTTPStatusCode': 200}, 'UnprocessedItems': {}}
+        writer.flush(force=True)
+        assert len(writer.pending) == 0, "should write when forced, as on shutdown"
+        assert writer.retry_after == 0.0
+        Utils.ERROR_CACHE.clear()
+
+    def test_max_pending(self):
+        Utils.ERROR_CACHE.clear()
+        dynamo = TestDynamoWriter.get_dynamo()
+        dynamo.meta.client.batch_write_item.side_effect = Exception("ProvisionedThroughputExceededException")
+        writer = DynamoWriter(dynamo, max_age=3600, max_retries=0, backoff=0, failure_backoff=3600, max_pending=30)
+
+        for i in range(100):
+            writer.put_item(TestDynamoWriter.get_item("id", f"{i:03d}"))
+        assert len(writer.pending) == 30, "should cap the pending items"
+        assert [item["sortKey"] for item in writer.pending_items("id")][-1] == "099", "should keep the newest items"
+        assert writer.dropped == 70
+        Utils.ERROR_CACHE.clear()
@@ -0,0 +1,133 @@
+import hashlib
+import math
+import threading
+import time
+
+from src.constants import ETHERSCAN_LABEL_SNAPSHOT_CAPACITY, ETHERSCAN_LABEL_SNAPSHOT_ERROR_RATE, ETHERSCAN_LABEL_SNAPSHOT_TTL_IN_SECONDS
+
+
+class BloomFilter:
+    """
+    set membership with false positives at error_rate (as long as at most capacity keys are added) and no false negatives
+    safe to share between threads; the lock is not pickled
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get_indices(self, key: str) -> list:
+        # double hashing: index i = h1 + i * h2
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, key: str):
+        indices = self.get_indices(key)
+        with self.lock:
+            for index in indices:
+                self.bits[index >> 3] |= 1 << (index & 7)
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        indices = self.get_indices(key)
+        with self.lock:
+            return all(self.bits[index >> 3] & (1 << (index & 7)) for index in indices)
+
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class EtherscanLabelSnapshot:
+    """
+    local snapshot of the etherscan labels looked up so far, so addresses are only queried once per ttl
+    labeled addresses (few) are kept with their labels; unlabeled addresses (the vast majority) are only added to a bloom filter, which keeps the snapshot small
+    the snapshot starts over after ttl seconds, so labels added on etherscan in the meantime are picked up, or once the bloom filter reached its capacity
+    version counts the changes, so the agent only persists the snapshot (~1.2MB) once it differs from persisted_version; a loaded snapshot is persisted
+    safe to share between the FP check threads; the lock is not pickled
+    """
+
+    def __init__(self, capacity: int = ETHERSCAN_LABEL_SNAPSHOT_CAPACITY, error_rate: float = ETHERSCAN_LABEL_SNAPSHOT_ERROR_RATE, ttl: float = ETHERSCAN_LABEL_SNAPSHOT_TTL_IN_SECONDS):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl
+        self.api_calls = 0
+        self.api_calls_saved = 0
+        self.version = 0
+        self.persisted_version = None
+        self.lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.persisted_version = self.version
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.labels = dict()  # address -> {'labels': [...], 'nametag': '...'}
+        self.unlabeled = BloomFilter(self.capacity, self.error_rate)
+        self.created_at = time.time()
+        self.version += 1
+
+    def lookup(self, addresses: list) -> tuple:
+        """returns the labels of the addresses that are in the snapshot (address -> labels) and the addresses that need to be queried"""
+        with self.lock:
+            if time.time() - self.created_at > self.ttl or self.unlabeled.is_full():
+                self.reset()
+
+            address_labels = dict()
+            unknown_addresses = []
+            for address in addresses:
+                address = address.lower()
+                if address in self.labels:
+                    address_labels[address] = self.labels[address]
+                elif address not in self.unlabeled:
+                    unknown_addresses.append(address)
+
+            if len(unknown_addresses) > 0:
+                self.api_calls += 1
+            else:
+                self.api_calls_saved += 1
+            return address_labels, unknown_addresses
+
+    def record(self, addresses: list, address_labels: dict):
+        """records the result of querying the labels of the addresses; address_labels only contains the labeled addresses"""
+        labeled_addresses = {address.lower(): labels for address, labels in address_labels.items()}
+        with self.lock:
+            for address in addresses:
+                address = address.lower()
+                if address in labeled_addresses:
+                    self.labels[address] = labeled_addresses[address]
+                else:
+                    self.unlabeled.add(address)
+            if len(addresses) > 0:
+                self.version += 1
+
+    def stats(self) -> dict:
+        lookups = self.api_calls + self.api_calls_saved
+        return {
+            "api_calls": self.api_calls,
+            "api_calls_saved": self.api_calls_saved,
+            "saved_rate": self.api_calls_saved / lookups if lookups > 0 else 0.0,
+            "labeled": len(self.labels),
+            "unlabeled": self.unlabeled.count
+        }
@@ -0,0 +1,79 @@
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from blockchain_indexer_service import BlockChainIndexer
+from etherscan_label_snapshot import BloomFilter, EtherscanLabelSnapshot
+
+LABELED_ADDRESS = "0x4838b106fce9647bdf1e7877bf73ce8b0bad5f97"
+LABELS = {"labels": ["Fee Recipient"], "nametag": "Titan Builder"}
+
+
+class TestEtherscanLabelSnapshot:
+
+    def teardown_method(self):
+        BlockChainIndexer.LABEL_SNAPSHOT = None
+
+    def test_bloom_filter(self):
+        bloom_filter = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom_filter.add(f"0x{i:040x}")
+        assert all(f"0x{i:040x}" in bloom_filter for i in range(1000)), "should not have false negatives"
+        false_positives = sum(f"0x{i:040x}" in bloom_filter for i in range(1000, 11000))
+        assert false_positives < 200, "should have about 1% false positives at capacity"
+        assert bloom_filter.is_full()
+
+    def test_lookup(self):
+        snapshot = EtherscanLabelSnapshot()
+        assert snapshot.lookup(["0xAAA", LABELED_ADDRESS]) == ({}, ["0xaaa", LABELED_ADDRESS])
+        snapshot.record(["0xaaa", LABELED_ADDRESS], {LABELED_ADDRESS: LABELS})
+
+        snapshot = pickle.loads(pickle.dumps(snapshot))  # persisted by the agent
+        assert snapshot.lookup(["0xaaa", LABELED_ADDRESS]) == ({LABELED_ADDRESS: LABELS}, [])
+        assert snapshot.lookup(["0xaaa", "0xbbb"]) == ({}, ["0xbbb"])
+        assert snapshot.stats()["api_calls"] == 2
+        assert snapshot.stats()["api_calls_saved"] == 1
+
+    def test_expiry(self):
+        snapshot = EtherscanLabelSnapshot(ttl=60)
+        snapshot.record(["0xaaa"], {})
+        snapshot.created_at = time.time() - 61
+        assert snapshot.lookup(["0xaaa"]) == ({}, ["0xaaa"]), "should query addresses again once the snapshot expired"
+
+    def test_version(self):
+        snapshot = EtherscanLabelSnapshot()
+        assert snapshot.version != snapshot.persisted_version, "a new snapshot should be persisted"
+        snapshot.persisted_version = snapshot.version
+
+        snapshot.lookup(["0xaaa"])
+        snapshot.record([], {})
+        assert snapshot.version == snapshot.persisted_version, "lookups should not change the snapshot"
+        snapshot.record(["0xaaa"], {})
+        assert snapshot.version != snapshot.persisted_version
+
+        snapshot = pickle.loads(pickle.dumps(snapshot))
+        assert snapshot.version == snapshot.persisted_version, "a loaded snapshot is persisted"
+
+    def test_concurrent_record(self):
+        snapshot = EtherscanLabelSnapshot()
+        batches = [[f"0x{i:040x}" for i in range(start, start + 100)] for start in range(0, 1000, 100)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda addresses: snapshot.record(addresses, {}), batches))
+        assert snapshot.unlabeled.count == 1000
+        assert all(snapshot.lookup(addresses) == ({}, []) for addresses in batches)
+
+    def test_get_etherscan_labels(self):
+        with patch.object(BlockChainIndexer, "query_etherscan_labels", return_value={LABELED_ADDRESS: LABELS}) as query_etherscan_labels:
+            assert BlockChainIndexer.get_etherscan_labels([LABELED_ADDRESS, "0xaaa"]) == {LABELED_ADDRESS: LABELS}
+            assert BlockChainIndexer.get_etherscan_labels([LABELED_ADDRESS, "0xaaa"]) == {LABELED_ADDRESS: LABELS}
+            assert query_etherscan_labels.call_count == 1, "should serve known addresses from the snapshot"
+
+            BlockChainIndexer.get_etherscan_labels(["0xaaa", "0xbbb"])
+            query_etherscan_labels.assert_called_with(["0xbbb"])
+
+    def test_get_etherscan_labels_failure(self):
+        with patch.object(BlockChainIndexer, "query_etherscan_labels", return_value=None) as query_etherscan_labels:
+            assert BlockChainIndexer.get_etherscan_labels(["0xaaa"]) == {}
+            assert BlockChainIndexer.lookup_etherscan_labels(["0xaaa"]) == ({}, False), "should report the failure"
+            assert query_etherscan_labels.call_count == 2, "should not record addresses whose labels couldnt be retrieved"
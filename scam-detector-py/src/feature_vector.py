@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+
+class FeatureVectorBuilder:
+    """
+    builds the model feature vector for a cluster straight from the alert tuples (botId, alertId, alertHash)
+    every alert feature (<bot_id>_<alert_id>) is mapped upfront to its position in the alphabetically sorted feature vector,
+    together with the positions of the derived <bot_id>_count and <bot_id>_uniqalertid_count features of its bot
+    """
+
+    def __init__(self, model_features: list):
+        self.columns = sorted(model_features)  # the model was trained on alphabetically sorted columns
+        positions = {feature: i for i, feature in enumerate(self.columns)}
+
+        self.index = dict()  # alert feature -> (position, count position, unique alert id count position); -1 if the model doesnt have the feature
+        for feature, position in positions.items():
+            bot_id = feature[0:66]
+            if feature == bot_id + '_count' or feature == bot_id + '_uniqalertid_count':
+                continue
+            count_position = positions.get(bot_id + '_count', -1)
+            uniq_position = positions.get(bot_id + '_uniqalertid_count', -1) if '_count' not in feature else -1
+            self.index[feature] = (position, count_position, uniq_position)
+
+    def build(self, alerts: list) -> np.ndarray:
+        feature_vector = np.zeros(len(self.columns))
+        for bot_id, alert_id, _ in set(alerts):  # alerts with the same hash are only counted once
+            positions = self.index.get(f"{bot_id}_{alert_id}")
+            if positions is None:
+                continue  # not a model feature
+
+            position, count_position, uniq_position = positions
+            if feature_vector[position] == 0 and uniq_position >= 0:
+                feature_vector[uniq_position] += 1
+            feature_vector[position] += 1
+            if count_position >= 0:
+                feature_vector[count_position] += 1
+
+        return feature_vector
+
+    def to_dataframe(self, feature_vectors: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(np.atleast_2d(feature_vectors), columns=self.columns)
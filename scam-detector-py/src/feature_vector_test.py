@@ -0,0 +1,109 @@
+import random
+import joblib
+import numpy as np
+import pandas as pd
+
+from constants import MODEL_FEATURES, MODEL_NAME
+from feature_vector import FeatureVectorBuilder
+
+
+# previous pandas based implementation of agent.build_feature_vector; kept as reference for the parity tests
+def build_feature_vector_pandas(alerts: list, cluster: str) -> pd.DataFrame:
+    df_feature_vector = pd.DataFrame(columns=MODEL_FEATURES)
+    df_feature_vector.loc[0] = np.zeros(len(MODEL_FEATURES))
+
+    df_alerts_all = pd.DataFrame(alerts, columns=['bot_id', 'alert_id', 'alert_hash'])
+    df_alerts_all.drop_duplicates(inplace=True)
+    df_alerts_all['cluster'] = cluster
+    df_alerts_all['alert_hash'] = 1
+
+    grouped = df_alerts_all.groupby(['cluster', 'bot_id', 'alert_id'])['alert_hash'].sum().reset_index()
+    pivoted = pd.pivot_table(grouped, values='alert_id', index='cluster', columns=['bot_id', 'alert_id'], aggfunc='sum')
+    pivoted.columns = [f'{col[0]}_{col[1]}' for col in pivoted.columns]
+    pivoted.fillna(0, inplace=True)
+
+    bot_count_features = set()
+    for column in pivoted.columns:
+        if column in MODEL_FEATURES:
+            bot_count_features.add(column[0:66])
+
+    for bot_count_feature in bot_count_features:
+        pivoted[bot_count_feature + '_count'] = 0
+        pivoted[bot_count_feature + '_uniqalertid_count'] = 0
+
+    for index, row in pivoted.iterrows():
+        bot_id_unique_alert_ids = {}
+        for column in pivoted.columns:
+            if column[0:66] in bot_count_features and column[0:66] + '_count' not in column and column in MODEL_FEATURES:
+                count = row[column]
+                pivoted.loc[index, column[0:66] + '_count'] += count
+                if column[0:66] not in bot_id_unique_alert_ids:
+                    bot_id_unique_alert_ids[column[0:66]] = 0
+                if count > 0 and "_count" not in column:
+                    bot_id_unique_alert_ids[column[0:66]] += 1
+
+        for column in pivoted.columns:
+            if "_uniqalertid_count" in column:
+                pivoted.loc[index, column] = bot_id_unique_alert_ids[column[0:66]]
+
+    for column in pivoted.columns:
+        df_feature_vector.loc[0, column] = pivoted.loc[cluster, column]
+
+    df_feature_vector = df_feature_vector.sort_index(axis=1)
+    for column in df_feature_vector.columns:
+        if column not in MODEL_FEATURES:
+            df_feature_vector.drop(columns=[column], inplace=True)
+
+    return df_feature_vector
+
+
+class TestFeatureVectorBuilder:
+    CLUSTER = "0x2967e7bb9daa5711ac332caf874bd47ef99b3821"
+    ALERT_FEATURES = [feature for feature in MODEL_FEATURES if not feature.endswith('_count')]
+
+    @staticmethod
+    def random_alerts(rnd: random.Random, size: int) -> list:
+        alerts = []
+        for i in range(size):
+            if rnd.random() < 0.1:
+                alerts.append(("0x" + "ab" * 32, "UNKNOWN-ALERT", hex(i)))  # not a model feature
+                continue
+            feature = rnd.choice(TestFeatureVectorBuilder.ALERT_FEATURES)
+            alerts.append((feature[0:66], feature[67:], hex(rnd.randint(0, size))))  # duplicate hashes on purpose
+        return alerts
+
+    def test_build_feature_vector(self):
+        alerts = [('0xbc06a40c341aa1acc139c900fd1b7e3999d71b80c13a9dd50a369d8f923757f5', 'FLASHBOTS-TRANSACTIONS', '0x1'),
+                  ('0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14', 'ICE-PHISHING-ERC20-PERMIT', '0x2'),
+                  ('0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14', 'ICE-PHISHING-ERC721-APPROVAL-FOR-ALL', '0x3'),
+                  ('0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14', 'ICE-PHISHING-ERC721-APPROVAL-FOR-ALL', '0x4'),
+                  ('0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14', 'ICE-PHISHING-ERC721-APPROVAL-FOR-ALL', '0x4')
+                  ]
+        builder = FeatureVectorBuilder(MODEL_FEATURES)
+        df_feature_vector = builder.to_dataframe(builder.build(alerts))
+
+        assert df_feature_vector.loc[0, "0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14_ICE-PHISHING-ERC721-APPROVAL-FOR-ALL"] == 2
+        assert df_feature_vector.loc[0, "0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14_count"] == 3
+        assert df_feature_vector.loc[0, "0x8badbf2ad65abc3df5b1d9cc388e419d9255ef999fb69aac6bf395646cf01c14_uniqalertid_count"] == 2
+        assert df_feature_vector.loc[0, "0xbc06a40c341aa1acc139c900fd1b7e3999d71b80c13a9dd50a369d8f923757f5_count"] == 1
+        assert df_feature_vector.values.sum() == 11, "should only contain the expected features"
+        assert df_feature_vector.equals(build_feature_vector_pandas(alerts, TestFeatureVectorBuilder.CLUSTER)), "should be equal to pandas implementation"
+
+    def test_build_feature_vector_empty(self):
+        builder = FeatureVectorBuilder(MODEL_FEATURES)
+        df_feature_vector = builder.to_dataframe(builder.build([]))
+        assert df_feature_vector.equals(build_feature_vector_pandas([], TestFeatureVectorBuilder.CLUSTER)), "should be equal to pandas implementation"
+
+    def test_build_feature_vector_parity(self):
+        rnd = random.Random(42)
+        builder = FeatureVectorBuilder(MODEL_FEATURES)
+        model = joblib.load(MODEL_NAME)
+
+        for size in [1, 2, 5, 10, 25, 50, 100, 200]:
+            alerts = TestFeatureVectorBuilder.random_alerts(rnd, size)
+            df_expected = build_feature_vector_pandas(alerts, TestFeatureVectorBuilder.CLUSTER)
+            df_actual = builder.to_dataframe(builder.build(alerts))
+
+            assert list(df_actual.columns) == list(df_expected.columns), "columns should be equal"
+            assert np.array_equal(df_actual.values, df_expected.values), f"feature vectors should be equal for {alerts}"
+            assert model.predict_proba(df_actual)[0, 1] == model.predict_proba(df_expected)[0, 1], "scores should be bit-identical"
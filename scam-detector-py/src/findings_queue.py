@@ -0,0 +1,87 @@
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class FindingsQueue:
+    """
+    bounded queue of findings waiting to be returned; findings are drained from the front in O(1) per finding
+    once capacity findings are queued, the drop policy decides which findings are lost: the oldest queued (drop_oldest) or the incoming ones (drop_newest)
+    tracks the findings popped and appended since the last checkpoint, so the DeltaLog only persists the undrained tail that changed
+    """
+
+    def __init__(self, name: str, capacity: int, drop_policy: str = DROP_OLDEST, findings: list = None):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy {drop_policy}")
+        self.name = name
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self.queue = deque()
+        self.enqueued = 0
+        self.drained = 0
+        self.dropped = 0
+        self.high_watermark = 0
+        self.checkpoint()
+        self.extend(findings or [])
+        self.checkpoint()  # loaded findings are already persisted
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+    def append(self, finding):
+        if len(self.queue) >= self.capacity:
+            self.dropped += 1
+            if self.drop_policy == DROP_NEWEST:
+                return
+            self.popleft()
+        self.queue.append(finding)
+        self.enqueued += 1
+        self.appended_since_checkpoint += 1
+        self.high_watermark = max(self.high_watermark, len(self.queue))
+
+    def extend(self, findings: list):
+        for finding in findings:
+            self.append(finding)
+
+    def popleft(self):
+        # a finding appended since the checkpoint is popped only once the findings before it are gone
+        if self.popped_since_checkpoint < self.length_at_checkpoint:
+            self.popped_since_checkpoint += 1
+        else:
+            self.appended_since_checkpoint -= 1
+        return self.queue.popleft()
+
+    def drain(self, n: int) -> list:
+        """removes and returns up to n findings from the front of the queue"""
+        findings = [self.popleft() for _ in range(min(n, len(self.queue)))]
+        self.drained += len(findings)
+        return findings
+
+    def checkpoint(self):
+        """marks the current queue as persisted"""
+        self.length_at_checkpoint = len(self.queue)
+        self.popped_since_checkpoint = 0
+        self.appended_since_checkpoint = 0
+
+    def delta(self) -> list:
+        """the queue operations since the last checkpoint, in the op format of DeltaLog.diff_list"""
+        ops = []
+        if self.popped_since_checkpoint > 0:
+            ops.append(("popleft", self.popped_since_checkpoint))
+        if self.appended_since_checkpoint > 0:
+            ops.append(("extend", [self.queue[i] for i in range(len(self.queue) - self.appended_since_checkpoint, len(self.queue))]))
+        return ops
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.queue),
+            "capacity": self.capacity,
+            "enqueued": self.enqueued,
+            "drained": self.drained,
+            "dropped": self.dropped,
+            "high_watermark": self.high_watermark
+        }
@@ -0,0 +1,82 @@
+from collections import deque
+
+from src.delta_log import DeltaLog  # same FindingsQueue class as the one the DeltaLog checks for
+from src.findings_queue import FindingsQueue, DROP_OLDEST, DROP_NEWEST
+
+KEY = "findings_queue_test_key"
+
+
+class TestFindingsQueue:
+
+    def teardown_method(self):
+        DeltaLog(1, KEY).remove()
+
+    def test_drain(self):
+        findings_queue = FindingsQueue("alert", 100)
+        findings_queue.extend([f"f{i}" for i in range(25)])
+        assert findings_queue.drain(10) == [f"f{i}" for i in range(10)]
+        assert findings_queue.drain(10) == [f"f{i}" for i in range(10, 20)]
+        assert findings_queue.drain(10) == [f"f{i}" for i in range(20, 25)]
+        assert findings_queue.drain(10) == []
+        assert findings_queue.stats() == {"size": 0, "capacity": 100, "enqueued": 25, "drained": 25, "dropped": 0, "high_watermark": 25}
+
+    def test_drop_policy(self):
+        findings_queue = FindingsQueue("block", 3, DROP_OLDEST)
+        findings_queue.extend(["f1", "f2", "f3", "f4", "f5"])
+        assert list(findings_queue) == ["f3", "f4", "f5"]
+        assert findings_queue.stats()["dropped"] == 2
+
+        findings_queue = FindingsQueue("block", 3, DROP_NEWEST)
+        findings_queue.extend(["f1", "f2", "f3", "f4", "f5"])
+        assert list(findings_queue) == ["f1", "f2", "f3"]
+        assert findings_queue.stats()["dropped"] == 2
+        assert findings_queue.stats()["high_watermark"] == 3
+
+    def test_delta(self):
+        findings_queue = FindingsQueue("alert", 100, findings=["f1", "f2", "f3"])
+        assert findings_queue.delta() == [], "loaded findings are already persisted"
+
+        findings_queue.drain(2)
+        findings_queue.extend(["f4", "f5"])
+        assert findings_queue.delta() == [("popleft", 2), ("extend", ["f4", "f5"])]
+
+        findings_queue.drain(2)  # f3 and f4, the latter was never persisted
+        assert findings_queue.delta() == [("popleft", 3), ("extend", ["f5"])]
+        findings_queue.checkpoint()
+        assert findings_queue.delta() == []
+
+    def test_delta_log_round_trip(self):
+        findings_queue = FindingsQueue("alert", 4, findings=["f1", "f2", "f3"])
+        delta_log = DeltaLog(1, KEY)
+        delta_log.write(findings_queue)
+
+        findings_queue.drain(1)
+        findings_queue.extend(["f4", "f5", "f6"])  # drops f2
+        delta_log.write(findings_queue)
+        assert delta_log.deltas == 1, "should have persisted a delta"
+
+        loaded = DeltaLog(1, KEY)
+        findings_queue = FindingsQueue("alert", 4, findings=loaded.load())
+        assert list(findings_queue) == ["f3", "f4", "f5", "f6"]
+
+        findings_queue.drain(3)
+        findings_queue.append("f7")
+        loaded.write(findings_queue)
+        assert DeltaLog(1, KEY).load() == ["f6", "f7"]
+
+    def test_drain_benchmark(self):
+        # a burst of findings drained 10 at a time, as handle_alert does
+        findings = [f"f{i}" for i in range(30000)]
+        expected = []
+        findings_list = list(findings)
+        while len(findings_list) > 0:
+            expected.append(findings_list[0:10])
+            findings_list = findings_list[10:]
+
+        findings_queue = FindingsQueue("alert", len(findings), findings=findings)
+        batches = []
+        while len(findings_queue) > 0:
+            batches.append(findings_queue.drain(10))
+        assert batches == expected, "should drain the same batches as list slicing"
+        assert findings_queue.stats()["drained"] == len(findings)
+        assert isinstance(findings_queue.queue, deque), "draining should pop from the front instead of copying the remaining findings"
@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+import time
+
+
+class IndexerCache:
+    """
+    sqlite backed cache for the block chain indexer lookups, so they survive restarts
+    entries are keyed by (chain_id, address) and carry the last block that was scanned for them (watermark) and when they were updated
+    stale entries (older than ttl) are meant to be refreshed by fetching only the transactions after the watermark
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS contracts (chain_id INTEGER, address TEXT, contracts TEXT, last_block INTEGER, updated_at REAL, PRIMARY KEY (chain_id, address))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS tx_counts (chain_id INTEGER, address TEXT, tx_count INTEGER, last_block INTEGER, updated_at REAL, PRIMARY KEY (chain_id, address))")
+
+    def is_fresh(self, updated_at: float) -> bool:
+        return time.time() - updated_at < self.ttl
+
+    def get_contracts(self, chain_id: int, address: str) -> tuple:
+        """returns (contracts, last_block, updated_at); None if the address hasnt been scanned yet"""
+        with self.lock:
+            row = self.connection.execute("SELECT contracts, last_block, updated_at FROM contracts WHERE chain_id = ? AND address = ?", (chain_id, address.lower())).fetchone()
+        if row is None:
+            return None
+        contracts, last_block, updated_at = row
+        return set(contracts.split(",")) if contracts else set(), last_block, updated_at
+
+    def put_contracts(self, chain_id: int, address: str, contracts: set, last_block: int):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO contracts VALUES (?, ?, ?, ?, ?)", (chain_id, address.lower(), ",".join(sorted(contracts)), last_block, time.time()))
+
+    def get_tx_count(self, chain_id: int, address: str) -> tuple:
+        """returns (tx_count, last_block, updated_at); None if the address hasnt been scanned yet"""
+        with self.lock:
+            return self.connection.execute("SELECT tx_count, last_block, updated_at FROM tx_counts WHERE chain_id = ? AND address = ?", (chain_id, address.lower())).fetchone()
+
+    def put_tx_count(self, chain_id: int, address: str, tx_count: int, last_block: int):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO tx_counts VALUES (?, ?, ?, ?, ?)", (chain_id, address.lower(), tx_count, last_block, time.time()))
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM contracts")
+            self.connection.execute("DELETE FROM tx_counts")
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from blockchain_indexer_service import BlockChainIndexer
+from constants import CONTRACTS_TX_COUNT_FILTER_THRESHOLD, INDEXER_TXLIST_MAX_RESULTS
+from indexer_cache import IndexerCache
+from web3_mock import EOA_ADDRESS_SMALL_TX
+
+
+class TestIndexerCache:
+
+    def setup_method(self):
+        BlockChainIndexer.CACHE = IndexerCache(":memory:", 60)
+
+    def teardown_method(self):
+        BlockChainIndexer.CACHE = None
+
+    def test_contracts(self, tmp_path):
+        cache = IndexerCache(str(tmp_path / "cache.sqlite3"), 60)
+        assert cache.get_contracts(1, "0xABC") is None
+        cache.put_contracts(1, "0xABC", {"0x1", "0x2"}, 100)
+        cache.put_contracts(1, "0xdef", set(), 100)
+
+        cache = IndexerCache(str(tmp_path / "cache.sqlite3"), 60)  # survives a restart
+        contracts, last_block, updated_at = cache.get_contracts(1, "0xabc")
+        assert contracts == {"0x1", "0x2"}
+        assert last_block == 100
+        assert cache.is_fresh(updated_at)
+        assert cache.get_contracts(1, "0xdef")[0] == set()
+        assert cache.get_contracts(137, "0xabc") is None, "should be keyed by chain id"
+
+    def test_get_contracts_refreshes_from_watermark(self):
+        transactions = [{"isError": "0", "to": "", "nonce": "9", "blockNumber": "16000100"}]
+        with patch.object(BlockChainIndexer, "get_etherscan_transactions", return_value=transactions) as get_etherscan_transactions, \
+                patch.object(BlockChainIndexer, "get_zettablock_contracts", return_value={"0x2"}):
+            contracts = BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1)
+            assert contracts == {"0x728ad672409da288ca5b9aa85d1a55b803ba97d7", "0x2"}
+            get_etherscan_transactions.assert_called_once_with(EOA_ADDRESS_SMALL_TX, 1, 16000000)
+
+            assert BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1) == contracts, "should be served from cache"
+            assert get_etherscan_transactions.call_count == 1
+
+            BlockChainIndexer.CACHE.ttl = 0  # stale
+            get_etherscan_transactions.return_value = []
+            assert BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1) == contracts, "should keep the cached contracts"
+            get_etherscan_transactions.assert_called_with(EOA_ADDRESS_SMALL_TX, 1, 16000101)
+
+    def test_get_contracts_not_cached_on_error(self):
+        with patch.object(BlockChainIndexer, "get_etherscan_transactions", return_value=None), \
+                patch.object(BlockChainIndexer, "get_zettablock_contracts", return_value={"0x2"}):
+            assert BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1) == {"0x2"}
+        assert BlockChainIndexer.CACHE.get_contracts(1, EOA_ADDRESS_SMALL_TX) is None
+
+    def test_contract_tx_count(self):
+        transactions = [{"blockNumber": "16000100"}] * (CONTRACTS_TX_COUNT_FILTER_THRESHOLD + 1)
+        with patch.object(BlockChainIndexer, "get_etherscan_transactions", return_value=transactions) as get_etherscan_transactions:
+            assert BlockChainIndexer.get_contract_tx_count("0x1", 1) == CONTRACTS_TX_COUNT_FILTER_THRESHOLD + 1
+            BlockChainIndexer.CACHE.ttl = 0
+            assert BlockChainIndexer.get_contract_tx_count("0x1", 1) == CONTRACTS_TX_COUNT_FILTER_THRESHOLD + 1
+            assert get_etherscan_transactions.call_count == 1, "contracts above the threshold should not be refreshed"
+
+    def test_get_contracts_full_result(self):
+        transaction = {"isError": "0", "to": "0x2", "nonce": "0", "blockNumber": "16000100"}
+        deployment = {"isError": "0", "to": "", "nonce": "9", "blockNumber": "16000200"}
+        transactions = [transaction] * (INDEXER_TXLIST_MAX_RESULTS - 1) + [deployment]
+        with patch.object(BlockChainIndexer, "get_etherscan_transactions", return_value=transactions) as get_etherscan_transactions, \
+                patch.object(BlockChainIndexer, "get_zettablock_contracts", return_value=set()):
+            assert BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1) == set(), "should leave the last block of a full result to the next scan"
+            assert BlockChainIndexer.CACHE.get_contracts(1, EOA_ADDRESS_SMALL_TX)[1] == 16000199
+
+            BlockChainIndexer.CACHE.ttl = 0
+            get_etherscan_transactions.return_value = [deployment]
+            assert BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 1) == {"0x728ad672409da288ca5b9aa85d1a55b803ba97d7"}
+            get_etherscan_transactions.assert_called_with(EOA_ADDRESS_SMALL_TX, 1, 16000200)
+            assert BlockChainIndexer.CACHE.get_contracts(1, EOA_ADDRESS_SMALL_TX)[1] == 16000200
+
+    def test_get_contracts_empty_snowtrace_window(self):
+        with patch.object(BlockChainIndexer, "get_etherscan_transactions", return_value=[]) as get_etherscan_transactions, \
+                patch.object(BlockChainIndexer, "get_etherscan_block_number", return_value=40000000), \
+                patch.object(BlockChainIndexer, "get_zettablock_contracts", return_value=set()):
+            BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 43114)
+            get_etherscan_transactions.assert_called_once_with(EOA_ADDRESS_SMALL_TX, 43114, 33000000)
+            assert BlockChainIndexer.CACHE.get_contracts(43114, EOA_ADDRESS_SMALL_TX)[1] == 33999999, "should advance to the end of the scanned window"
+
+            BlockChainIndexer.CACHE.ttl = 0
+            BlockChainIndexer.get_contracts(EOA_ADDRESS_SMALL_TX, 43114)
+            get_etherscan_transactions.assert_called_with(EOA_ADDRESS_SMALL_TX, 43114, 34000000)
@@ -13,12 +13,19 @@ VERSION = "V11"
 
 from src.utils import Utils
 
+
+class L2CacheLoadError(Exception):
+    """raised by L2Cache.load(raise_errors=True) if a key could not be loaded, as opposed to not existing"""
+    pass
+
+
 class L2Cache:
     MAX_RETRIES = 3
     PERSISTENCE_SIZE_LIMIT = 4 * 1024 * 1024 # 4.5 MB
 
     @staticmethod
-    def write(obj: object, chain_id: int, key: str):
+    def write(obj: object, chain_id: int, key: str) -> int:
+        """persists the object and returns the number of bytes written; 0 if persisting failed"""
         key = f"{VERSION}-{key}"
         byte_length = 0
         if 'NODE_ENV' in os.environ and 'production' in os.environ.get('NODE_ENV'):
@@ -34,10 +41,12 @@ class L2Cache:
                     res = requests.post(f"{DATABASE}{key}_{chain_id}", data=bytes, headers=headers)
                     if res.status_code != 200:
                         Utils.ERROR_CACHE.add(Utils.alert_error(f'Error {res.status_code} while persisting key {key} to DB; length {len(obj)} size {byte_length}.', "l2_cache.write.internal", ""))
+                        byte_length = 0
                     logging.info(f"Persisting {key}_{chain_id} to database. Response: {res}")
                     break
                 except Exception as e:
                     logging.warn(f"Exception in persist {e}")
+                    byte_length = 0
                     attempt += 1 
                     time.sleep(0.2)
                     if attempt == L2Cache.MAX_RETRIES:
@@ -45,7 +54,11 @@ class L2Cache:
 
         else:
             logging.info(f"Persisting {key}_{chain_id} locally")
-            pickle.dump(obj, open(key, "wb"))
+            bytes = pickle.dumps(obj)
+            byte_length = len(bytes)
+            with open(key, "wb") as f:
+                f.write(bytes)
+        return byte_length
 
     @staticmethod
     def remove(chain_id: int, key: str):
@@ -55,7 +68,8 @@ class L2Cache:
                 os.remove(key)
 
     @staticmethod
-    def load(chain_id: int, key: str) -> object:
+    def load(chain_id: int, key: str, report_missing: bool = True, raise_errors: bool = False) -> object:
+        """returns None if the key doesnt exist; with raise_errors, a key that could not be loaded raises L2CacheLoadError instead of returning None"""
         key = f"{VERSION}-{key}"
         if 'NODE_ENV' in os.environ and 'production' in os.environ.get('NODE_ENV'):
             attempt = 0
@@ -68,8 +82,11 @@ class L2Cache:
                     logging.info(f"Loaded {key}_{chain_id} . Response: {res}")
                     if res.status_code == 200 and len(res.content) > 0:
                         return pickle.loads(res.content)
+                    elif raise_errors and res.status_code not in [200, 404]:
+                        raise L2CacheLoadError(f'request DB {res.status_code} while loading key {key}')
                     else:
-                        Utils.ERROR_CACHE.add(Utils.alert_error(f'request DB {res.status_code}. key {key} doesnt exist.', "l2_cache.load", ""))
+                        if report_missing:
+                            Utils.ERROR_CACHE.add(Utils.alert_error(f'request DB {res.status_code}. key {key} doesnt exist.', "l2_cache.load", ""))
                         logging.info(f"{key} does not exist")
                         break
                 except Exception as e:
@@ -78,13 +95,20 @@ class L2Cache:
                     time.sleep(0.2)
                     if attempt == L2Cache.MAX_RETRIES:
                         Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "l2_cache.load (max retries reached)", traceback.format_exc()))
+                        if raise_errors:
+                            raise L2CacheLoadError(f'loading key {key} failed: {e}') from e
                         break
 
         else:
             # load locally
             logging.info(f"Loading {key}_{chain_id} locally")
             if os.path.exists(key):
-                return pickle.load(open(key, "rb"))
+                try:
+                    return pickle.load(open(key, "rb"))
+                except Exception as e:
+                    if raise_errors:
+                        raise L2CacheLoadError(f'loading key {key} failed: {e}') from e
+                    raise
             else:
                 logging.info(f"File {key} does not exist")
         return None
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+
+import requests
+
+from src.constants import LIST_CACHE_DIR, LIST_DOWNLOAD_TIMEOUT_IN_SECONDS
+
+
+class ListLoader:
+    """
+    downloads a list (fp list, manual list, metamask phishing list) and parses it once per change
+    refreshes are conditional GETs (ETag/If-Modified-Since), so an unchanged list costs a 304 and no parsing
+    the last downloaded copy that parsed successfully is kept on disk and used when the download fails, also after a restart
+    """
+
+    def __init__(self, name: str, url: str, parse, fallback_path: str = None, cache_dir: str = LIST_CACHE_DIR):
+        self.name = name
+        self.url = url
+        self.parse = parse  # content (str) -> parsed list
+        self.fallback_path = fallback_path  # copy shipped with the bot; used if there is no downloaded copy yet
+        self.path = os.path.join(cache_dir, name)
+        self.meta_path = f"{self.path}.meta.json"
+        self.value = None
+        self.etag = None
+        self.last_modified = None
+        self.downloads = 0
+        self.revalidations = 0
+
+    def get(self):
+        """returns the parsed list, refreshing it if it changed upstream"""
+        headers = dict()
+        if self.value is not None or self.load_meta():
+            if self.etag is not None:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified is not None:
+                headers['If-Modified-Since'] = self.last_modified
+
+        try:
+            res = requests.get(self.url, headers=headers, timeout=LIST_DOWNLOAD_TIMEOUT_IN_SECONDS)
+            logging.info(f"Made request to fetch {self.name}: {res.status_code}")
+            if res.status_code == 304:
+                self.revalidations += 1
+                if self.value is None:
+                    self.value = self.parse(self.read(self.path))
+                return self.value
+            if res.status_code == 200:
+                content = res.content.decode('utf-8')
+                self.value = self.parse(content)
+                self.downloads += 1
+                self.etag = res.headers.get('ETag')
+                self.last_modified = res.headers.get('Last-Modified')
+                self.save(content)
+                return self.value
+        except Exception as e:
+            logging.warning(f"Failed to fetch {self.name}: {e}")
+
+        if self.value is None:
+            self.value = self.load_last_known_good()
+        return self.value
+
+    def load_meta(self) -> bool:
+        """loads the validators of the copy on disk; False if there is no copy to revalidate"""
+        if not os.path.exists(self.path) or not os.path.exists(self.meta_path):
+            return False
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            self.etag = meta.get('etag')
+            self.last_modified = meta.get('last_modified')
+            return True
+        except Exception as e:
+            logging.warning(f"Failed to load cache metadata of {self.name}: {e}")
+            return False
+
+    def load_last_known_good(self):
+        for path in [self.path, self.fallback_path]:
+            if path is not None and os.path.exists(path):
+                try:
+                    return self.parse(self.read(path))
+                except Exception as e:
+                    logging.warning(f"Failed to parse {self.name} from {path}: {e}")
+        return self.parse(None)
+
+    def save(self, content: str):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            for path, data in [(self.path, content), (self.meta_path, json.dumps({'etag': self.etag, 'last_modified': self.last_modified}))]:
+                with open(f"{path}.tmp", 'w') as f:
+                    f.write(data)
+                os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            logging.warning(f"Failed to cache {self.name}: {e}")
+
+    @staticmethod
+    def read(path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
@@ -0,0 +1,122 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from list_loader import ListLoader
+from utils import Utils
+
+LAST_MODIFIED = "Wed, 18 Oct 2023 10:00:00 GMT"
+
+
+class ListServer(HTTPServer):
+    """local stand in for raw.githubusercontent.com serving one file with an ETag and Last-Modified"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ListRequestHandler)
+        self.content = ""
+        self.version = 0
+        self.status_code = None  # set to force an error response
+        self.responses = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/list"
+
+    def publish(self, content: str):
+        self.content = content
+        self.version += 1
+
+
+class ListRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        etag = f'"v{self.server.version}"'
+        if self.server.status_code is not None:
+            status_code = self.server.status_code
+        elif self.headers.get("If-None-Match") == etag:
+            status_code = 304
+        else:
+            status_code = 200
+        self.server.responses.append(status_code)
+
+        self.send_response(status_code)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        body = self.server.content.encode() if status_code == 200 else b""
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestListLoader:
+
+    def setup_method(self):
+        self.server = ListServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_conditional_get(self, tmp_path):
+        self.server.publish('{"blacklist": ["a.com", "b.com"]}')
+        parses = []
+
+        def parse(content):
+            parses.append(content)
+            return Utils.parse_metamask_phishing_list(content)
+
+        loader = ListLoader("metamask.json", self.server.url, parse, cache_dir=str(tmp_path))
+        assert loader.get() == ["a.com", "b.com"]
+        first = loader.get()
+        assert self.server.responses == [200, 304], "should revalidate with the etag"
+        assert len(parses) == 1, "should not parse an unchanged list again"
+        assert loader.get() is first
+
+        self.server.publish('{"blacklist": ["c.com"]}')
+        assert loader.get() == ["c.com"]
+        assert self.server.responses[-1] == 200
+
+    def test_revalidate_after_restart(self, tmp_path):
+        self.server.publish("address,chain_id,comment\n0xABC,1,relayer\n")
+        ListLoader("fp_list.csv", self.server.url, Utils.parse_fp_list, cache_dir=str(tmp_path)).get()
+
+        loader = ListLoader("fp_list.csv", self.server.url, Utils.parse_fp_list, cache_dir=str(tmp_path))
+        df_fp = loader.get()
+        assert self.server.responses == [200, 304], "should revalidate the copy on disk"
+        assert list(df_fp['address']) == ["0xABC"]
+
+    def test_fallback_to_last_known_good(self, tmp_path):
+        self.server.publish('{"blacklist": ["a.com"]}')
+        ListLoader("metamask.json", self.server.url, Utils.parse_metamask_phishing_list, cache_dir=str(tmp_path)).get()
+
+        self.server.status_code = 500
+        loader = ListLoader("metamask.json", self.server.url, Utils.parse_metamask_phishing_list, cache_dir=str(tmp_path))
+        assert loader.get() == ["a.com"], "should use the copy on disk"
+
+        self.server.status_code = None
+        self.server.publish('not json')
+        assert loader.get() == ["a.com"], "should keep the last list that parsed"
+        assert json.loads(open(loader.path).read()) == {"blacklist": ["a.com"]}, "should not cache a list that doesnt parse"
+
+    def test_fallback_to_shipped_copy(self, tmp_path):
+        fallback_path = tmp_path / "fp_list.csv"
+        fallback_path.write_text("address,chain_id,comment\n0xdef,1,shipped\n")
+        self.server.status_code = 404
+        loader = ListLoader("fp_list.csv", self.server.url, Utils.parse_fp_list, str(fallback_path), cache_dir=str(tmp_path / "cache"))
+        assert list(loader.get()['address']) == ["0xdef"]
+
+        fallback_path = tmp_path / "metamask.json"
+        fallback_path.write_text('{"blacklist": ["b.com", "a.com", "b.com"]}')
+        loader = ListLoader("metamask.json", self.server.url, Utils.parse_metamask_phishing_list, str(fallback_path), cache_dir=str(tmp_path / "cache"))
+        assert loader.get() == ["b.com", "a.com"], "should keep the order of the list without duplicates"
+
+        loader = ListLoader("metamask.json", self.server.url, Utils.parse_metamask_phishing_list, cache_dir=str(tmp_path / "cache"))
+        assert loader.get() == [], "should return an empty list without any copy"
+
+    def test_interned_addresses(self):
+        df_fp = Utils.parse_fp_list("address,chain_id,comment\n" + "".join(f"0x{'ab' * 20},{chain_id},x\n" for chain_id in [1, 137]))
+        assert df_fp['address'][0] is df_fp['address'][1], "should keep one copy of repeated addresses"
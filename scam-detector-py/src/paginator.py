@@ -0,0 +1,132 @@
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from src.constants import PAGINATION_MAX_WORKERS, PAGINATION_RECOVERY_PAGES
+
+
+class AdaptivePageSize:
+    """
+    page size that is halved on every retryable failure and doubled again (up to the initial size) after recovery_pages successful pages
+    """
+
+    def __init__(self, maximum: int, recovery_pages: int = PAGINATION_RECOVERY_PAGES):
+        self.maximum = maximum
+        self.recovery_pages = recovery_pages
+        self.value = maximum
+        self.successes = 0
+
+    def success(self):
+        self.successes += 1
+        if self.value < self.maximum and self.successes >= self.recovery_pages:
+            self.value = min(self.maximum, self.value * 2)
+            self.successes = 0
+
+    def failure(self) -> bool:
+        """halves the page size; returns False once it cant be reduced any further"""
+        self.successes = 0
+        self.value = math.floor(self.value / 2)
+        return self.value >= 1
+
+
+class PageChain:
+    """
+    cursor chain of one query; the request for the next page is sent as soon as a page arrives, so it is in flight while the caller processes the current page
+    """
+
+    def __init__(self, paginator, executor: ThreadPoolExecutor, query: dict):
+        self.paginator = paginator
+        self.executor = executor
+        self.query = query
+        self.page_size = AdaptivePageSize(paginator.page_size)
+        self.cursor = None
+        self.future = self.submit()
+
+    def submit(self):
+        self.paginator.requests += 1
+        return self.executor.submit(self.paginator.fetch_page, self.query, self.cursor, self.page_size.value)
+
+    def next_page(self) -> list:
+        """returns the items of the next page; None once the chain is exhausted"""
+        while self.future is not None:
+            try:
+                response = self.future.result()
+            except Exception as e:
+                if not self.paginator.is_retryable(e):
+                    self.future = None
+                    raise
+                self.paginator.retries += 1
+                if not self.page_size.failure():
+                    logging.warning(f"pagination gave up on {self.query} after reducing the page size to 0: {e}")
+                    self.future = None
+                    return None
+                self.future = self.submit()
+                continue
+
+            self.page_size.success()
+            self.cursor = self.paginator.next_cursor(response)
+            self.future = self.submit() if self.cursor is not None else None
+            return self.paginator.get_items(response)
+        return None
+
+
+class Paginator:
+    """
+    pages through a cursor based forta api (get_alerts, get_labels)
+    the queries (e.g. sub windows of a time range or batches of entities) are paged in parallel; each keeps its next page prefetched
+    retryable errors (oversized responses) halve the page size of that query, which recovers after a few successful pages
+    items are deduplicated across queries by key, e.g. the alert hash, since sub windows may overlap at their boundaries
+    """
+
+    def __init__(self, fetch_page, get_items, next_cursor, is_retryable, page_size: int, key=None, max_workers: int = PAGINATION_MAX_WORKERS):
+        self.fetch_page = fetch_page  # (query, cursor, page_size) -> response
+        self.get_items = get_items  # response -> list of items
+        self.next_cursor = next_cursor  # response -> cursor of the next page; None on the last page
+        self.is_retryable = is_retryable  # exception -> bool
+        self.page_size = page_size
+        self.key = key  # item -> dedupe key; None keys are never deduplicated
+        self.max_workers = max_workers
+
+        self.requests = 0
+        self.retries = 0
+        self.duplicates = 0
+
+    def fetch(self, queries: list, on_error=None) -> list:
+        """
+        returns the items of all queries, in query and page order
+        an error of a query is passed to on_error and ends that query; without on_error it is raised
+        """
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chains = [PageChain(self, executor, query) for query in queries]
+            pages = [[] for _ in chains]
+            active = list(range(len(chains)))
+            while active:
+                for i in list(active):
+                    try:
+                        page = chains[i].next_page()
+                    except Exception as e:
+                        if on_error is None:
+                            raise
+                        on_error(e)
+                        page = None
+                    if page is None:
+                        active.remove(i)
+                    else:
+                        pages[i].append(self.dedupe(page, seen))
+
+        return [item for chain_pages in pages for page in chain_pages for item in page]
+
+    def dedupe(self, page: list, seen: set) -> list:
+        if self.key is None:
+            return page
+        items = []
+        for item in page:
+            key = self.key(item)
+            if key is not None:
+                if key in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(key)
+            items.append(item)
+        return items
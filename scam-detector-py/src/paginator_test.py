@@ -0,0 +1,139 @@
+import threading
+import time
+from unittest.mock import patch
+
+from forta_agent.alerts_api import AlertsResponse
+
+from paginator import AdaptivePageSize, Paginator
+from utils import Utils
+
+LATENCY = 0.05
+
+
+class FortaApiStub:
+    """
+    local stand in for the forta alerts api: one alert per second of the queried window (milliseconds ago), paged by block number cursor
+    responses with more than max_page_size alerts fail like oversized responses of the real api
+    """
+
+    def __init__(self, latency: float = LATENCY, max_page_size: int = None):
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get_alerts(self, query: dict) -> AlertsResponse:
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            failed = self.max_page_size is not None and query["first"] > self.max_page_size
+            if failed:
+                self.failures += 1
+        if failed:
+            raise Exception("Internal server error")
+
+        # created_since/created_before are inclusive, so adjacent windows share an alert
+        first_second = -(-query["created_before"] // 1000)
+        seconds = list(range(first_second, query["created_since"] // 1000 + 1))
+        if query["starting_cursor"] is not None:
+            seconds = [second for second in seconds if second > query["starting_cursor"]["blockNumber"]]
+        page = seconds[:query["first"]]
+        has_next_page = len(seconds) > len(page)
+        return AlertsResponse({
+            "alerts": [{"hash": f"0x{second}", "alertId": "SCAM-DETECTOR-ICE-PHISHING", "metadata": {}} for second in page],
+            "pageInfo": {"hasNextPage": has_next_page, "endCursor": {"alertId": "SCAM-DETECTOR-ICE-PHISHING" if has_next_page else "", "blockNumber": page[-1] if page else 0}}
+        })
+
+
+def fetch_alerts_sequentially(stub: FortaApiStub, start_milliseconds_ago: int, end_milliseconds_ago: int, page_size: int) -> list:
+    # one page after the other, as fetch_alerts used to
+    alerts = []
+    starting_cursor = None
+    while True:
+        response = stub.get_alerts({"created_since": start_milliseconds_ago, "created_before": end_milliseconds_ago, "starting_cursor": starting_cursor, "first": page_size})
+        alerts.extend(response.alerts)
+        if not response.page_info.has_next_page:
+            return alerts
+        starting_cursor = {"alertId": response.page_info.end_cursor.alert_id, "blockNumber": response.page_info.end_cursor.block_number}
+
+
+class TestPaginator:
+
+    def test_adaptive_page_size(self):
+        page_size = AdaptivePageSize(1000, recovery_pages=2)
+        assert page_size.failure() and page_size.value == 500
+        assert page_size.failure() and page_size.value == 250
+        page_size.success()
+        assert page_size.value == 250, "should only recover after recovery_pages successes"
+        page_size.success()
+        assert page_size.value == 500
+        page_size.success()
+        page_size.success()
+        page_size.success()
+        page_size.success()
+        assert page_size.value == 1000, "should not grow beyond the initial size"
+
+        page_size = AdaptivePageSize(1)
+        assert not page_size.failure(), "should give up once the page size cant be reduced"
+
+    def test_fetch_dedupes_and_keeps_order(self):
+        pages = {"a": [[1, 2], [3]], "b": [[3, 4], [5, 6]]}
+        paginator = Paginator(lambda query, cursor, page_size: (query, cursor or 0),
+                              lambda response: pages[response[0]][response[1]],
+                              lambda response: response[1] + 1 if response[1] + 1 < len(pages[response[0]]) else None,
+                              lambda e: False, 2, key=lambda item: item)
+        assert paginator.fetch(["a", "b"]) == [1, 2, 3, 4, 5, 6]
+        assert paginator.requests == 4
+        assert paginator.duplicates == 1
+
+    def test_fetch_error(self):
+        def fetch_page(query, cursor, page_size):
+            if query == "b":
+                raise ValueError("boom")
+            return [query]
+
+        paginator = Paginator(fetch_page, lambda response: response, lambda response: None, lambda e: False, 2)
+        errors = []
+        assert paginator.fetch(["a", "b", "c"], on_error=errors.append) == ["a", "c"], "should keep the results of the other queries"
+        assert len(errors) == 1
+
+        try:
+            paginator.fetch(["a", "b"])
+            assert False, "should raise without on_error"
+        except ValueError:
+            pass
+
+    def test_fetch_alerts_adaptive_page_size(self):
+        stub = FortaApiStub(latency=0, max_page_size=300)
+        with patch("utils.get_alerts", side_effect=stub.get_alerts):
+            alerts = Utils.fetch_alerts("0xbot", 3600 * 1000, 0, "test", 1)
+        assert sorted(int(alert.hash[2:]) for alert in alerts) == list(range(0, 3601)), "should return every alert once"
+        # each sub window halves its page size twice (1200 -> 300) and fails once more when probing 600 after 3 successful pages
+        assert stub.failures == 4 * 3
+
+    def test_fetch_alerts_benchmark(self):
+        sequential_stub = FortaApiStub()
+        start = time.perf_counter()
+        expected = fetch_alerts_sequentially(sequential_stub, 3600 * 1000, 0, 300)
+        sequential_elapsed = time.perf_counter() - start
+        assert sequential_stub.max_in_flight == 1
+
+        stub = FortaApiStub()
+        with patch("utils.get_alerts", side_effect=stub.get_alerts), patch("utils.FETCH_ALERTS_PAGE_SIZE", 300):
+            start = time.perf_counter()
+            alerts = Utils.fetch_alerts("0xbot", 3600 * 1000, 0, "test", 1)
+            elapsed = time.perf_counter() - start
+
+        print(f"sequential: {sequential_stub.requests} requests in {sequential_elapsed:.3f}s (latency bound {sequential_stub.requests * LATENCY:.3f}s); "
+              f"paginated: {stub.requests} requests in {elapsed:.3f}s, {stub.max_in_flight} in flight; speedup {sequential_elapsed / elapsed:.1f}x")
+        assert sorted(alert.hash for alert in alerts) == sorted(alert.hash for alert in expected)
+        assert stub.max_in_flight > 1, "sub windows should be paged in parallel"
+        # the sequential fetch waits for every request in turn; the paginated one has to beat that bound, not just the measured run
+        assert elapsed < sequential_stub.requests * LATENCY, "paging in parallel should take less time than the sequential requests"
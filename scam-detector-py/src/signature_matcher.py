@@ -0,0 +1,51 @@
+import logging
+import re
+
+import pandas as pd
+
+
+class SignatureMatcher:
+    """
+    matches contract bytecode against the code signatures (regexes in the Entity column) of the manual list
+    the signatures without groups are compiled into one alternation with a named group per row, so bytecode without a match is scanned once
+    signatures with groups are matched individually, as the alternation would renumber their groups and break numbered backreferences
+    on a match, the rows listed before the matched one are checked individually, so the first matching row is reported, same as iterating the rows
+    """
+
+    def __init__(self, df_signatures: pd.DataFrame):
+        self.rows = []  # (compiled regex, row)
+        for _, row in df_signatures.iterrows():
+            try:
+                self.rows.append((re.compile(row["Entity"]), row))
+            except re.error as e:
+                logging.warning(f"Skipping invalid contract signature {row['Entity']}: {e}")
+
+        self.separate = [i for i, (regex, _) in enumerate(self.rows) if regex.groups > 0]  # rows matched individually
+        combinable = [(i, regex) for i, (regex, _) in enumerate(self.rows) if regex.groups == 0]
+        self.combined = None
+        if len(combinable) > 0:
+            try:
+                self.combined = re.compile("|".join(f"(?P<s{i}>{regex.pattern})" for i, regex in combinable))
+            except re.error as e:
+                # e.g. signatures with inline flags that are only valid at the start of a pattern
+                logging.warning(f"Unable to combine contract signatures, matching them one by one: {e}")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def match(self, code: str) -> pd.Series:
+        """returns the first signature row matching the code; None if there is no match"""
+        if self.combined is None:
+            candidates = range(len(self.rows))
+        else:
+            m = self.combined.search(code)
+            if m is None:
+                candidates = self.separate
+            else:
+                candidates = range(int(m.lastgroup[1:]) + 1)
+
+        for i in candidates:
+            regex, row = self.rows[i]
+            if regex.search(code):
+                return row
+        return None
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from signature_matcher import SignatureMatcher
+
+
+class TestSignatureMatcher:
+
+    @staticmethod
+    def signatures(regexes: list) -> pd.DataFrame:
+        return pd.DataFrame({"Entity": regexes, "Threat category": [f"category {i}" for i in range(len(regexes))]})
+
+    def test_match(self):
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures(["56657269666963696174696f6e2e.*566572696669636174696f6e2e", "deadbeef"]))
+        assert matcher.match("6080604052deadbeef")["Threat category"] == "category 1"
+        assert matcher.match("608060405256657269666963696174696f6e2e00566572696669636174696f6e2e")["Threat category"] == "category 0"
+        assert matcher.match("6080604052") is None
+
+    def test_first_row_wins(self):
+        # row 1 matches further left in the code, but row 0 comes first in the list
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures(["cafe", "beef"]))
+        assert matcher.match("beef00cafe")["Threat category"] == "category 0"
+
+    def test_invalid_signature(self):
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures(["(cafe", "beef"]))
+        assert len(matcher) == 1, "invalid signature should be skipped"
+        assert matcher.match("beef")["Threat category"] == "category 1"
+
+    def test_uncombinable_signatures(self):
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures(["(ab)\\1", "beef"]))  # backreference is renumbered in the alternation
+        assert matcher.separate == [0]
+        assert matcher.match("00abab")["Threat category"] == "category 0"
+        assert matcher.match("00beef")["Threat category"] == "category 1"
+        assert matcher.match("beef00abab")["Threat category"] == "category 0"
+        assert matcher.match("00abac") is None
+
+    def test_backreference_in_later_row(self):
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures(["beef", "(ab)\\1", "(?P<x>cd)(?P=x)", "cafe"]))
+        assert matcher.match("00abab")["Threat category"] == "category 1"
+        assert matcher.match("00cdcd")["Threat category"] == "category 2"
+        assert matcher.match("cafe00abab")["Threat category"] == "category 1", "should report the first matching row"
+        assert matcher.match("abab00beef")["Threat category"] == "category 0"
+        assert matcher.match("00ab00cd") is None
+
+    def test_empty(self):
+        matcher = SignatureMatcher(TestSignatureMatcher.signatures([]))
+        assert matcher.match("beef") is None
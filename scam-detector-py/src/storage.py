@@ -3,6 +3,7 @@ import boto3
 import json
 import requests
 import os
+import threading
 
 owner_db = "https://research.forta.network/database/owner/"
 bucket_name = "prod-research-bot-data"
@@ -51,4 +52,21 @@ def dynamo_table(secrets, region='us-east-1'):
                        aws_secret_access_key=secrets['aws']['secretKey'],
                        region_name=region)
 
-    return d.Table(dynamo_table_name)
\ No newline at end of file
+    return d.Table(dynamo_table_name)
+
+
+class ThreadLocalTable:
+    """
+    a dynamo table resource per thread, created on first use; boto3 resources are not thread safe
+    """
+
+    def __init__(self, create_table):
+        self.create_table = create_table
+        self.local = threading.local()
+
+    def get(self):
+        table = getattr(self.local, "table", None)
+        if table is None:
+            table = self.create_table()
+            self.local.table = table
+        return table
@@ -0,0 +1,29 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    thread safe rate limiter allowing rate calls per second with bursts of up to capacity calls
+    acquire reserves a token and sleeps until it is available; the lock is not held while sleeping, so waiting callers are served in order
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """blocks until a token is available; returns the seconds waited"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
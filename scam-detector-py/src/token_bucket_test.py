@@ -0,0 +1,32 @@
+import threading
+import time
+
+from token_bucket import TokenBucket
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        bucket = TokenBucket(20)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        assert 0.19 <= elapsed < 0.4, "first call is free, the other 4 should be spaced by 1/20 seconds"
+
+    def test_burst(self):
+        bucket = TokenBucket(1, capacity=3)
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0], "should allow a burst up to the capacity"
+        assert bucket.acquire() > 0
+
+    def test_concurrent_callers(self):
+        bucket = TokenBucket(20)
+        waits = []
+        threads = [threading.Thread(target=lambda: waits.append(bucket.acquire())) for _ in range(5)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 0.19 <= time.monotonic() - start < 0.4, "callers should be spaced, not all wait for the same token"
+        assert sorted(round(wait * 20) for wait in waits) == [0, 1, 2, 3, 4]
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class TreeEnsembleScorer:
+    """
+    flattened copy of a fitted sklearn RandomForestClassifier; all trees are stored in one set of node arrays (feature, threshold, children, value)
+    so a single vector or a small batch can be scored without going through sklearn's per call input validation
+    predictions follow sklearn's arithmetic (float32 inputs, per tree normalized leaf values summed in tree order) and are therefore identical to predict_proba
+    """
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        self.n_trees = len(trees)
+        self.n_features = model.n_features_in_
+        self.classes = model.classes_
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1]
+
+        features, thresholds, left_children, right_children, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            # leaves point to themselves, so every tree can be walked for max_depth steps
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            left_children.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right_children.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+            value = tree.value[:, 0, :len(self.classes)].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.children_left = np.concatenate(left_children).astype(np.intp)
+        self.children_right = np.concatenate(right_children).astype(np.intp)
+        self.value = np.concatenate(values)
+
+    def leaves(self, feature_vectors: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(feature_vectors, dtype=np.float32))  # sklearn trees evaluate on float32
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.tile(self.roots, (X.shape[0], 1))  # (samples, trees)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        return nodes
+
+    def predict_proba(self, feature_vectors: np.ndarray) -> np.ndarray:
+        tree_probas = self.value[self.leaves(feature_vectors)]  # (samples, trees, classes)
+        # cumsum adds the trees in order like sklearn's accumulation; np.sum would use pairwise summation
+        return np.cumsum(tree_probas, axis=1)[:, -1, :] / self.n_trees
+
+    def equivalent_to(self, model, feature_vectors: np.ndarray) -> bool:
+        return np.array_equal(self.predict_proba(feature_vectors), model.predict_proba(feature_vectors))
@@ -0,0 +1,34 @@
+import joblib
+import numpy as np
+import pytest
+
+from constants import MODEL_FEATURES, MODEL_NAME
+from feature_vector import FeatureVectorBuilder
+from tree_scorer import TreeEnsembleScorer
+
+
+class TestTreeEnsembleScorer:
+    MODEL = joblib.load(MODEL_NAME)
+    BUILDER = FeatureVectorBuilder(MODEL_FEATURES)
+
+    @staticmethod
+    def random_feature_vectors(size: int) -> np.ndarray:
+        rng = np.random.default_rng(1)
+        shape = (size, len(MODEL_FEATURES))
+        return (rng.integers(1, 10, shape) * (rng.random(shape) < 0.2)).astype(np.float64)
+
+    def test_predict_proba_single(self):
+        scorer = TreeEnsembleScorer(TestTreeEnsembleScorer.MODEL)
+        df_feature_vector = TestTreeEnsembleScorer.BUILDER.to_dataframe(TestTreeEnsembleScorer.random_feature_vectors(1)[0])
+        expected = TestTreeEnsembleScorer.MODEL.predict_proba(df_feature_vector)
+        assert np.array_equal(scorer.predict_proba(df_feature_vector.values), expected), "score should be identical to predict_proba"
+
+    def test_predict_proba_batch(self):
+        scorer = TreeEnsembleScorer(TestTreeEnsembleScorer.MODEL)
+        df_feature_vectors = TestTreeEnsembleScorer.BUILDER.to_dataframe(TestTreeEnsembleScorer.random_feature_vectors(500))
+        assert scorer.equivalent_to(TestTreeEnsembleScorer.MODEL, df_feature_vectors), "scores should be identical to predict_proba"
+
+    def test_predict_proba_wrong_shape(self):
+        scorer = TreeEnsembleScorer(TestTreeEnsembleScorer.MODEL)
+        with pytest.raises(ValueError):
+            scorer.predict_proba(np.zeros((1, 3)))
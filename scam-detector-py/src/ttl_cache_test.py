@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from ttl_cache import TTLCache
+
+
+class TestTTLCache:
+
+    def test_get_put(self):
+        cache = TTLCache(10, 60)
+        assert cache.get("a") is None, "should be a miss"
+        cache.put("a", [1])
+        assert cache.get("a") == [1], "should be a hit"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2, 60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # a is now most recently used
+        cache.put("c", 3)
+        assert len(cache) == 2, "should be bounded by max size"
+        assert cache.get("b") is None, "least recently used entry should be evicted"
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = TTLCache(10, 30)
+        with patch("ttl_cache.time.time", return_value=1000):
+            cache.put("a", 1)
+        with patch("ttl_cache.time.time", return_value=1029):
+            assert cache.get("a") == 1, "should not be expired yet"
+        with patch("ttl_cache.time.time", return_value=1030):
+            assert cache.get("a") is None, "should be expired"
+        assert len(cache) == 0, "expired entry should be removed"
+
+    def test_invalidate(self):
+        cache = TTLCache(10, 60)
+        cache.put("a", 1)
+        cache.invalidate("a")
+        cache.invalidate("b")
+        assert cache.get("a") is None, "should be invalidated"
+
+    def test_update(self):
+        cache = TTLCache(10, 60)
+        cache.put("a", [1])
+        assert cache.update("a", lambda value: value.append(2))
+        assert not cache.update("b", lambda value: value.append(2)), "should not update an entry that isnt cached"
+        assert cache.get("a") == [1, 2]
+        assert cache.stats()["hits"] == 1, "should not count updates as lookups"
+
+    def test_clear(self):
+        cache = TTLCache(10, 60)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0, "max_size": 10}
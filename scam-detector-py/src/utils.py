@@ -7,19 +7,24 @@ import logging
 import io
 import rlp
 import base64
-import gnupg
 import time
 import pandas as pd
 import json
 import os
-import math
+import sys
+import threading
 from datetime import datetime, timedelta
 import traceback
 from web3 import Web3
 from forta_agent import get_json_rpc_url
 
-from src.constants import TX_COUNT_FILTER_THRESHOLD, CONFIDENCE_MAPPINGS
+from src.constants import (TX_COUNT_FILTER_THRESHOLD, CONFIDENCE_MAPPINGS, PAGINATION_MAX_WORKERS, FETCH_ALERTS_PAGE_SIZE, FETCH_ALERTS_MIN_WINDOW_IN_MS,
+                           FETCH_LABELS_PAGE_SIZE, FETCH_LABELS_ENTITY_BATCH_SIZE, FP_VERDICT_CACHE_SIZE, FP_VERDICT_CACHE_TTL_IN_SECONDS)
 from src.error_cache import ErrorCache
+from src.paginator import Paginator
+from src.ttl_cache import TTLCache
+from src.decryption_worker import DecryptionWorker
+from src.list_loader import ListLoader
 from src.storage import get_secrets
 
 
@@ -29,6 +34,8 @@ class Utils:
     ETHERSCAN_LABEL_SOURCE_IDS = ['etherscan','0x6f022d4a65f397dffd059e269e1c2b5004d822f905674dbf518d968f744c2ede']
     FP_MITIGATION_ADDRESSES = set()
     CONTRACT_CACHE = dict()
+    CONTRACT_CACHE_LOCK = threading.Lock()  # is_contract is called from the FP check threads
+    FP_VERDICT_CACHE = TTLCache(FP_VERDICT_CACHE_SIZE, FP_VERDICT_CACHE_TTL_IN_SECONDS)  # (cluster, chain_id) -> is_fp based on etherscan labels, tx count and deployed contracts
     BOT_VERSION = None
     TOTAL_SHARDS = None
     IS_BETA = None
@@ -36,6 +43,11 @@ class Utils:
 
     QUALITY_METRICS = None
 
+    # parsed lists are shared between callers and must not be modified
+    FP_LIST_LOADER = ListLoader('fp_list.csv', 'https://raw.githubusercontent.com/forta-network/starter-kits/main/scam-detector-py/fp_list.csv', lambda content: Utils.parse_fp_list(content), 'fp_list.csv')
+    MANUAL_LIST_LOADER = ListLoader('manual_alert_list_v2.tsv', 'https://raw.githubusercontent.com/forta-network/starter-kits/main/scam-detector-py/manual_alert_list_v2.tsv', lambda content: Utils.parse_manual_list(content), 'manual_alert_list_v2.tsv')
+    METAMASK_PHISHING_LIST_LOADER = ListLoader('metamask_phishing_list.json', 'https://raw.githubusercontent.com/MetaMask/eth-phishing-detect/master/src/config.json', lambda content: Utils.parse_metamask_phishing_list(content), 'metamask_phishing_list.json')
+
     RPC_ENDPOINT = None
     TEST_STATE = False
 
@@ -45,26 +57,42 @@ class Utils:
 
 
     @staticmethod
-    def get_fp_list() -> pd.DataFrame:
-        content = open('fp_list_test.csv', 'r').read() if Utils.in_test_state() else open('fp_list.csv', 'r').read()
-        if not Utils.in_test_state():
-            res = requests.get('https://raw.githubusercontent.com/forta-network/starter-kits/main/scam-detector-py/fp_list.csv')
-            logging.info(f"Made request to fetch fp list: {res.status_code}")
-            content = res.content.decode('utf-8') if res.status_code == 200 else open('fp_list.csv', 'r').read()
+    def intern_column(df: pd.DataFrame, column: str) -> pd.DataFrame:
+        # addresses repeat across rows and reloads; keep one copy of each
+        if column in df.columns:
+            df[column] = df[column].map(lambda value: sys.intern(value) if isinstance(value, str) else value)
+        return df
+
+    @staticmethod
+    def parse_fp_list(content: str) -> pd.DataFrame:
+        if content is None:
+            return pd.DataFrame(columns=['address', 'chain_id', 'comment'])
+        return Utils.intern_column(pd.read_csv(io.StringIO(content), sep=','), 'address')
 
-        df_fps = pd.read_csv(io.StringIO(content), sep=',')
-        return df_fps
+    @staticmethod
+    def parse_manual_list(content: str) -> pd.DataFrame:
+        if content is None:
+            return pd.DataFrame(columns=['Date', 'EntityType', 'Entity', 'Account', 'Tweet', 'Chain ID', 'Threat category', 'Comment', 'Attribution'])
+        return Utils.intern_column(pd.read_csv(io.StringIO(content), sep='\t'), 'Entity')
+
+    @staticmethod
+    def parse_metamask_phishing_list(content: str) -> list:
+        # keeps the order of the list (without duplicates), so findings are emitted in the same order on every run
+        if content is None:
+            return []
+        return list(dict.fromkeys(sys.intern(url) for url in json.loads(content).get('blacklist', [])))
+
+    @staticmethod
+    def get_fp_list() -> pd.DataFrame:
+        if Utils.in_test_state():
+            return Utils.parse_fp_list(open('fp_list_test.csv', 'r').read())
+        return Utils.FP_LIST_LOADER.get()
 
     @staticmethod
     def get_manual_list() -> pd.DataFrame:
-        content = open('manual_alert_list_test.tsv', 'r').read() if Utils.in_test_state() else open('manual_alert_list_v2.tsv', 'r').read()
-        if not Utils.in_test_state():
-            res = requests.get('https://raw.githubusercontent.com/forta-network/starter-kits/main/scam-detector-py/manual_alert_list_v2.tsv')
-            logging.info(f"Made request to fetch manual alerts: {res.status_code}")
-            content = res.content.decode('utf-8') if res.status_code == 200 else open('manual_alert_list_v2.tsv', 'r').read()
-
-        df_manual_findings = pd.read_csv(io.StringIO(content), sep='\t')
-        return df_manual_findings
+        if Utils.in_test_state():
+            return Utils.parse_manual_list(open('manual_alert_list_test.tsv', 'r').read())
+        return Utils.MANUAL_LIST_LOADER.get()
     
     @staticmethod
     def get_quality_metrics() -> dict:
@@ -110,16 +138,8 @@ class Utils:
     @staticmethod
     def get_metamask_phishing_list() -> list:
         if Utils.in_test_state():
-            with open('test_phishing_list.json', 'r') as file:
-                return json.load(file).get('blacklist', [])
-            
-        res = requests.get('https://raw.githubusercontent.com/MetaMask/eth-phishing-detect/master/src/config.json')
-        logging.info(f"Made request to fetch metamask phishing list: {res.status_code}")
-        if res.status_code == 200:
-            config_json = json.loads(res.content)
-            if 'blacklist' in config_json:
-                return config_json['blacklist']
-        return []
+            return Utils.parse_metamask_phishing_list(open('test_phishing_list.json', 'r').read())
+        return Utils.METAMASK_PHISHING_LIST_LOADER.get()
 
 
     @staticmethod
@@ -169,14 +189,17 @@ class Utils:
         if addresses is None:
             return True
 
-        if Utils.CONTRACT_CACHE.get(addresses) is not None:
-            return Utils.CONTRACT_CACHE[addresses]
+        with Utils.CONTRACT_CACHE_LOCK:
+            is_contract = Utils.CONTRACT_CACHE.get(addresses)
+        if is_contract is not None:
+            return is_contract
         else:
             is_contract = True
             for address in addresses.split(','):
                 code = w3.eth.get_code(Web3.toChecksumAddress(address))
                 is_contract = is_contract & (code != HexBytes('0x'))
-            Utils.CONTRACT_CACHE[addresses] = is_contract
+            with Utils.CONTRACT_CACHE_LOCK:
+                Utils.CONTRACT_CACHE[addresses] = is_contract
             return is_contract
         
     @staticmethod
@@ -258,66 +281,16 @@ class Utils:
                 findings_cache_alert.append(likely_fp_finding)
 
         if is_address: # if it's not a URL
-            from src.blockchain_indexer_service import BlockChainIndexer
-            block_chain_indexer = BlockChainIndexer()
-            labels_dict = block_chain_indexer.get_etherscan_labels(cluster.split(',')) # dict_values([{'labels': ['Proposer Fee Recipient'], 'nametag': 'Fee Recipient: 0xF4...A38'}])
-            labels = []
-            for item in labels_dict.values():
-                if 'labels' in item.keys():
-                    labels.extend(item['labels'])
-                if 'nametag' in item.keys():
-                    labels.append(item['nametag'])
-            etherscan_label = ','.join(labels).lower()
-            if not ('attack' in etherscan_label
-                    or 'phish' in etherscan_label
-                    or 'hack' in etherscan_label
-                    or 'heist' in etherscan_label
-                    or 'exploit' in etherscan_label
-                    or 'drainer' in etherscan_label
-                    or 'scam' in etherscan_label
-                    or 'fraud' in etherscan_label
-                    or '.eth' in etherscan_label
-                    or etherscan_label == ''):
-                logging.info(f"Cluster {cluster} etherscan label: {etherscan_label}")
-                if Utils.is_beta() or Utils.is_beta_alt():
-                    for address, item in labels_dict.items():        
-                            append_fp_finding(address, item['labels'], item['nametag'])
+            verdict = Utils.FP_VERDICT_CACHE.get((cluster, chain_id))
+            if verdict is None:
+                verdict, cacheable = Utils.assess_address_fp(w3, cluster, chain_id, append_fp_finding)
+                if cacheable:
+                    Utils.FP_VERDICT_CACHE.put((cluster, chain_id), verdict)
+            if verdict is None:
+                return False
+            if verdict:
                 return True
 
-            tx_count = 0
-            has_zero_nonce = False
-            try:
-                tx_count = Utils.get_max_tx_count(w3, cluster)
-                has_zero_nonce = tx_count == 0
-            except BaseException as e:
-                error_finding = Utils.alert_error(str(e), "Utils.get_max_tx_count", f"{traceback.format_exc()}")
-                Utils.ERROR_CACHE.add(error_finding)
-                logging.error(f"Exception in assessing get_transaction_count for cluster {cluster}: {e}")
-
-            if tx_count > TX_COUNT_FILTER_THRESHOLD:
-                logging.info(f"Cluster {cluster} transacton count: {tx_count}")
-                if Utils.is_beta() or Utils.is_beta_alt():
-                    append_fp_finding(cluster)
-                return True
-            
-            if not has_zero_nonce:
-                try:
-                    from src.blockchain_indexer_service import BlockChainIndexer
-                    block_chain_indexer = BlockChainIndexer()
-                    if block_chain_indexer.has_deployed_high_tx_count_contract(cluster, chain_id):
-                        logging.info(f"Cluster {cluster} has deployed a high tx count contract")
-                        if Utils.is_beta() or Utils.is_beta_alt():
-                            append_fp_finding(cluster)
-                        return True
-                    else:
-                        logging.info(f"Cluster {cluster} has not deployed a high tx count contract")
-
-                except BaseException as e:
-                    error_finding = Utils.alert_error(str(e), "Utils.block_chain_indexer.has_deployed_high_tx_count_contract", f"{traceback.format_exc()}")
-                    Utils.ERROR_CACHE.add(error_finding)
-                    logging.error(f"Exception in assessing has_deployed_high_tx_count_contract for cluster {cluster}: {e}")
-                    return False
-
         if Utils.is_in_fp_mitigation_list(cluster):
             if Utils.is_beta() or Utils.is_beta_alt():
                 append_fp_finding(cluster)
@@ -325,6 +298,76 @@ class Utils:
 
         return False
 
+    @staticmethod
+    def assess_address_fp(w3, cluster: str, chain_id, append_fp_finding) -> tuple:
+        """
+        checks the etherscan labels, tx count and deployed contracts of the cluster
+        returns (is_fp, cacheable); is_fp is None if the assessment failed
+        """
+        from src.blockchain_indexer_service import BlockChainIndexer
+        block_chain_indexer = BlockChainIndexer()
+        labels_dict, labels_complete = block_chain_indexer.lookup_etherscan_labels(cluster.split(',')) # dict_values([{'labels': ['Proposer Fee Recipient'], 'nametag': 'Fee Recipient: 0xF4...A38'}])
+        if not labels_complete:
+            logging.warning(f"Etherscan labels of cluster {cluster} couldnt be retrieved; the verdict wont be cached")
+        labels = []
+        for item in labels_dict.values():
+            if 'labels' in item.keys():
+                labels.extend(item['labels'])
+            if 'nametag' in item.keys():
+                labels.append(item['nametag'])
+        etherscan_label = ','.join(labels).lower()
+        if not ('attack' in etherscan_label
+                or 'phish' in etherscan_label
+                or 'hack' in etherscan_label
+                or 'heist' in etherscan_label
+                or 'exploit' in etherscan_label
+                or 'drainer' in etherscan_label
+                or 'scam' in etherscan_label
+                or 'fraud' in etherscan_label
+                or '.eth' in etherscan_label
+                or etherscan_label == ''):
+            logging.info(f"Cluster {cluster} etherscan label: {etherscan_label}")
+            if Utils.is_beta() or Utils.is_beta_alt():
+                for address, item in labels_dict.items():        
+                        append_fp_finding(address, item['labels'], item['nametag'])
+            return True, labels_complete
+
+        cacheable = labels_complete
+        tx_count = 0
+        has_zero_nonce = False
+        try:
+            tx_count = Utils.get_max_tx_count(w3, cluster)
+            has_zero_nonce = tx_count == 0
+        except BaseException as e:
+            error_finding = Utils.alert_error(str(e), "Utils.get_max_tx_count", f"{traceback.format_exc()}")
+            Utils.ERROR_CACHE.add(error_finding)
+            logging.error(f"Exception in assessing get_transaction_count for cluster {cluster}: {e}")
+            cacheable = False
+
+        if tx_count > TX_COUNT_FILTER_THRESHOLD:
+            logging.info(f"Cluster {cluster} transacton count: {tx_count}")
+            if Utils.is_beta() or Utils.is_beta_alt():
+                append_fp_finding(cluster)
+            return True, cacheable
+        
+        if not has_zero_nonce:
+            try:
+                if block_chain_indexer.has_deployed_high_tx_count_contract(cluster, chain_id):
+                    logging.info(f"Cluster {cluster} has deployed a high tx count contract")
+                    if Utils.is_beta() or Utils.is_beta_alt():
+                        append_fp_finding(cluster)
+                    return True, cacheable
+                else:
+                    logging.info(f"Cluster {cluster} has not deployed a high tx count contract")
+
+            except BaseException as e:
+                error_finding = Utils.alert_error(str(e), "Utils.block_chain_indexer.has_deployed_high_tx_count_contract", f"{traceback.format_exc()}")
+                Utils.ERROR_CACHE.add(error_finding)
+                logging.error(f"Exception in assessing has_deployed_high_tx_count_contract for cluster {cluster}: {e}")
+                return None, False
+
+        return False, cacheable
+
     @staticmethod
     def is_in_fp_mitigation_list(cluster: str) -> bool:
         if cluster in Utils.FP_MITIGATION_ADDRESSES:
@@ -393,18 +436,17 @@ class Utils:
         address_bytes = bytes.fromhex(address[2:].lower())
         return Web3.toChecksumAddress(Web3.keccak(rlp.encode([address_bytes, nonce]))[-20:])
 
-    gpg = None
+    DECRYPTION_WORKER = None
 
     @staticmethod
-    def decrypt_alert(encrypted_finding_ascii:str, private_key:str) -> Finding:
-        if Utils.gpg is None:
-            Utils.gpg =  gnupg.GPG(gnupghome='.')
-            import_result = Utils.gpg.import_keys(private_key)
-            for fingerprint in import_result.fingerprints:
-                Utils.gpg.trust_keys(fingerprint, 'TRUST_ULTIMATE')
-    
-        decrypted_finding_json = Utils.gpg.decrypt(encrypted_finding_ascii)
-        finding_dict = json.loads(str(decrypted_finding_json))
+    def get_decryption_worker() -> DecryptionWorker:
+        if Utils.DECRYPTION_WORKER is None:
+            Utils.DECRYPTION_WORKER = DecryptionWorker()
+        return Utils.DECRYPTION_WORKER
+
+    @staticmethod
+    def parse_decrypted_finding(decrypted_finding_json: str) -> Finding:
+        finding_dict = json.loads(decrypted_finding_json)
 
         finding_dict['severity'] = FindingSeverity(finding_dict['severity'])
         finding_dict['type'] = FindingType(finding_dict['type'])
@@ -419,41 +461,21 @@ class Utils:
         
         return Finding(finding_dict)
 
+    @staticmethod
+    def decrypt_alert(encrypted_finding_ascii:str, private_key:str) -> Finding:
+        decrypted_finding_json = Utils.get_decryption_worker().decrypt(encrypted_finding_ascii, private_key)
+        return Utils.parse_decrypted_finding(decrypted_finding_json)
+
     @staticmethod
     def decrypt_alert_event(alert_event: AlertEvent, private_key:str) -> AlertEvent:
-        if Utils.gpg is None:
-            logging.info("Importing private keys into GPG")
-    
-            Utils.gpg =  gnupg.GPG(gnupghome='.')
-            import_result = Utils.gpg.import_keys(private_key)
-            if len(import_result.fingerprints) == 0:
-                logging.info("Imported no private key into GPG")
-    
-            for fingerprint in import_result.fingerprints:
-                Utils.gpg.trust_keys(fingerprint, 'TRUST_ULTIMATE')
-                logging.info(f"Imported private key {fingerprint} into GPG")
-    
         if alert_event.alert.name == 'omitted' and 'data' in alert_event.alert.metadata.keys():
             encrypted_finding_ascii = alert_event.alert.metadata['data']
             logging.info(f"Decrypting finding. Data length: {len(encrypted_finding_ascii)}. Private key length {len(private_key)}")
-            
-            decrypted_finding_json = Utils.gpg.decrypt(encrypted_finding_ascii)
-            logging.info(f"Decrypted finding. Data length: {len(str(decrypted_finding_json))}")
-            if len(str(decrypted_finding_json)) > 0:
-                finding_dict = json.loads(str(decrypted_finding_json))
-
-                finding_dict['severity'] = FindingSeverity(finding_dict['severity'])
-                finding_dict['type'] = FindingType(finding_dict['type'])
-                finding_dict['alert_id'] = finding_dict['alertId']
-
-                labels_new = []
-                labels = finding_dict['labels']
-                for label in labels:
-                    if label['entity'] != '':
-                        labels_new.append(label)
-                finding_dict['labels'] = labels_new
-            
-                finding = Finding(finding_dict)
+
+            decrypted_finding_json = Utils.get_decryption_worker().decrypt(encrypted_finding_ascii, private_key)
+            logging.info(f"Decrypted finding. Data length: {len(decrypted_finding_json)}")
+            if len(decrypted_finding_json) > 0:
+                finding = Utils.parse_decrypted_finding(decrypted_finding_json)
 
                 alert_event.alert.name = finding.name
                 alert_event.alert.description = finding.description
@@ -482,86 +504,75 @@ class Utils:
             Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.process_past_alerts", traceback.format_exc()))
         return list(unique_scammers)
     
+    @staticmethod
+    def is_retryable_forta_api_error(e: Exception) -> bool:
+        # the response was too large; reduce the page size in order to reduce the response size and try again
+        return (isinstance(e, AttributeError) and 'NoneType' in str(e)) or "Internal server error" in str(e) or "request source is not a deployed agent" in str(e)
+
     @staticmethod
     def fetch_labels(unique_scammers_list, source_id, get_labels_created_since_timestamp_ms, BOT_VERSION):
-        labels = []
-        starting_cursor = None
-        should_retry_from_error = False
-        labels_response = None
-        batch_size = 200
-        page_size = 1000
-
-        for i in range(0, len(unique_scammers_list), batch_size):
-            batch = unique_scammers_list[i:i + batch_size]
-
-            while True:
-                if labels_response and labels_response.page_info and labels_response.page_info.has_next_page:
-                    starting_cursor = labels_response.page_info.end_cursor
-                    should_retry_from_error = False
-
-                try:
-                    query = {
-                        "entities": batch,
-                        "source_ids": [source_id],
-                        "labels": ["scammer"],
-                        "created_since": get_labels_created_since_timestamp_ms,
-                        "state": True,
-                        "first": page_size,
-                        "starting_cursor": starting_cursor
-                    }
-
-                    labels_response = get_labels(query)
-                    labels.extend(labels_response.labels)
-                except Exception as e:
-                    if (isinstance(e, AttributeError) and 'NoneType' in str(e)) or (isinstance(e, Exception) and "Internal server error" in str(e)):
-                        # Reduce the page size in order to reduce the response size and try again
-                        page_size = math.floor(page_size / 2)
-                        should_retry_from_error = page_size > 1
-                    else:
-                        logging.warning(f"{BOT_VERSION}: update reactive likely fps (get_labels error): {e} - {traceback.format_exc()}")
-                        Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.update_reactive_likely_fps.internal3", traceback.format_exc()))
-                        raise e
-
-                if not should_retry_from_error and not labels_response.page_info.has_next_page:
-                    break
+        def fetch_page(entities, starting_cursor, page_size):
+            query = {
+                "entities": entities,
+                "source_ids": [source_id],
+                "labels": ["scammer"],
+                "created_since": get_labels_created_since_timestamp_ms,
+                "state": True,
+                "first": page_size,
+                "starting_cursor": starting_cursor
+            }
+            return get_labels(query)
+
+        def next_cursor(labels_response):
+            return labels_response.page_info.end_cursor if labels_response.page_info and labels_response.page_info.has_next_page else None
+
+        paginator = Paginator(fetch_page, lambda labels_response: labels_response.labels, next_cursor, Utils.is_retryable_forta_api_error,
+                              FETCH_LABELS_PAGE_SIZE, key=lambda label: label.id)
+        batches = [unique_scammers_list[i:i + FETCH_LABELS_ENTITY_BATCH_SIZE] for i in range(0, len(unique_scammers_list), FETCH_LABELS_ENTITY_BATCH_SIZE)]
+        try:
+            labels = paginator.fetch(batches)
+        except Exception as e:
+            logging.warning(f"{BOT_VERSION}: update reactive likely fps (get_labels error): {e} - {traceback.format_exc()}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.update_reactive_likely_fps.internal3", traceback.format_exc()))
+            raise e
 
+        logging.info(f"{BOT_VERSION}: fetch_labels: {len(labels)} labels in {paginator.requests} requests ({paginator.retries} retries, {paginator.duplicates} duplicates)")
         return labels
-    
+
     @staticmethod
     def fetch_alerts(source_id, start_milliseconds_ago, end_milliseconds_ago, BOT_VERSION, CHAIN_ID):
-        response = None
-        starting_cursor = None
-        should_retry_from_error = False
-        page_size = 1200
-        alerts = []
-
-        while True:
-                if response and response.page_info and response.page_info.has_next_page:
-                    starting_cursor = {
-                        'alertId': response.page_info.end_cursor.alert_id,
-                        'blockNumber': response.page_info.end_cursor.block_number
-                    }
-                    should_retry_from_error = False
-                try:
-                    query = {
-                        "bot_ids": [source_id],
-                        "created_since": start_milliseconds_ago,
-                        "created_before": end_milliseconds_ago,
-                        "starting_cursor": starting_cursor,
-                        "chain_id": CHAIN_ID,
-                        "first": page_size
-                    }
-                    response = get_alerts(query)
-                    alerts.extend(response.alerts)
-                except Exception as e:
-                    if  (isinstance(e, AttributeError) and 'NoneType' in str(e)) or (isinstance(e, Exception) and "Internal server error" in str(e)) or ("request source is not a deployed agent" in str(e)):
-                        # Reduce the page size in order to reduce the response size and try again
-                        page_size = math.floor(page_size / 2)
-                        should_retry_from_error = page_size > 1
-                    else:
-                        logging.warning(f"{BOT_VERSION}: fetch_alerts (get_alerts error): {e} - {traceback.format_exc()}")
-                        Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.fetch_alerts", traceback.format_exc()))
-                if (not page_size) or (not should_retry_from_error and response and response.page_info.end_cursor.alert_id == ""):
-                    break
-
+        def fetch_page(window, starting_cursor, page_size):
+            created_since, created_before = window
+            query = {
+                "bot_ids": [source_id],
+                "created_since": created_since,
+                "created_before": created_before,
+                "starting_cursor": starting_cursor,
+                "chain_id": CHAIN_ID,
+                "first": page_size
+            }
+            return get_alerts(query)
+
+        def next_cursor(response):
+            if response.page_info and response.page_info.has_next_page and response.page_info.end_cursor.alert_id != "":
+                return {
+                    'alertId': response.page_info.end_cursor.alert_id,
+                    'blockNumber': response.page_info.end_cursor.block_number
+                }
+            return None
+
+        def on_error(e):
+            logging.warning(f"{BOT_VERSION}: fetch_alerts (get_alerts error): {e} - {traceback.format_exc()}")
+            Utils.ERROR_CACHE.add(Utils.alert_error(str(e), "agent.fetch_alerts", traceback.format_exc()))
+
+        # created_since/created_before are milliseconds ago; split the range into sub windows that are paged in parallel
+        span = start_milliseconds_ago - end_milliseconds_ago
+        window_count = max(1, min(PAGINATION_MAX_WORKERS, span // FETCH_ALERTS_MIN_WINDOW_IN_MS))
+        boundaries = [start_milliseconds_ago - span * i // window_count for i in range(window_count)] + [end_milliseconds_ago]
+        windows = list(zip(boundaries[:-1], boundaries[1:]))
+
+        paginator = Paginator(fetch_page, lambda response: response.alerts, next_cursor, Utils.is_retryable_forta_api_error,
+                              FETCH_ALERTS_PAGE_SIZE, key=lambda alert: alert.hash)
+        alerts = paginator.fetch(windows, on_error=on_error)
+        logging.info(f"{BOT_VERSION}: fetch_alerts: {len(alerts)} alerts in {paginator.requests} requests ({paginator.retries} retries, {paginator.duplicates} duplicates)")
         return alerts
\ No newline at end of file
@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import patch
 import json
 from forta_agent import get_json_rpc_url, FindingSeverity, FindingType, Finding
 from web3 import Web3
@@ -56,6 +57,35 @@ class TestUtils:
     def test_fp_mitigation_addresses(self):
         assert Utils.is_fp(w3, "0x7f39c581f595b53c5cb19bd0b3f8da6c935e2ca0", 1), "this should be a false positive"
 
+    def test_is_fp_verdict_cache(self):
+        from src.blockchain_indexer_service import BlockChainIndexer  # the module is_fp imports
+        Utils.FP_VERDICT_CACHE.clear()
+        w3 = Web3Mock()
+        with patch.object(BlockChainIndexer, "lookup_etherscan_labels", return_value=({}, True)) as lookup_etherscan_labels, \
+                patch.object(BlockChainIndexer, "has_deployed_high_tx_count_contract", return_value=False):
+            assert not Utils.is_fp(w3, EOA_ADDRESS_SMALL_TX, 1)
+            assert not Utils.is_fp(w3, EOA_ADDRESS_SMALL_TX, 1)
+            assert lookup_etherscan_labels.call_count == 1, "should reuse the verdict"
+            assert Utils.FP_VERDICT_CACHE.stats()["hits"] == 1
+
+            Utils.FP_MITIGATION_ADDRESSES.add(EOA_ADDRESS_SMALL_TX)
+            try:
+                assert Utils.is_fp(w3, EOA_ADDRESS_SMALL_TX, 1), "should still check the fp mitigation list"
+            finally:
+                Utils.FP_MITIGATION_ADDRESSES.discard(EOA_ADDRESS_SMALL_TX)
+        Utils.FP_VERDICT_CACHE.clear()
+
+    def test_is_fp_verdict_not_cached_on_label_failure(self):
+        from src.blockchain_indexer_service import BlockChainIndexer  # the module is_fp imports
+        Utils.FP_VERDICT_CACHE.clear()
+        w3 = Web3Mock()
+        with patch.object(BlockChainIndexer, "lookup_etherscan_labels", return_value=({}, False)) as lookup_etherscan_labels, \
+                patch.object(BlockChainIndexer, "has_deployed_high_tx_count_contract", return_value=False):
+            assert not Utils.is_fp(w3, EOA_ADDRESS_SMALL_TX, 1)
+            assert not Utils.is_fp(w3, EOA_ADDRESS_SMALL_TX, 1)
+            assert lookup_etherscan_labels.call_count == 2, "should not cache a verdict without the etherscan labels"
+        Utils.FP_VERDICT_CACHE.clear()
+
     def test_get_total_shards(self):
         assert Utils.get_total_shards(w3) == 8, "this should be 8"
 